@@ -0,0 +1,232 @@
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+
+PARAMS = ['viscosidade_40c', 'teor_agua', 'particulas_4um', 'particulas_6um', 'particulas_14um']
+ORIGINS = ['Mineradora', 'Distribuidora']
+
+
+class QuantileSketch:
+    # Histograma em escala logarítmica (estilo DDSketch): erro relativo <= accuracy em qualquer
+    # quantil, memória proporcional a log(max/min) e fusão por soma de contagens
+    def __init__(self, accuracy: float = 0.01) -> None:
+        self.accuracy = accuracy
+        self._gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.positive: dict[int, int] = {}
+        self.negative: dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+
+    def _key(self, v: float) -> int:
+        return math.ceil(math.log(v) / self._log_gamma)
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        if x > 0:
+            k = self._key(x)
+            self.positive[k] = self.positive.get(k, 0) + 1
+        elif x < 0:
+            k = self._key(-x)
+            self.negative[k] = self.negative.get(k, 0) + 1
+        else:
+            self.zero += 1
+
+    def add_array(self, values: np.ndarray) -> None:
+        self.count += len(values)
+        self.zero += int(np.count_nonzero(values == 0))
+        for store, part in ((self.positive, values[values > 0]), (self.negative, -values[values < 0])):
+            if len(part) == 0:
+                continue
+            keys, counts = np.unique(np.ceil(np.log(part) / self._log_gamma).astype(np.int64), return_counts=True)
+            for k, c in zip(keys.tolist(), counts.tolist()):
+                store[k] = store.get(k, 0) + c
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.accuracy != self.accuracy:
+            raise ValueError("Sketches com precisões diferentes não podem ser combinados")
+        for store, src in ((self.positive, other.positive), (self.negative, other.negative)):
+            for k, c in src.items():
+                store[k] = store.get(k, 0) + c
+        self.zero += other.zero
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return float('nan')
+        rank = q * (self.count - 1)
+        seen = 0
+        for k in sorted(self.negative, reverse=True):
+            seen += self.negative[k]
+            if seen > rank:
+                return -self._value(k)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for k in sorted(self.positive):
+            seen += self.positive[k]
+            if seen > rank:
+                return self._value(k)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def _value(self, k: int) -> float:
+        return 2.0 * self._gamma ** k / (self._gamma + 1)
+
+    def to_dict(self) -> dict:
+        return {
+            'accuracy': self.accuracy,
+            'positive': {str(k): c for k, c in self.positive.items()},
+            'negative': {str(k): c for k, c in self.negative.items()},
+            'zero': self.zero,
+            'count': self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "QuantileSketch":
+        sk = cls(d['accuracy'])
+        sk.positive = {int(k): int(c) for k, c in d['positive'].items()}
+        sk.negative = {int(k): int(c) for k, c in d['negative'].items()}
+        sk.zero = int(d['zero'])
+        sk.count = int(d['count'])
+        return sk
+
+
+class RunningStats:
+    def __init__(self, accuracy: float = 0.01) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self.sketch = QuantileSketch(accuracy)
+
+    def add(self, x: float) -> None:
+        # Welford: média e soma dos quadrados dos desvios atualizadas em O(1)
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        self.sketch.add(x)
+
+    def add_array(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        part = RunningStats(self.sketch.accuracy)
+        part.count = len(values)
+        part.mean = float(values.mean())
+        part.m2 = float(np.sum((values - part.mean) ** 2))
+        part.min = float(values.min())
+        part.max = float(values.max())
+        part.sketch.add_array(values)
+        self.merge(part)
+
+    def merge(self, other: "RunningStats") -> None:
+        # Fórmula de Chan et al. para combinar momentos de partições independentes
+        if other.count == 0:
+            return
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / n
+        self.m2 += other.m2 + delta * delta * self.count * other.count / n
+        self.count = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else float('nan')
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance) if self.count > 1 else float('nan')
+
+    @property
+    def median(self) -> float:
+        return self.sketch.quantile(0.5)
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'm2': self.m2,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'sketch': self.sketch.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "RunningStats":
+        rs = cls(d['sketch']['accuracy'])
+        rs.count = int(d['count'])
+        rs.mean = float(d['mean'])
+        rs.m2 = float(d['m2'])
+        rs.min = float(d['min']) if d['min'] is not None else float('inf')
+        rs.max = float(d['max']) if d['max'] is not None else float('-inf')
+        rs.sketch = QuantileSketch.from_dict(d['sketch'])
+        return rs
+
+
+class LabAccumulator:
+    def __init__(self, params: list[str] | None = None, accuracy: float = 0.01) -> None:
+        self.params = list(params or PARAMS)
+        self.accuracy = accuracy
+        self.stats = {o: {p: RunningStats(accuracy) for p in self.params} for o in ORIGINS}
+
+    def add(self, row: dict) -> None:
+        per_param = self.stats.get(row.get('origem'))
+        if per_param is None:
+            return
+        for p in self.params:
+            v = row.get(p)
+            if v is not None and not (isinstance(v, float) and math.isnan(v)):
+                per_param[p].add(float(v))
+
+    def add_frame(self, df: pd.DataFrame) -> None:
+        for origin in ORIGINS:
+            part = df[df['origem'] == origin]
+            for p in self.params:
+                if p in part.columns:
+                    self.stats[origin][p].add_array(part[p].to_numpy(dtype=np.float64, na_value=np.nan))
+
+    def merge(self, other: "LabAccumulator") -> None:
+        for origin in ORIGINS:
+            for p, rs in other.stats[origin].items():
+                if p not in self.stats[origin]:
+                    self.stats[origin][p] = RunningStats(self.accuracy)
+                    if p not in self.params:
+                        self.params.append(p)
+                self.stats[origin][p].merge(rs)
+
+    def get(self, origin: str, param: str) -> RunningStats:
+        return self.stats[origin][param]
+
+    def to_dict(self) -> dict:
+        return {
+            'params': self.params,
+            'accuracy': self.accuracy,
+            'stats': {o: {p: rs.to_dict() for p, rs in per.items()} for o, per in self.stats.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "LabAccumulator":
+        acc = cls(d['params'], d['accuracy'])
+        for o, per in d['stats'].items():
+            acc.stats[o] = {p: RunningStats.from_dict(v) for p, v in per.items()}
+        return acc
+
+    def save(self, path) -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.to_dict(), fh)
+
+    @classmethod
+    def load(cls, path) -> "LabAccumulator":
+        with open(path, encoding="utf-8") as fh:
+            return cls.from_dict(json.load(fh))
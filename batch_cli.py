@@ -0,0 +1,323 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from accumulators import LabAccumulator
+from classifier import ParameterClassifier
+from extraction_backends import BackendStats
+from extraction_cache import ExtractionCache
+from history_store import HistoryStore
+from instrumentation import Instrumentation
+from ishikawa_analyzer import CauseKnowledge, IshikawaAnalyzer
+from lab_dataset import ORIGINS, LabDataset
+from pairing import match_reports
+from pdf_extractor import PDFExtractor
+from template_registry import TemplateRegistry
+
+
+PARAMS = ['viscosidade_40c', 'teor_agua', 'particulas_4um', 'particulas_6um', 'particulas_14um']
+IDS = ['data_amostra', 'lote', 'amostra', 'nota_fiscal']
+COLUMNS = ['arquivo', 'origem'] + IDS + PARAMS
+
+
+def iter_pdfs(root: Path):
+    # Percorre o diretório de forma preguiçosa; a lista completa de arquivos nunca é montada
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(Path(entry.path))
+            elif entry.is_file() and entry.name.lower().endswith(".pdf"):
+                yield Path(entry.path)
+
+
+def iter_chunks(sources: list[tuple[Path, str]], chunk_size: int):
+    chunk = []
+    for root, origin in sources:
+        for path in iter_pdfs(root):
+            chunk.append((path, origin))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+class RowWriter:
+    def __init__(self, path: Path, fmt: str) -> None:
+        self.path = path
+        self.fmt = fmt
+        self.rows_written = 0
+        self._writer = None
+        if fmt == "parquet":
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                sys.exit("Formato parquet requer o pacote pyarrow; use --format csv")
+            self._pa = pa
+            self._schema = pa.schema(
+                [('arquivo', pa.string()), ('origem', pa.string())]
+                + [(c, pa.string()) for c in IDS]
+                + [(p, pa.float64()) for p in PARAMS]
+            )
+            self._writer = pq.ParquetWriter(path, self._schema)
+        elif path.exists():
+            path.unlink()
+
+    def write(self, rows: list[dict]) -> None:
+        if not rows:
+            return
+        frame = pd.DataFrame(rows, columns=COLUMNS)
+        if self.fmt == "parquet":
+            self._writer.write_table(self._pa.Table.from_pandas(frame, schema=self._schema, preserve_index=False))
+        else:
+            frame.to_csv(self.path, mode="a", header=self.rows_written == 0, index=False)
+        self.rows_written += len(frame)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+READ_ROWS = 100_000
+
+
+def iter_rows(path: Path, fmt: str, chunk_rows: int, columns: list[str] | None = None):
+    # Releitura em blocos: o arquivo inteiro nunca volta para a memória
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(
+            path, usecols=columns, chunksize=chunk_rows,
+            dtype={**{c: 'string' for c in IDS}, **{p: 'float64' for p in PARAMS}},
+        )
+
+
+def load_run(path: Path, fmt: str, dtype=np.float64) -> tuple[LabDataset, pd.DataFrame]:
+    # Análise completa: uma releitura em blocos, só com as colunas do pareamento, cada bloco compactado
+    # (origem categórica, valores em dtype) antes de ser guardado. A memória cresce com o nº de laudos
+    origem = pd.CategoricalDtype(ORIGINS)
+    parts = []
+    for chunk in iter_rows(path, fmt, READ_ROWS, ['origem'] + IDS + PARAMS):
+        chunk['origem'] = chunk['origem'].astype(origem)
+        chunk[PARAMS] = chunk[PARAMS].astype(dtype)
+        parts.append(chunk)
+    frame = pd.concat(parts, ignore_index=True)
+    return LabDataset.from_frame(frame, dtype=dtype), frame
+
+
+def _jsonable(obj):
+    if isinstance(obj, dict):
+        return {str(k): _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_jsonable(v) for v in obj]
+    if isinstance(obj, (np.bool_, bool)):
+        return bool(obj)
+    if isinstance(obj, (np.integer, int)):
+        return int(obj)
+    if isinstance(obj, (np.floating, float)):
+        return None if math.isnan(obj) else float(obj)
+    return obj
+
+
+def write_json(path: Path, payload) -> None:
+    with path.open("w", encoding="utf-8") as fh:
+        json.dump(_jsonable(payload), fh, ensure_ascii=False, indent=2)
+
+
+def run(args: argparse.Namespace) -> int:
+    args.output.mkdir(parents=True, exist_ok=True)
+    sources = [(d, 'Mineradora') for d in args.mineradora] + [(d, 'Distribuidora') for d in args.distribuidora]
+    data_path = args.output / f"laudos.{args.format}"
+    cache = ExtractionCache(args.cache_dir) if args.cache_dir else None
+    extractor = PDFExtractor(cache=cache, streaming=not args.full_text, backend_stats=BackendStats())
+    # Modelos aprendidos ficam junto do cache de extração, quando houver
+    extractor.templates = TemplateRegistry(
+        args.cache_dir / "templates.json" if args.cache_dir else None, extractor.patterns_version
+    )
+
+    writer = RowWriter(data_path, args.format)
+    store = HistoryStore(args.history) if args.history else None
+    # Sem tracemalloc na extração: os laudos são processados em outros processos
+    instr = Instrumentation(track_memory=False)
+    accumulator = LabAccumulator()
+    processed = 0
+    rejected = 0
+    start = time.perf_counter()
+    try:
+        with extractor.create_pool(args.workers) as pool, \
+                (args.output / "falhas.jsonl").open("w", encoding="utf-8") as failures, \
+                (args.output / "diagnostico.jsonl").open("w", encoding="utf-8") as diagnostics, \
+                instr.stage("Extração de PDFs"):
+            for chunk in iter_chunks(sources, args.chunk_size):
+                files = []
+                for path, _ in chunk:
+                    buf = BytesIO(path.read_bytes())
+                    buf.name = str(path)
+                    files.append(buf)
+                outcomes = extractor.extract_many(files, executor=pool)
+                instr.record_files(outcomes, [origin for _, origin in chunk])
+                if store is not None:
+                    store.add_reports(outcomes, [origin for _, origin in chunk])
+                instr.flush_files(diagnostics)
+
+                rows = []
+                for (path, origin), outcome in zip(chunk, outcomes):
+                    if outcome['data']:
+                        ids = {k: outcome['metadata'].get(k) for k in IDS}
+                        rows.append({'arquivo': str(path), 'origem': origin, **ids, **outcome['data']})
+                    else:
+                        rejected += 1
+                        reason = outcome['rejection'] or "Parâmetros insuficientes ou PDF sem texto"
+                        failures.write(json.dumps({'arquivo': str(path), 'origem': origin, 'motivo': reason}, ensure_ascii=False) + "\n")
+                writer.write(rows)
+                accumulator.add_frame(pd.DataFrame(rows, columns=['origem'] + PARAMS))
+                processed += len(chunk)
+                elapsed = time.perf_counter() - start
+                print(f"{processed} laudos processados ({processed / elapsed:.1f}/s), {rejected} rejeitados", file=sys.stderr)
+    finally:
+        writer.close()
+
+    if writer.rows_written == 0:
+        print("Nenhum laudo com dados suficientes foi extraído.", file=sys.stderr)
+        return 1
+
+    # scipy (e matplotlib/openpyxl, com --report) só depois da extração: os workers, que reimportam
+    # este módulo ao subir, e o --help não pagam por elas
+    from statistical_analyzer import StatisticalAnalyzer
+
+    instr.track_memory = True
+    analyzer = StatisticalAnalyzer(alpha=args.alpha)
+    classifier = ParameterClassifier()
+    # Sem --full-analysis a análise vem só dos acumuladores: memória constante, qualquer que seja o nº
+    # de laudos. Testes sobre os valores brutos, classificação por amostra, pareamento e relatório
+    # precisam de todas as linhas em memória
+    full = args.full_analysis or args.report
+    if full:
+        with instr.stage("Leitura do dataset"):
+            dataset, pairing_frame = load_run(data_path, args.format, np.float32 if args.float32 else np.float64)
+        with instr.stage("Análise estatística"):
+            results = analyzer.perform_analysis(dataset)
+        with instr.stage("Classificação"):
+            classifications = classifier.classify_parameters(dataset)
+    else:
+        with instr.stage("Análise estatística"):
+            results = analyzer.analysis_from_accumulators(accumulator)
+        with instr.stage("Classificação"):
+            classifications = classifier.classify_from_accumulators(accumulator)
+    with instr.stage("Causas (Ishikawa)"):
+        # Confirmações de causa-raiz registradas na interface ficam junto do cache de extração
+        ishikawa = IshikawaAnalyzer(CauseKnowledge(args.cache_dir / "causas_confirmadas.json" if args.cache_dir else None))
+        ranking = ishikawa.rank_causes(classifications, results)
+        causes = ishikawa.suggest_causes(classifications, results)
+    if full:
+        # Laudos da mesma entrega (nota fiscal, amostra, lote ou data de coleta próxima) testados em pares
+        with instr.stage("Classificação por amostra"):
+            samples = classifier.classify_samples(pairing_frame)
+        with instr.stage("Pareamento"):
+            pairs = match_reports(pairing_frame, date_tolerance_days=args.pair_tolerance)
+        with instr.stage("Testes pareados"):
+            paired = analyzer.perform_paired_analysis(pairs)
+            pair_divergences = classifier.classify_pairs(pairs)
+    if args.report:
+        from report_exporter import ReportExporter
+
+        exporter = ReportExporter()
+        with instr.stage("Relatório"):
+            figures = exporter.figures(dataset, results)
+            sample_rows = exporter.sample_table(pairing_frame, samples)
+            exporter.write_excel(
+                args.output / "relatorio.xlsx", iter_rows(data_path, args.format, exporter.chunk_rows),
+                results, classifications, samples, ranking, sample_rows, figures,
+            )
+            with (args.output / "relatorio.html").open("w", encoding="utf-8") as fh:
+                exporter.write_html(
+                    fh, iter_rows(data_path, args.format, exporter.chunk_rows),
+                    results, classifications, samples, ranking, sample_rows, figures,
+                )
+    with (args.output / "diagnostico.jsonl").open("a", encoding="utf-8") as diagnostics:
+        diagnostics.write(instr.to_jsonl())
+
+    write_json(args.output / "analise_estatistica.json", results)
+    write_json(args.output / "classificacao.json", classifications)
+    write_json(args.output / "causas.json", causes)
+    write_json(args.output / "causas_ranqueadas.json", ranking)
+    if full:
+        write_json(args.output / "classificacao_amostras.json", {
+            'amostras_fora_do_padrao': int(samples['flags']['fora_do_padrao'].sum()),
+            'amostras_divergentes': int(samples['flags']['divergente'].sum()),
+            'por_origem': samples['summary'],
+        })
+        write_json(args.output / "analise_pareada.json", {
+            'pares': len(pairs),
+            'criterios': pairs['criterio'].value_counts().to_dict(),
+            'sem_par': pairs.attrs['unmatched'],
+            'testes': paired,
+            'divergencias': pair_divergences,
+        })
+
+    # Acumuladores desta execução, opcionalmente combinados com o histórico de execuções anteriores
+    accumulator.save(args.output / "acumuladores.json")
+    if args.accumulators:
+        if args.accumulators.exists():
+            history = LabAccumulator.load(args.accumulators)
+            history.merge(accumulator)
+        else:
+            history = accumulator
+        history.save(args.accumulators)
+        write_json(args.output / "analise_incremental.json", analyzer.analysis_from_accumulators(history))
+        write_json(args.output / "classificacao_incremental.json", classifier.classify_from_accumulators(history))
+    tpl = extractor.templates.summary()
+    if tpl['seen']:
+        print(f"modelos de laboratório: {tpl['trusted']} confiáveis, caminho rápido em {tpl['hit_rate']:.1%} dos laudos", file=sys.stderr)
+    for name, s in extractor.backend_stats.summary().items():
+        if s['success_rate'] is not None:
+            print(f"backend {name}: {s['attempts']} tentativas, {s['success_rate']:.1%} de sucesso, {s['mean_seconds'] * 1000:.1f} ms/tentativa", file=sys.stderr)
+    print(f"{writer.rows_written} linhas gravadas em {data_path}; resultados em {args.output}", file=sys.stderr)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description="Processamento em lote de laudos de diesel (sem interface)")
+    ap.add_argument("--mineradora", type=Path, nargs="+", required=True, help="Diretório(s) com PDFs da mineradora")
+    ap.add_argument("--distribuidora", type=Path, nargs="+", required=True, help="Diretório(s) com PDFs da distribuidora")
+    ap.add_argument("--output", type=Path, required=True, help="Diretório de saída")
+    ap.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    ap.add_argument("--workers", type=int, default=None, help="Processos de extração (padrão: nº de CPUs)")
+    ap.add_argument("--chunk-size", type=int, default=200, help="Laudos mantidos em memória por vez")
+    ap.add_argument("--cache-dir", type=Path, default=None, help="Diretório do cache de extração")
+    ap.add_argument("--full-text", action="store_true", help="Lê todas as páginas em vez de parar ao achar os parâmetros")
+    ap.add_argument("--alpha", type=float, default=0.05)
+    ap.add_argument(
+        "--full-analysis", action="store_true",
+        help="Testes sobre os valores brutos (Shapiro-Wilk, Levene, Mann-Whitney), classificação por amostra e "
+        "pareamento; carrega todos os laudos na memória (cresce com o nº de laudos). Implícito em --report",
+    )
+    ap.add_argument("--float32", action="store_true", help="Com --full-analysis, mantém os valores em float32 (metade da memória)")
+    ap.add_argument("--accumulators", type=Path, default=None, help="Arquivo de acumuladores históricos a atualizar")
+    ap.add_argument("--pair-tolerance", type=float, default=3, help="Dias de tolerância no pareamento por data de coleta")
+    ap.add_argument("--report", action="store_true", help="Gera relatorio.xlsx e relatorio.html no diretório de saída (análise completa)")
+    ap.add_argument("--history", type=Path, default=None, help="Base SQLite do histórico de laudos a alimentar")
+    return ap
+
+
+def main(argv: list[str] | None = None) -> int:
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
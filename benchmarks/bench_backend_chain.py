@@ -0,0 +1,50 @@
+import argparse
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from extraction_backends import BackendStats  # noqa: E402
+from pdf_extractor import PDFExtractor  # noqa: E402
+from synthetic_laudos import generate, make_pdf  # noqa: E402
+
+
+def run(docs: list[tuple[bytes, dict]], extractor: PDFExtractor) -> tuple[float, int, int]:
+    recovered = 0
+    wrong = 0
+    start = time.perf_counter()
+    for pdf, truth in docs:
+        data = extractor.extract_parameters(BytesIO(pdf)) or {}
+        recovered += sum(1 for p in truth if p in data)
+        wrong += sum(1 for p, v in data.items() if p not in truth or abs(v - truth[p]) > 1e-9)
+    return time.perf_counter() - start, recovered, wrong
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Cadeia de backends adaptativa x pdfplumber primeiro")
+    ap.add_argument("--count", type=int, default=200)
+    ap.add_argument("--full-text", action="store_true", help="Lê todas as páginas em vez de parar ao achar os parâmetros")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    docs = [(make_pdf(pages), truth) for _, _, pages, truth in generate(args.count, args.seed)]
+    expected = sum(len(truth) for _, truth in docs)
+    streaming = not args.full_text
+
+    stats = BackendStats()
+    configs = [
+        ("pdfplumber primeiro", PDFExtractor(streaming=streaming, backends=['pdfplumber', 'pypdf2'])),
+        ("cadeia adaptativa", PDFExtractor(streaming=streaming, backend_stats=stats)),
+    ]
+    print(f"{args.count} laudos, {expected} valores no gabarito")
+    for label, extractor in configs:
+        elapsed, recovered, wrong = run(docs, extractor)
+        print(f"  {label:20s} {elapsed / args.count * 1000:7.1f} ms/laudo  {recovered}/{expected} valores, {wrong} incorretos")
+    for backend, s in stats.summary().items():
+        print(f"  {backend}: {s['attempts']} tentativas, sucesso {s['success_rate']:.1%}, {s['mean_seconds'] * 1000:.1f} ms/tentativa")
+
+
+if __name__ == "__main__":
+    main()
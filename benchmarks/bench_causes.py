@@ -0,0 +1,61 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ishikawa_analyzer import CauseKnowledge, IshikawaAnalyzer  # noqa: E402
+
+
+PARAMS = ['viscosidade_40c', 'teor_agua', 'particulas_4um', 'particulas_6um', 'particulas_14um']
+
+
+def random_case(rng: np.random.Generator) -> tuple[dict, dict]:
+    classifications, results = {}, {}
+    for p in PARAMS:
+        cls = rng.choice(['Normal', 'Divergente', 'Fora do Padrão'], p=[0.6, 0.25, 0.15])
+        classifications[p] = {'classification': str(cls)}
+        results[p] = {'effect_size': float(rng.gamma(2, 0.4)), 'p_value': float(rng.uniform(1e-5, 0.2))}
+    return classifications, results
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Ranking de causas: custo frente ao nº de confirmações registradas")
+    ap.add_argument("--history", type=int, nargs="+", default=[0, 1_000, 20_000])
+    ap.add_argument("--queries", type=int, default=100, help="Casos distintos (cabem na memória de rankings)")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    analyzer = IshikawaAnalyzer()
+    causes = [(cat, c) for cat, lst in analyzer.cause_database.items() for c in lst]
+    for size in args.history:
+        knowledge = CauseKnowledge()
+        start = time.perf_counter()
+        for _ in range(size):
+            classifications, _ = random_case(rng)
+            problems = [p for p, c in classifications.items() if c['classification'] != 'Normal']
+            knowledge.record(problems, *causes[rng.integers(len(causes))])
+        recording = time.perf_counter() - start
+
+        analyzer = IshikawaAnalyzer(knowledge)
+        cases = [random_case(rng) for _ in range(args.queries)]
+        start = time.perf_counter()
+        for classifications, results in cases:
+            analyzer.rank_causes(classifications, results)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        for classifications, results in cases:
+            analyzer.rank_causes(classifications, results)
+        warm = time.perf_counter() - start
+        print(
+            f"{size:>7} confirmações (registro {recording:6.2f} s): ranking {cold / args.queries * 1000:6.3f} ms/consulta, "
+            f"memorizado {warm / args.queries * 1000:6.3f} ms/consulta"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from classifier import ParameterClassifier  # noqa: E402
+from lab_dataset import LabDataset  # noqa: E402
+from report_exporter import ReportExporter  # noqa: E402
+from statistical_analyzer import StatisticalAnalyzer  # noqa: E402
+
+
+def make_frame(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    return pd.DataFrame({
+        'arquivo': [f"laudo_{i:07d}.pdf" for i in range(n)],
+        'origem': rng.choice(['Mineradora', 'Distribuidora'], n),
+        'data_amostra': '2024-01-01',
+        'lote': [f"LT24-{i % 500:03d}" for i in range(n)],
+        'viscosidade_40c': rng.normal(3.0, 0.5, n),
+        'teor_agua': rng.lognormal(4.5, 0.5, n),
+        'particulas_4um': rng.lognormal(7.5, 0.6, n),
+        'particulas_6um': rng.lognormal(6.3, 0.6, n),
+        'particulas_14um': rng.poisson(10, n).astype(float),
+    })
+
+
+def child(method: str, n: int, out: Path, seed: int) -> None:
+    # Um processo por medição: o pico de memória (RSS) não herda o das medições anteriores
+    frame = make_frame(n, np.random.default_rng(seed))
+    exporter = ReportExporter()
+    if method == "pandas":
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        frame.to_excel(out / f"pandas_{n}.xlsx", index=False)
+    else:
+        dataset = LabDataset.from_frame(frame)
+        results = StatisticalAnalyzer().perform_analysis(dataset)
+        classifier = ParameterClassifier()
+        classifications = classifier.classify_parameters(dataset)
+        samples = classifier.classify_samples(frame)
+        sample_rows = exporter.sample_table(frame, samples)
+        figures = exporter.figures(dataset, results)
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        if method == "write-only":
+            exporter.write_excel(out / f"relatorio_{n}.xlsx", frame, results, classifications, samples, None, sample_rows, figures)
+        else:
+            with (out / f"relatorio_{n}.html").open("w", encoding="utf-8") as fh:
+                exporter.write_html(fh, frame, results, classifications, samples, None, sample_rows, figures)
+    seconds = time.perf_counter() - start
+    grown = max(0, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) / 1024
+    print(json.dumps({'seconds': seconds, 'peak_growth_mb': grown}))
+
+
+def check_workbook(path: Path) -> list[str]:
+    # Recarrega a planilha gerada em modo write-only e confere as configurações de cada aba
+    from openpyxl import load_workbook
+
+    problems = []
+    wb = load_workbook(path)
+    for ws in wb.worksheets:
+        if ws.title == "Figuras":
+            if not ws._images:
+                problems.append(f"{ws.title}: sem imagens")
+            continue
+        if ws.freeze_panes != 'A2':
+            problems.append(f"{ws.title}: freeze_panes = {ws.freeze_panes!r}")
+        if not all(cell.font.b for cell in ws[1]):
+            problems.append(f"{ws.title}: cabeçalho sem negrito")
+    return problems
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Exportação do relatório: openpyxl write-only x planilha montada em memória")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[20_000, 100_000, 200_000])
+    ap.add_argument("--inmemory-cap", type=int, default=100_000, help="Maior tamanho medido também com DataFrame.to_excel")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--child", nargs=3, metavar=("METODO", "N", "DIR"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        child(args.child[0], int(args.child[1]), Path(args.child[2]), args.seed)
+        return
+
+    out = Path(tempfile.mkdtemp())
+    for n in args.sizes:
+        methods = ["write-only", "html"] + (["pandas"] if n <= args.inmemory_cap else [])
+        parts = []
+        for method in methods:
+            proc = subprocess.run(
+                [sys.executable, __file__, "--seed", str(args.seed), "--child", method, str(n), str(out)],
+                capture_output=True, text=True, check=True,
+            )
+            r = json.loads(proc.stdout.strip().splitlines()[-1])
+            label = {"write-only": "xlsx write-only", "html": "HTML", "pandas": "DataFrame.to_excel (só os laudos)"}[method]
+            parts.append(f"{label} {r['seconds']:6.1f} s, +{r['peak_growth_mb']:6.1f} MB")
+        size = os.path.getsize(out / f"relatorio_{n}.xlsx") / 2**20
+        print(f"{n:>7} laudos ({size:.1f} MB): " + "; ".join(parts))
+        if n == min(args.sizes):
+            problems = check_workbook(out / f"relatorio_{n}.xlsx")
+            print("        planilha recarregada: " + ("; ".join(problems) if problems else "abas com cabeçalho congelado e em negrito"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from statistical_analyzer import StatisticalAnalyzer  # noqa: E402
+
+
+PARAMS = ['viscosidade_40c', 'teor_agua', 'particulas_4um', 'particulas_6um', 'particulas_14um']
+COLUMNS = {
+    'mean_mineradora': lambda r: r['mean_mineradora'],
+    'median_distribuidora': lambda r: r['median_distribuidora'],
+    'std_mineradora': lambda r: r['std_mineradora'],
+    'ci_low_mineradora': lambda r: r['ci_mineradora'][0],
+    'statistic': lambda r: r['statistic'],
+    'p_value': lambda r: r['p_value'],
+    'effect_size': lambda r: r['effect_size'],
+}
+
+
+def synthetic_frame(n: int, lots: int, missing: float, seed: int) -> pd.DataFrame:
+    # Lotes lidos do cabeçalho por regex: uma parte dos laudos fica sem lote
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'viscosidade_40c': rng.normal(3.0, 0.3, n).round(2),
+        'teor_agua': rng.lognormal(4.5, 0.4, n).round(0),
+        'particulas_4um': rng.lognormal(7.0, 1.0, n),
+        'particulas_6um': rng.lognormal(6.0, 1.0, n),
+        'particulas_14um': rng.poisson(10, n).astype(float),
+        'origem': rng.choice(['Mineradora', 'Distribuidora'], n),
+        'lote': pd.Series(rng.integers(0, lots, n).astype(str), dtype=object),
+    })
+    df.loc[rng.random(n) < missing, 'lote'] = None
+    df.loc[rng.random(n) < 0.05, 'teor_agua'] = np.nan
+    return df
+
+
+def same(a: float, b: float) -> bool:
+    return (np.isnan(a) and np.isnan(b)) or bool(np.isclose(a, b, rtol=1e-7))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Análise por lote: vetorizada x perform_analysis lote a lote")
+    ap.add_argument("--rows", type=int, default=60_000)
+    ap.add_argument("--lots", type=int, default=2_000)
+    ap.add_argument("--missing", type=float, default=0.1, help="Fração de laudos sem lote")
+    ap.add_argument("--check", type=int, default=200, help="Lotes conferidos com o caminho lote a lote")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    warnings.filterwarnings("ignore")
+
+    df = synthetic_frame(args.rows, args.lots, args.missing, args.seed)
+    analyzer = StatisticalAnalyzer()
+    start = time.perf_counter()
+    grouped = analyzer.perform_grouped_analysis(df, 'lote')
+    elapsed = time.perf_counter() - start
+    print(f"{args.rows} laudos, {df['lote'].nunique()} lotes, {int(df['lote'].isna().sum())} sem lote: {elapsed * 1000:.0f} ms")
+
+    lots = sorted(df['lote'].dropna().unique())[:args.check]
+    start = time.perf_counter()
+    reference = {lot: analyzer.perform_analysis(df[df['lote'] == lot]) for lot in lots}
+    elapsed = time.perf_counter() - start
+    rows = grouped.set_index(['lote', 'parametro'])
+    mismatches = sum(
+        not same(rows.loc[(lot, p), col], get(r))
+        for lot, res in reference.items() for p, r in res.items() for col, get in COLUMNS.items()
+    )
+    mismatches += sum(rows.loc[(lot, p), 'test_used'] != r['test_used'] for lot, res in reference.items() for p, r in res.items())
+    print(f"  {len(lots)} lotes um a um: {elapsed * 1000:.0f} ms; {mismatches} divergências")
+    print(f"  linhas sem lote no resultado: {int(grouped['lote'].isna().sum())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from classifier import ParameterClassifier  # noqa: E402
+from lab_dataset import LabDataset  # noqa: E402
+from statistical_analyzer import StatisticalAnalyzer  # noqa: E402
+from visualizations import VisualizationGenerator  # noqa: E402
+
+
+PARAMS = ['viscosidade_40c', 'teor_agua', 'particulas_4um', 'particulas_6um', 'particulas_14um']
+
+
+def synthetic_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'viscosidade_40c': rng.normal(3.0, 0.3, n),
+        'teor_agua': rng.lognormal(4.5, 0.4, n),
+        'particulas_4um': rng.lognormal(7.0, 1.0, n),
+        'particulas_6um': rng.lognormal(6.0, 1.0, n),
+        'particulas_14um': rng.poisson(10, n).astype(float),
+        'origem': rng.choice(['Mineradora', 'Distribuidora'], n),
+    })
+    for p in PARAMS:
+        df.loc[rng.random(n) < 0.05, p] = np.nan
+    return df
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def legacy_access(df: pd.DataFrame) -> None:
+    # Padrão anterior: cada consumidor refaz a máscara booleana por parâmetro e origem
+    for _ in range(4):
+        for p in PARAMS:
+            for origin in ['Mineradora', 'Distribuidora']:
+                df[df['origem'] == origin][p].dropna()
+
+
+def dataset_access(df: pd.DataFrame) -> None:
+    data = LabDataset.from_frame(df)
+    for _ in range(4):
+        for p in PARAMS:
+            for origin in data.origins:
+                data.values(origin, p)
+
+
+def render(data) -> None:
+    StatisticalAnalyzer().perform_analysis(data)
+    ParameterClassifier().classify_parameters(data)
+    viz = VisualizationGenerator()
+    viz.create_boxplots(data)
+    viz.create_normality_plots(data)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Custo de acesso aos dados por renderização: filtros booleanos x LabDataset")
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+    warnings.filterwarnings("ignore")
+
+    df = synthetic_frame(args.rows)
+    legacy = best_of(lambda: legacy_access(df), args.repeat)
+    split = best_of(lambda: dataset_access(df), args.repeat)
+    print(f"linhas: {args.rows}")
+    print("acesso aos dados (4 consumidores x 5 parâmetros x 2 origens)")
+    print(f"  filtros booleanos : {legacy * 1000:8.1f} ms")
+    print(f"  LabDataset        : {split * 1000:8.1f} ms  ({legacy / split:.1f}x)")
+
+    per_consumer = best_of(lambda: render(df), max(1, args.repeat // 2))
+    shared = best_of(lambda: render(LabDataset.from_frame(df)), max(1, args.repeat // 2))
+    print("renderização completa (análise, classificação, boxplots, QQ)")
+    print(f"  DataFrame em cada consumidor : {per_consumer * 1000:8.1f} ms")
+    print(f"  LabDataset compartilhado     : {shared * 1000:8.1f} ms  (economia {(per_consumer - shared) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
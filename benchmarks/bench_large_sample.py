@@ -0,0 +1,118 @@
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from lab_dataset import LabDataset  # noqa: E402
+from statistical_analyzer import StatisticalAnalyzer  # noqa: E402
+
+
+PARAMS = ['viscosidade_40c', 'teor_agua', 'particulas_4um', 'particulas_6um', 'particulas_14um']
+DESCRIPTIVE = ['mean', 'median', 'std']
+
+
+def synthetic_frame(n_per_origin: int, seed: int) -> pd.DataFrame:
+    # Viscosidade normal (caminho do teste t), demais assimétricas ou discretas (Mann-Whitney com empates)
+    rng = np.random.default_rng(seed)
+    parts = []
+    for origin, shift in (('Mineradora', 0.0), ('Distribuidora', 0.01)):
+        n = n_per_origin
+        parts.append(pd.DataFrame({
+            'viscosidade_40c': rng.normal(3.0 + shift, 0.3, n),
+            'teor_agua': rng.lognormal(4.5 + shift, 0.4, n),
+            'particulas_4um': rng.lognormal(7.0, 1.0, n),
+            'particulas_6um': rng.lognormal(6.0 + shift, 1.0, n),
+            'particulas_14um': rng.poisson(10 + shift, n).astype(float),
+            'origem': origin,
+        }))
+    return pd.concat(parts, ignore_index=True)
+
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return out, best
+
+
+def rel(a: float, b: float) -> float:
+    return abs(a - b) / max(abs(b), 1e-300)
+
+
+def reference_test(m: np.ndarray, d: np.ndarray, test_used: str) -> tuple[float, float]:
+    # O mesmo teste escolhido pelo modo de grandes amostras, calculado pelo scipy sobre as séries inteiras
+    if test_used.startswith('Teste t'):
+        r = stats.ttest_ind(m, d, equal_var='iguais' in test_used)
+    else:
+        r = stats.mannwhitneyu(m, d, alternative='two-sided')
+    return float(r.statistic), float(r.pvalue)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="StatisticalAnalyzer: caminho do scipy x modo de grandes amostras")
+    ap.add_argument("--rows", type=int, default=1_000_000, help="Laudos por origem")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    df = synthetic_frame(args.rows, args.seed)
+    data64 = LabDataset.from_frame(df)
+    data32 = LabDataset.from_frame(df, dtype=np.float32)
+    mb64 = sum(data64.values(o, p).nbytes for o in data64.origins for p in PARAMS) / 2**20
+    mb32 = sum(data32.values(o, p).nbytes for o in data32.origins for p in PARAMS) / 2**20
+    print(f"{args.rows} laudos por origem, {len(PARAMS)} parâmetros ({mb64:.0f} MB em float64, {mb32:.0f} MB em float32)")
+
+    with warnings.catch_warnings():
+        # scipy avisa que o p-valor do Shapiro-Wilk não é confiável acima de 5000 pontos
+        warnings.simplefilter("ignore")
+        current, t_current = timed(lambda: StatisticalAnalyzer(large_sample_threshold=None).perform_analysis(data64), args.repeat)
+    large, t_large = timed(lambda: StatisticalAnalyzer().perform_analysis(data64), args.repeat)
+    compact, t_compact = timed(lambda: StatisticalAnalyzer().perform_analysis(data32), args.repeat)
+    print(f"  caminho do scipy (Shapiro, Levene, Mann-Whitney): {t_current:6.2f} s (melhor de {args.repeat})")
+    print(f"  grandes amostras, float64                      : {t_large:6.2f} s ({t_current / t_large:.1f}x)")
+    print(f"  grandes amostras, float32                      : {t_compact:6.2f} s ({t_current / t_compact:.1f}x)")
+
+    print("precisão (erro relativo máximo):")
+    for p in PARAMS:
+        m, d = data64.values('Mineradora', p), data64.values('Distribuidora', p)
+        r, c, r32 = large[p], current[p], compact[p]
+        desc = max(rel(r[f'{k}_{o}'], c[f'{k}_{o}']) for k in DESCRIPTIVE for o in ('mineradora', 'distribuidora'))
+        ci = max(rel(r[f'ci_{o}'][i], c[f'ci_{o}'][i]) for o in ('mineradora', 'distribuidora') for i in (0, 1))
+        effect = rel(r['effect_size'], c['effect_size'])
+        desc32 = max(rel(r32[f'{k}_{o}'], c[f'{k}_{o}']) for k in DESCRIPTIVE for o in ('mineradora', 'distribuidora'))
+        stat, p_ref = reference_test(m, d, r['test_used'])
+        normal = stats.normaltest(m).pvalue
+        print(
+            f"  {p:<16} média/mediana/desvio {desc:.1e}, IC {ci:.1e}, efeito {effect:.1e}, float32 {desc32:.1e}; "
+            f"{r['test_used']}: estatística {rel(r['statistic'], stat):.1e}, p {rel(r['p_value'], p_ref):.1e}; "
+            f"normalidade (x normaltest) {rel(r['normality_mineradora']['p_value'], normal):.1e}"
+        )
+        if r['test_used'] != c['test_used']:
+            print(f"    teste escolhido mudou: {c['test_used']} (Shapiro) -> {r['test_used']} (D'Agostino-Pearson)")
+
+    # Parâmetro com histórico constante (partículas ≥14 µm sempre zero numa origem): sem variância,
+    # a normalidade não se aplica e os dois caminhos vão para o Mann-Whitney
+    df['particulas_14um'] = np.where(df['origem'] == 'Mineradora', 0.0, df['particulas_14um'])
+    constant = LabDataset.from_frame(df)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        c = StatisticalAnalyzer(large_sample_threshold=None).perform_analysis(constant)['particulas_14um']
+    r = StatisticalAnalyzer().perform_analysis(constant)['particulas_14um']
+    stat, p_ref = reference_test(constant.values('Mineradora', 'particulas_14um'), constant.values('Distribuidora', 'particulas_14um'), r['test_used'])
+    print(
+        f"  {'constante':<16} normalidade {r['normality_mineradora']['is_normal']} (p {r['normality_mineradora']['p_value']}); "
+        f"{r['test_used']} (scipy: {c['test_used']}): estatística {rel(r['statistic'], stat):.1e}, p {rel(r['p_value'], p_ref):.1e}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from classifier import ParameterClassifier  # noqa: E402
+from pairing import match_reports  # noqa: E402
+from statistical_analyzer import StatisticalAnalyzer  # noqa: E402
+
+
+def make_frame(n: int, seed: int) -> tuple[pd.DataFrame, int]:
+    # n entregas; cada uma tem laudo nas duas origens, a distribuidora um dia depois. 5% sem nota
+    # fiscal (só a data casa) e mais 10% de laudos avulsos da distribuidora, sem par.
+    rng = np.random.default_rng(seed)
+    base = pd.Timestamp('2020-01-01')
+    day = rng.integers(0, 4 * 365, n)
+    water = rng.lognormal(4.5, 0.35, n)
+    visc = rng.normal(3.0, 0.3, n)
+    has_nf = rng.random(n) < 0.95
+    nf = np.where(has_nf, (100000 + np.arange(n)).astype(str), None)
+    sides = []
+    for origin, shift, lag in (('Mineradora', 0.0, 0), ('Distribuidora', 8.0, 1)):
+        sides.append(pd.DataFrame({
+            'origem': origin,
+            'entrega': np.arange(n),
+            'nota_fiscal': nf,
+            'data_amostra': (base + pd.to_timedelta(day + lag, unit='D')).strftime('%Y-%m-%d'),
+            'teor_agua': water + shift + rng.normal(0, 10, n),
+            'viscosidade_40c': visc + rng.normal(0, 0.05, n),
+        }))
+    extra = pd.DataFrame({
+        'origem': 'Distribuidora',
+        'entrega': -1,
+        'nota_fiscal': (900000 + np.arange(n // 10)).astype(str),
+        'data_amostra': (base + pd.to_timedelta(rng.integers(0, 4 * 365, n // 10), unit='D')).strftime('%Y-%m-%d'),
+        'teor_agua': rng.lognormal(4.5, 0.35, n // 10),
+        'viscosidade_40c': rng.normal(3.0, 0.3, n // 10),
+    })
+    frame = pd.concat(sides + [extra], ignore_index=True).sample(frac=1.0, random_state=seed).reset_index(drop=True)
+    return frame, int(has_nf.sum())
+
+
+def date_only_frame(n: int, days: int, seed: int) -> pd.DataFrame:
+    # Laudos sem identificador, n por origem espalhados em poucos dias: muitos laudos por data
+    rng = np.random.default_rng(seed)
+    base = pd.Timestamp('2024-01-01')
+    return pd.concat([
+        pd.DataFrame({
+            'origem': origin,
+            'data_amostra': (base + pd.to_timedelta(rng.integers(0, days, n), unit='D')).strftime('%Y-%m-%d'),
+            'teor_agua': rng.lognormal(4.5, 0.35, n),
+        })
+        for origin in ('Mineradora', 'Distribuidora')
+    ], ignore_index=True)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Pareamento de laudos mineradora x distribuidora")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 100_000, 200_000])
+    ap.add_argument("--tolerance", type=float, default=3)
+    ap.add_argument("--date-only", type=int, default=100_000, help="Laudos por origem sem identificador")
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    for n in args.sizes:
+        frame, with_nf = make_frame(n, args.seed)
+        start = time.perf_counter()
+        pairs = match_reports(frame, date_tolerance_days=args.tolerance)
+        elapsed = time.perf_counter() - start
+        by_nf = pairs[pairs['criterio'] == 'nota_fiscal']
+        by_date = pairs[pairs['criterio'] == 'data']
+        # Pela data, entregas do mesmo dia são indistinguíveis: o par pode ser de outra entrega
+        correct_date = int((by_date['entrega_mineradora'] == by_date['entrega_distribuidora']).sum())
+        print(
+            f"{n} entregas ({len(frame)} laudos): {elapsed * 1000:.0f} ms; {len(by_nf)}/{with_nf} pares por NF, "
+            f"{len(by_date)}/{n - with_nf} pela data ({correct_date} da mesma entrega); sem par {pairs.attrs['unmatched']}"
+        )
+
+    frame = date_only_frame(args.date_only, args.days, args.seed)
+    start = time.perf_counter()
+    pairs = match_reports(frame, date_tolerance_days=args.tolerance)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{args.date_only} laudos por origem em {args.days} dias, só pela data: {elapsed * 1000:.0f} ms; "
+        f"{len(pairs)} pares, sem par {pairs.attrs['unmatched']}"
+    )
+
+    # Poder estatístico: a mesma diferença de 8 ppm, testada como amostras independentes e como pares
+    frame, _ = make_frame(200, args.seed + 1)
+    pairs = match_reports(frame)
+    nf_pairs = pairs[pairs['criterio'] == 'nota_fiscal']
+    analyzer = StatisticalAnalyzer()
+    independent = analyzer.perform_analysis(frame[frame['nota_fiscal'].isin(nf_pairs['chave'])].drop(columns='entrega'))['teor_agua']
+    paired = analyzer.perform_paired_analysis(nf_pairs)['teor_agua']
+    divergent = ParameterClassifier().classify_pairs(nf_pairs)['teor_agua']
+    print(
+        f"teor de água, {len(nf_pairs)} pares: {independent['test_used']} p={independent['p_value']:.3g}; "
+        f"{paired['test_used']} p={paired['p_value']:.3g}; {divergent['divergent']} pares acima de {divergent['threshold']} ppm"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import argparse
+import random
+import re
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from extraction_backends import BACKENDS, DEFAULT_ORDER  # noqa: E402
+from pdf_extractor import PDFExtractor  # noqa: E402
+
+
+ANNEX_LINES = [
+    "resultados obtidos conforme norma astm d445 e nbr 14343",
+    "amostra recebida em frasco de vidro âmbar, lacrado",
+    "incerteza expandida k=2, nível de confiança de 95%",
+    "a tabela abaixo resume os ensaios complementares > ver anexo",
+    "ponto de fulgor 62 °c; massa específica 0,843 g/cm3; enxofre 8 mg/kg",
+    "observações: resultados referem-se somente à amostra analisada",
+]
+
+
+def synthetic_corpus(n: int, seed: int = 42) -> list[str]:
+    # Mistura redações das variantes de cada padrão, parâmetros ausentes e resultados após anexos
+    rnd = random.Random(seed)
+    docs = []
+    for _ in range(n):
+        visc = f"{rnd.uniform(2.0, 4.5):.2f}".replace('.', ',')
+        lines = [
+            rnd.choice([f"viscosidade 40 °c: {visc}", f"viscosidade cinemática: {visc} cst", f"viscosity 40°c {visc}"]),
+            rnd.choice([f"teor de água: {rnd.randint(40, 260)} ppm", f"water content (kf): {rnd.randint(40, 260)} ppm"]),
+            f"partículas >4 µm: {rnd.randint(500, 5000)}",
+            f"partículas >6 µm: {rnd.randint(100, 1500)}",
+            f"partículas ≥14 µm: {rnd.randint(1, 40)}",
+        ]
+        lines = [line for line in lines if rnd.random() > 0.15]
+        annex = [rnd.choice(ANNEX_LINES) for _ in range(40 * rnd.randint(1, 8))]
+        if rnd.random() < 0.3:
+            lines = annex + lines
+        else:
+            lines = [f"laudo de análise nº {rnd.randint(1000, 99999)}"] + lines + annex
+        docs.append("\n".join(lines))
+    return docs
+
+
+def legacy_parse(text: str, parameter_patterns: dict) -> dict | None:
+    # Extração original: cada padrão de cada parâmetro aplicado ao texto inteiro, sem compilação prévia
+    out: dict[str, float] = {}
+    for key, patterns in parameter_patterns.items():
+        value = legacy_first_number(text, patterns)
+        if value is not None:
+            out[key] = value
+    return out if len(out) >= 3 else None
+
+
+def legacy_first_number(text: str, patterns: list[str]) -> float | None:
+    for pat in patterns:
+        for m in re.finditer(pat, text, re.IGNORECASE | re.DOTALL):
+            try:
+                return float(m.group(1).replace(',', '.'))
+            except Exception:
+                continue
+    return None
+
+
+def load_corpus(path: Path) -> list[str]:
+    # PDFs: o texto integral de cada backend da cadeia que extrai algo (o que a leitura sem parada
+    # antecipada entrega ao parser)
+    docs = []
+    for f in sorted(path.rglob("*")):
+        if f.suffix.lower() == ".txt":
+            docs.append(f.read_text(encoding="utf-8").lower())
+        elif f.suffix.lower() == ".pdf":
+            payload = f.read_bytes()
+            for name in DEFAULT_ORDER:
+                try:
+                    text = "\n".join(BACKENDS[name](BytesIO(payload)))
+                except Exception:
+                    continue
+                if text.strip():
+                    docs.append(text)
+    return docs
+
+
+def time_parser(parse, docs: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for doc in docs:
+            parse(doc)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Compara o scanner compilado com a extração regex original")
+    ap.add_argument("--corpus", type=Path, help="Diretório com laudos reais (.pdf ou .txt)")
+    ap.add_argument("--synthetic", type=int, default=500, help="Nº de textos sintéticos quando não há corpus")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    extractor = PDFExtractor()
+    docs = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.synthetic)
+    if not docs:
+        sys.exit("Nenhum texto encontrado no corpus")
+
+    patterns = extractor.parameter_patterns
+    mismatches = sum(1 for d in docs if extractor._parse_parameters(d) != legacy_parse(d, patterns))
+    legacy = time_parser(lambda d: legacy_parse(d, patterns), docs, args.repeat)
+    scanner = time_parser(extractor._parse_parameters, docs, args.repeat)
+    total_mb = sum(len(d) for d in docs) / 1e6
+
+    print(f"documentos: {len(docs)} ({total_mb:.2f} MB de texto)")
+    print(f"original : {len(docs) / legacy:10.1f} docs/s  {total_mb / legacy:8.2f} MB/s")
+    print(f"scanner  : {len(docs) / scanner:10.1f} docs/s  {total_mb / scanner:8.2f} MB/s")
+    print(f"ganho    : {legacy / scanner:.2f}x  divergências: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+import sys
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from extraction_job import ExtractionJob  # noqa: E402
+from pdf_extractor import PDFExtractor  # noqa: E402
+from synthetic_laudos import generate, make_pdf  # noqa: E402
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Extração em segundo plano: tempo até os primeiros resultados x lote inteiro")
+    ap.add_argument("--count", type=int, default=200)
+    ap.add_argument("--min-per-origin", type=int, default=5, help="Laudos por origem para o primeiro painel parcial")
+    ap.add_argument("--seed", type=int, default=4)
+    args = ap.parse_args()
+
+    files, origins = [], []
+    for name, origin, pages, _ in generate(args.count, args.seed):
+        buf = BytesIO(make_pdf(pages))
+        buf.name = name
+        files.append(buf)
+        origins.append(origin)
+
+    job = ExtractionJob(PDFExtractor(streaming=True), files, origins).start()
+    first = None
+    while not job.done:
+        seen = job.completed
+        job.wait(seen, 0.05, max_wait=1.0)
+        reports, ready = job.snapshot()
+        counts = {o: sum(1 for r, k in zip(reports, ready) if k == o and r['data']) for o in set(origins)}
+        if first is None and all(n >= args.min_per_origin for n in counts.values()):
+            first = job.elapsed()
+    extracted = sum(1 for r in job.reports if r['data'])
+    print(f"{args.count} laudos ({extracted} com dados)")
+    print(f"  primeiro painel parcial ({args.min_per_origin} laudos por origem): {first:6.2f} s")
+    print(f"  lote inteiro                                : {job.seconds:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
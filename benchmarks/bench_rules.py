@@ -0,0 +1,62 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from classifier import ParameterClassifier  # noqa: E402
+
+
+def make_frame(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    df = pd.DataFrame({
+        'viscosidade_40c': rng.normal(3.0, 0.5, n),
+        'teor_agua': rng.lognormal(4.5, 0.5, n),
+        'particulas_4um': rng.lognormal(7.5, 0.6, n),
+        'particulas_6um': rng.lognormal(6.3, 0.6, n),
+        'particulas_14um': rng.poisson(10, n).astype(float),
+        'origem': pd.Categorical(rng.choice(['Mineradora', 'Distribuidora'], n)),
+    })
+    df.loc[rng.random(n) < 0.1, 'teor_agua'] = np.nan
+    return df
+
+
+def per_sample_loop(classifier: ParameterClassifier, df: pd.DataFrame) -> int:
+    # Referência: uma consulta aos dicionários de limites por amostra e parâmetro
+    out = 0
+    for row in df.itertuples(index=False):
+        for param in classifier.normative_limits:
+            v = getattr(row, param)
+            if v == v and not classifier._within(param, v):
+                out += 1
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Classificação por amostra: motor de regras vetorizado x laço por amostra")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    ap.add_argument("--loop-cap", type=int, default=100_000, help="Maior tamanho medido também com o laço por amostra")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    classifier = ParameterClassifier()
+    for n in args.sizes:
+        df = make_frame(n, rng)
+        start = time.perf_counter()
+        result = classifier.classify_samples(df)
+        vectorized = time.perf_counter() - start
+        flagged = int(result['flags']['fora_do_padrao'].sum())
+        line = f"{n:>9} amostras: vetorizado {vectorized * 1000:7.1f} ms ({flagged} fora do padrão)"
+        if n <= args.loop_cap:
+            start = time.perf_counter()
+            violations = per_sample_loop(classifier, df)
+            line += f"; laço por amostra {(time.perf_counter() - start) * 1000:7.1f} ms ({violations} violações)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
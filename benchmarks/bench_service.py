@@ -0,0 +1,106 @@
+import argparse
+import random
+import resource
+import sys
+import threading
+import time
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from extraction_service import ExtractionService  # noqa: E402
+from pdf_extractor import PDFExtractor  # noqa: E402
+from synthetic_laudos import generate, make_pdf  # noqa: E402
+
+
+def uploads(docs: list[tuple[str, bytes]], users: int, per_user: int, seed: int) -> list[list[tuple[str, bytes]]]:
+    # Cada usuário envia um subconjunto sorteado dos mesmos laudos: os envios se sobrepõem
+    rng = random.Random(seed)
+    return [rng.sample(docs, per_user) for _ in range(users)]
+
+
+def as_files(docs: list[tuple[str, bytes]]) -> list[BytesIO]:
+    out = []
+    for name, payload in docs:
+        buf = BytesIO(payload)
+        buf.name = name
+        out.append(buf)
+    return out
+
+
+def children_cpu() -> float:
+    # CPU dos processos filhos já encerrados: os workers entram na conta quando o pool é fechado
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_users(sets: list[list], executor_for, delays: list[float] | None = None) -> tuple[list[float], float]:
+    # Usuários simultâneos, cada um com seu extrator (como as sessões do Streamlit); devolve o tempo de
+    # cada envio e o tempo total
+    done = [0.0] * len(sets)
+    start = time.perf_counter()
+
+    def user(u: int) -> None:
+        time.sleep((delays or [0.0] * len(sets))[u])
+        began = time.perf_counter()
+        executor = executor_for(u)
+        try:
+            PDFExtractor(streaming=True).extract_many(as_files(sets[u]), executor=executor)
+        finally:
+            executor.shutdown()
+        done[u] = time.perf_counter() - began
+
+    threads = [threading.Thread(target=user, args=(u,)) for u in range(len(sets))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return done, time.perf_counter() - start
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Serviço de extração compartilhado x um pool por sessão")
+    ap.add_argument("--unique", type=int, default=60, help="Laudos distintos")
+    ap.add_argument("--users", type=int, default=6)
+    ap.add_argument("--per-user", type=int, default=40)
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--big", type=int, default=120, help="Envio grande no teste de justiça")
+    ap.add_argument("--small", type=int, default=8, help="Envio pequeno que chega logo depois do grande")
+    ap.add_argument("--seed", type=int, default=5)
+    args = ap.parse_args()
+
+    docs = [(name, make_pdf(pages)) for name, _, pages, _ in generate(max(args.unique, args.big + args.small), args.seed)]
+    sets = uploads(docs[:args.unique], args.users, args.per_user, args.seed)
+    requested = args.users * args.per_user
+    print(f"{args.users} usuários simultâneos, {args.per_user} laudos cada ({requested} pedidos, {args.unique} laudos distintos)")
+
+    cpu = children_cpu()
+    times, wall = run_users(sets, lambda u: PDFExtractor.create_pool(args.workers))
+    cpu = children_cpu() - cpu
+    opened = sum(len(s) for s in sets)
+    print(f"  um pool por sessão ({args.users}x{args.workers} workers): {wall:6.2f} s, {opened:4d} PDFs abertos, "
+          f"CPU dos workers {cpu:6.2f} s, envio mais lento {max(times):6.2f} s")
+    cpu = children_cpu()
+    service = ExtractionService(workers=args.workers)
+    times, wall = run_users(sets, lambda u: service.session(f"usuario{u}"))
+    m = service.metrics()
+    service.close()
+    cpu = children_cpu() - cpu
+    print(f"  serviço compartilhado ({args.workers} workers)   : {wall:6.2f} s, {m['completed']:4d} PDFs abertos, "
+          f"CPU dos workers {cpu:6.2f} s, envio mais lento {max(times):6.2f} s; "
+          f"{m['deduplicated']} pedidos deduplicados, espera na fila p95 {m['wait_p95']:.2f} s")
+
+    # Justiça: um envio grande e, meio segundo depois, um pequeno de outro usuário
+    sets = [docs[:args.big], docs[args.big:args.big + args.small]]
+    print(f"envio de {args.big} laudos seguido de um de {args.small} (outro usuário):")
+    for label, fair in (("fila única (FIFO)", False), ("rodízio por sessão", True)):
+        service = ExtractionService(workers=args.workers, max_pending=10_000)
+        time.sleep(2.0)
+        times, _ = run_users(sets, lambda u: service.session(f"usuario{u}" if fair else "todos"), delays=[0.0, 0.5])
+        print(f"  {label:<19}: envio pequeno pronto em {times[1]:6.2f} s, envio grande em {times[0]:6.2f} s")
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
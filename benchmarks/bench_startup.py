@@ -0,0 +1,104 @@
+import argparse
+import json
+import subprocess
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from synthetic_laudos import generate, make_pdf  # noqa: E402
+
+
+def child_render(root: Path) -> dict:
+    # Página inicial do app sem laudos enviados; o cronômetro começa depois do import do Streamlit,
+    # que o servidor já fez antes de executar o script
+    from streamlit.testing.v1 import AppTest
+
+    start = time.perf_counter()
+    at = AppTest.from_file(str(root / "main.py"), default_timeout=120).run()
+    seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'ok': not at.exception and bool(at.info)}
+
+
+def child_import(root: Path, module: str) -> dict:
+    sys.path.insert(0, str(root))
+    start = time.perf_counter()
+    __import__(module)
+    return {'seconds': time.perf_counter() - start}
+
+
+def child_extract(count: int, workers: int, idle: float, seed: int) -> dict:
+    from pdf_extractor import PDFExtractor
+
+    files = []
+    for name, _, pages, _ in generate(count, seed):
+        buf = BytesIO(make_pdf(pages))
+        buf.name = name
+        files.append(buf)
+    extractor = PDFExtractor(streaming=True)
+    out = {}
+    for mode in ("frio", "aquecido"):
+        pool = None
+        if mode == "aquecido":
+            # Pool criado ao abrir a página; o usuário leva alguns segundos para escolher os arquivos
+            pool = PDFExtractor.create_pool(workers, warm=True)
+            time.sleep(idle)
+        start = time.perf_counter()
+        first = None
+        if pool is None:
+            pool = PDFExtractor.create_pool(workers)
+        with pool:
+            for _ in extractor.iter_extract(files, executor=pool):
+                if first is None:
+                    first = time.perf_counter() - start
+        out[mode] = {'first': first, 'total': time.perf_counter() - start}
+    return out
+
+
+def spawn(*args: str) -> dict:
+    proc = subprocess.run([sys.executable, __file__, "--child", *args], capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Partida a frio: página inicial do app, import do CLI e primeira extração")
+    ap.add_argument("--root", type=Path, nargs="+", default=[ROOT], help="Árvore(s) do projeto a comparar (ex.: um git worktree antigo)")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--count", type=int, default=16, help="Laudos do primeiro envio")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--idle", type=float, default=3.0, help="Segundos na página inicial antes do envio")
+    ap.add_argument("--seed", type=int, default=2)
+    ap.add_argument("--child", nargs="+", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        kind, *rest = args.child
+        if kind == "render":
+            r = child_render(Path(rest[0]))
+        elif kind == "import":
+            r = child_import(Path(rest[0]), rest[1])
+        else:
+            r = child_extract(args.count, args.workers, args.idle, args.seed)
+        print(json.dumps(r))
+        return
+
+    # Cada medição em um processo novo: nada importado pelas anteriores fica em memória
+    for root in args.root:
+        print(f"{root}:")
+        renders = [spawn("render", str(root)) for _ in range(args.repeat)]
+        if not all(r['ok'] for r in renders):
+            print("  aviso: a página inicial não foi desenhada como esperado")
+        print(f"  página inicial do app: {min(r['seconds'] for r in renders):6.2f} s (melhor de {args.repeat})")
+        cli = min(spawn("import", str(root), "batch_cli")['seconds'] for _ in range(args.repeat))
+        print(f"  import do batch_cli  : {cli:6.2f} s (também pago por cada worker do pool)")
+
+    r = spawn("extract")
+    print(f"primeira extração ({args.count} laudos, {args.workers} workers):")
+    for mode in ("frio", "aquecido"):
+        print(f"  pool {mode:<8}: primeiro laudo em {r[mode]['first']:6.2f} s, envio inteiro em {r[mode]['total']:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
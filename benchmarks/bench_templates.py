@@ -0,0 +1,59 @@
+import argparse
+import sys
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from extraction_backends import BackendStats  # noqa: E402
+from pdf_extractor import PDFExtractor  # noqa: E402
+from synthetic_laudos import generate, make_pdf  # noqa: E402
+from template_registry import TemplateRegistry  # noqa: E402
+
+
+def run(docs: list[tuple[bytes, dict]], extractor: PDFExtractor) -> tuple[float, int, int]:
+    pages = 0
+    wrong = 0
+    start = time.perf_counter()
+    for pdf, truth in docs:
+        report = extractor.extract_with_report(BytesIO(pdf))
+        data = report['data'] or {}
+        pages += report['pages_read']
+        wrong += sum(1 for p in truth if p not in data or abs(data[p] - truth[p]) > 1e-9)
+    return time.perf_counter() - start, pages, wrong
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Extração com modelos de laboratório x caminho genérico")
+    ap.add_argument("--count", type=int, default=300)
+    ap.add_argument("--full-text", action="store_true", help="Lê todas as páginas em vez de parar ao achar os parâmetros")
+    ap.add_argument("--seed", type=int, default=2)
+    args = ap.parse_args()
+
+    docs = [(make_pdf(pages), truth) for _, _, pages, truth in generate(args.count, args.seed)]
+    streaming = not args.full_text
+    extractor = PDFExtractor(streaming=streaming, backend_stats=BackendStats())
+    path = Path(tempfile.mkdtemp()) / "templates.json"
+    registry = TemplateRegistry(path, extractor.patterns_version)
+    learning = PDFExtractor(streaming=streaming, backend_stats=BackendStats(), templates=registry)
+
+    generic, generic_pages, generic_wrong = run(docs, extractor)
+    # 1ª passada aprende os modelos; a 2ª usa o registro persistido, como numa nova sessão
+    run(docs, learning)
+    reloaded = TemplateRegistry(path, extractor.patterns_version)
+    fast, fast_pages, fast_wrong = run(docs, PDFExtractor(streaming=streaming, backend_stats=BackendStats(), templates=reloaded))
+
+    summary = reloaded.summary()
+    print(f"{args.count} laudos ({'páginas sob demanda' if streaming else 'texto integral'})")
+    print(f"  genérico : {generic / args.count * 1000:6.2f} ms/laudo, {generic_pages} páginas, {generic_wrong} valores incorretos")
+    print(f"  modelos  : {fast / args.count * 1000:6.2f} ms/laudo, {fast_pages} páginas, {fast_wrong} valores incorretos")
+    print(
+        f"  {summary['trusted']}/{summary['templates']} modelos confiáveis, "
+        f"acerto do caminho rápido {summary['hit_rate']:.1%} ({summary['fallbacks']} quedas para o genérico)"
+    )
+
+
+if __name__ == "__main__":
+    main()
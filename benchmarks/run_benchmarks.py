@@ -0,0 +1,139 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from classifier import ParameterClassifier  # noqa: E402
+from ishikawa_analyzer import IshikawaAnalyzer  # noqa: E402
+from lab_dataset import LabDataset  # noqa: E402
+from pdf_extractor import PDFExtractor  # noqa: E402
+from statistical_analyzer import StatisticalAnalyzer  # noqa: E402
+from synthetic_laudos import PARAMS, generate, make_pdf  # noqa: E402
+from visualizations import VisualizationGenerator  # noqa: E402
+
+
+TOLERANCE = 1e-9
+
+
+def timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def git_revision() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def compare(extracted: dict | None, truth: dict) -> list[str]:
+    if extracted is None:
+        return ["nenhum parâmetro extraído"]
+    errors = []
+    for p in PARAMS:
+        if p not in truth:
+            if p in extracted:
+                errors.append(f"{p}: extraído {extracted[p]} mas ausente no laudo")
+        elif p not in extracted or abs(extracted[p] - truth[p]) > TOLERANCE:
+            errors.append(f"{p}: esperado {truth[p]}, extraído {extracted.get(p)}")
+    return errors
+
+
+def bench_size(n: int, extract_cap: int, streaming: bool, seed: int) -> dict:
+    extractor = PDFExtractor(streaming=streaming)
+    rows = []
+    extract_seconds = 0.0
+    extracted_count = 0
+    mismatches = []
+    for i, (name, origin, pages, truth) in enumerate(generate(n, seed)):
+        if i < extract_cap:
+            buf = BytesIO(make_pdf(pages))
+            buf.name = name
+            data, elapsed = timed(lambda: extractor.extract_parameters(buf))
+            extract_seconds += elapsed
+            extracted_count += 1
+            errors = compare(data, truth)
+            if errors:
+                mismatches.append({'arquivo': name, 'erros': errors})
+            if data:
+                rows.append({**data, 'origem': origin})
+        else:
+            # Acima do limite, as linhas vêm do gabarito: as etapas seguintes ainda recebem n laudos
+            rows.append({**truth, 'origem': origin})
+
+    df = pd.DataFrame(rows)
+    stages = {
+        'extract_parameters': {
+            'seconds': extract_seconds,
+            'files': extracted_count,
+            'per_file_ms': extract_seconds / extracted_count * 1000 if extracted_count else None,
+        }
+    }
+    dataset, stages['lab_dataset'] = timed(lambda: LabDataset.from_frame(df))
+    analyzer = StatisticalAnalyzer()
+    viz = VisualizationGenerator()
+    results, stages['perform_analysis'] = timed(lambda: analyzer.perform_analysis(dataset))
+    classifications, stages['classify_parameters'] = timed(lambda: ParameterClassifier().classify_parameters(dataset))
+    _, stages['suggest_causes'] = timed(lambda: IshikawaAnalyzer().suggest_causes(classifications))
+    _, stages['create_boxplots'] = timed(lambda: viz.create_boxplots(dataset))
+    _, stages['create_normality_plots'] = timed(lambda: viz.create_normality_plots(dataset))
+    _, stages['create_pareto_chart'] = timed(lambda: viz.create_pareto_chart(results))
+    return {
+        'reports': n,
+        'rows': len(df),
+        'stages': {k: v if isinstance(v, dict) else {'seconds': v} for k, v in stages.items()},
+        'ground_truth': {'checked': extracted_count, 'mismatches': len(mismatches), 'examples': mismatches[:10]},
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark ponta a ponta com laudos sintéticos")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10, 1_000, 100_000])
+    ap.add_argument("--extract-cap", type=int, default=200, help="Máximo de PDFs extraídos por tamanho")
+    ap.add_argument("--full-text", action="store_true", help="Desliga a extração por páginas com parada antecipada")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--output", type=Path, default=Path(__file__).resolve().parent / "results")
+    args = ap.parse_args()
+    warnings.filterwarnings("ignore")
+
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'streaming': not args.full_text,
+        'extract_cap': args.extract_cap,
+        'runs': [],
+    }
+    for n in args.sizes:
+        run = bench_size(n, args.extract_cap, not args.full_text, args.seed)
+        report['runs'].append(run)
+        print(f"{n} laudos ({run['ground_truth']['mismatches']} divergências do gabarito em {run['ground_truth']['checked']})")
+        for stage, info in run['stages'].items():
+            print(f"  {stage:24s} {info['seconds'] * 1000:10.1f} ms")
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    path = args.output / f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with path.open("w", encoding="utf-8") as fh:
+        json.dump(report, fh, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {path}")
+    if any(run['ground_truth']['mismatches'] for run in report['runs']):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import argparse
+import json
+import random
+from pathlib import Path
+
+
+PARAMS = ['viscosidade_40c', 'teor_agua', 'particulas_4um', 'particulas_6um', 'particulas_14um']
+
+# Redações compatíveis com PDFExtractor.parameter_patterns (o extrator converte o texto para minúsculas)
+PHRASINGS = {
+    'viscosidade_40c': ["Viscosidade 40 °C: {v}", "Viscosidade cinemática: {v} cSt", "Viscosity 40°C {v}", "VISCOSIDADE = 40°C ... {v} cSt"],
+    'teor_agua': ["Teor de água: {v} ppm", "Water content (KF): {v} ppm", "Conteúdo de água {v} ppm"],
+    'particulas_4um': ["Partículas >4 µm: {v}", "Particles > 4 µm (c) {v} part/mL", ">4µm ..... {v}"],
+    'particulas_6um': ["Partículas >6 µm: {v}", "Particles > 6 µm (c) {v} part/mL", ">6µm ..... {v}"],
+    'particulas_14um': ["Partículas ≥14 µm: {v}", "Particles ≥ 14 µm (c) {v} part/mL", "≥14µm ..... {v}"],
+}
+
+HEADER_LINES = [
+    "LAUDO DE ANÁLISE Nº {n}",
+    "Produto: Óleo diesel S10",
+    "{lab}",
+    "Data da coleta: {d:02d}/{m:02d}/2024",
+    "Lote: {lote}",
+]
+
+# Poucos laboratórios, cada um com redação e layout fixos; uma parte dos laudos não segue nenhum
+LABS = [
+    {'nome': "Laboratório Alfa Análises Químicas", 'redacao': [0, 0, 0, 0, 0], 'layout': 'primeira'},
+    {'nome': "Beta Lab Combustíveis Ltda.", 'redacao': [1, 1, 1, 1, 1], 'layout': 'anexos_antes'},
+    {'nome': "Gama Ensaios Físico-Químicos", 'redacao': [3, 2, 2, 2, 2], 'layout': 'meio'},
+    {'nome': "Delta Petro Laboratório", 'redacao': [2, 0, 1, 0, 1], 'layout': 'primeira'},
+]
+AVULSO = 0.1
+
+ANNEX_LINES = [
+    "Resultados obtidos conforme norma ASTM D445 e NBR 14343",
+    "Amostra recebida em frasco de vidro âmbar, lacrado",
+    "Incerteza expandida k=2, nível de confiança de 95%",
+    "A tabela abaixo resume os ensaios complementares - ver anexo",
+    "Ponto de fulgor 62 °C; massa específica 0,843 g/cm3; enxofre 8 mg/kg",
+    "Observações: resultados referem-se somente à amostra analisada",
+]
+
+LINES_PER_PAGE = 50
+
+
+def _esc(line: str) -> bytes:
+    # Helvetica/WinAnsi; ≥ é remapeado para o código 129 via /Differences
+    raw = line.replace('≥', '\x81').encode('latin-1')
+    return raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def make_pdf(pages: list[list[str]]) -> bytes:
+    font = (
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+        b"/Encoding << /Type /Encoding /BaseEncoding /WinAnsiEncoding /Differences [129 /greaterequal] >> >>"
+    )
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objs = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode(),
+        font,
+    ]
+    for i, lines in enumerate(pages):
+        content = b"BT /F1 11 Tf 14 TL 50 800 Td " + b" ".join(b"(" + _esc(line) + b") Tj T*" for line in lines) + b" ET"
+        objs.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> "
+            f"/Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        objs.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for k, obj in enumerate(objs, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % k + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref)
+    return bytes(out)
+
+
+def random_values(rnd: random.Random, origin: str) -> dict:
+    # A distribuidora tende a ter mais água e partículas (transporte e armazenagem)
+    shift = 1.0 if origin == 'Mineradora' else 1.25
+    return {
+        'viscosidade_40c': round(rnd.gauss(3.0, 0.3), 2),
+        'teor_agua': float(round(rnd.lognormvariate(4.5, 0.35) * shift)),
+        'particulas_4um': float(round(rnd.lognormvariate(7.5, 0.6) * shift)),
+        'particulas_6um': float(round(rnd.lognormvariate(6.3, 0.6) * shift)),
+        'particulas_14um': float(round(rnd.lognormvariate(2.3, 0.5) * shift)),
+    }
+
+
+def _format(param: str, value: float, rnd: random.Random) -> str:
+    if param == 'viscosidade_40c':
+        text = f"{value:.2f}"
+        return text.replace('.', ',') if rnd.random() < 0.7 else text
+    return str(int(value))
+
+
+def generate_laudo(
+    rnd: random.Random, origin: str = 'Mineradora', lab: dict | None = None, nota_fiscal: int | None = None
+) -> tuple[list[list[str]], dict]:
+    values = random_values(rnd, origin)
+    # Um parâmetro pode faltar (o extrator aceita a partir de 3)
+    if rnd.random() < 0.2:
+        values.pop(rnd.choice(PARAMS))
+
+    if lab is None:
+        results = [rnd.choice(PHRASINGS[p]).format(v=_format(p, v, rnd)) for p, v in values.items()]
+        rnd.shuffle(results)
+        layout = rnd.choices(['primeira', 'anexos_antes', 'meio'], weights=[0.6, 0.25, 0.15])[0]
+        lab_name = "Laboratório de ensaios físico-químicos"
+    else:
+        results = [PHRASINGS[p][lab['redacao'][PARAMS.index(p)]].format(v=_format(p, v, rnd)) for p, v in values.items()]
+        layout = lab['layout']
+        lab_name = lab['nome']
+    month = rnd.randint(1, 12)
+    # Poucos lotes por mês, para que o filtro por lote agrupe vários laudos
+    lote = f"LT24-{month:02d}{rnd.choice('ABC')}"
+    header = [
+        line.format(n=rnd.randint(1000, 99999), d=rnd.randint(1, 28), m=month, lab=lab_name, lote=lote)
+        for line in HEADER_LINES
+    ]
+    if nota_fiscal is not None:
+        header.append(f"Nota fiscal nº {nota_fiscal}")
+
+    # Layouts: resultados na 1ª página, após páginas de anexo, ou no meio de uma página longa
+    n_pages = rnd.randint(1, 6)
+    annex = [[rnd.choice(ANNEX_LINES) for _ in range(LINES_PER_PAGE)] for _ in range(n_pages - 1)]
+    if layout == 'primeira':
+        pages = [header + results] + annex
+    elif layout == 'anexos_antes':
+        pages = [header] + annex + [results]
+    else:
+        filler = [rnd.choice(ANNEX_LINES) for _ in range(20)]
+        pages = [header + filler + results + filler] + annex
+    return pages, values
+
+
+def generate(n: int, seed: int = 0):
+    rnd = random.Random(seed)
+    for i in range(n):
+        origin = 'Mineradora' if i % 2 == 0 else 'Distribuidora'
+        lab = None if rnd.random() < AVULSO else rnd.choice(LABS)
+        # Laudos consecutivos (mineradora, distribuidora) descrevem a mesma entrega
+        pages, values = generate_laudo(rnd, origin, lab, nota_fiscal=100000 + i // 2)
+        yield f"laudo_{i:06d}.pdf", origin, pages, values
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Gera laudos de diesel sintéticos (PDF) com gabarito em JSON")
+    ap.add_argument("--count", type=int, default=100)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--output", type=Path, required=True)
+    args = ap.parse_args()
+
+    truth = {}
+    for origin in ('Mineradora', 'Distribuidora'):
+        (args.output / origin.lower()).mkdir(parents=True, exist_ok=True)
+    for name, origin, pages, values in generate(args.count, args.seed):
+        (args.output / origin.lower() / name).write_bytes(make_pdf(pages))
+        truth[name] = {'origem': origin, **values}
+    with (args.output / "gabarito.json").open("w", encoding="utf-8") as fh:
+        json.dump(truth, fh, ensure_ascii=False, indent=2)
+    print(f"{args.count} laudos gravados em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,130 @@
+import json
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
 
+from accumulators import LabAccumulator
+from lab_dataset import ORIGINS, LabDataset
+from rule_engine import RuleSet, load_rules
+
 
 class ParameterClassifier:
-    def __init__(self) -> None:
-        self.normative_limits = {
-            'viscosidade_40c': {'min': 2.0, 'max': 4.1, 'unit': 'cSt'},
-            'teor_agua': {'min': 0.0, 'max': 200.0, 'unit': 'ppm'},
-            'particulas_14um': {'min': 0.0, 'max': 20.0, 'unit': 'part/mL'},
-        }
-        self.divergence_criteria = {
-            'viscosidade_40c': 0.4,
-            'teor_agua': 50.0,
-            'particulas_14um': 5.0,
-        }
+    def __init__(self, config_path: str | Path | None = None) -> None:
+        # Limites normativos e critérios de divergência vêm de regras_classificacao.json (ou do arquivo indicado)
+        rules = load_rules(config_path)
+        self.normative_limits = rules['normative_limits']
+        self.divergence_criteria = rules['divergence_criteria']
+        self._rules: RuleSet | None = None
+        self._rules_key: str | None = None
+
+    @property
+    def rules(self) -> RuleSet:
+        # Recompiladas apenas quando os limites ou critérios mudam
+        key = json.dumps([self.normative_limits, self.divergence_criteria], sort_keys=True)
+        if self._rules is None or self._rules_key != key:
+            self._rules = RuleSet(self.normative_limits, self.divergence_criteria)
+            self._rules_key = key
+        return self._rules
 
-    def classify_parameters(self, df: pd.DataFrame) -> dict:
+    def classify_samples(self, df: pd.DataFrame) -> dict:
+        # Cada amostra contra cada regra numa única passada vetorizada. flags: por parâmetro,
+        # -1 abaixo do mínimo, 1 acima do máximo, 0 dentro (ou sem valor / sem limite)
+        rules = self.rules
+        params = [p for p in rules.params if p in df.columns]
+        rules = rules if params == rules.params else RuleSet(self.normative_limits, self.divergence_criteria, params)
+        origem = pd.Categorical(df['origem'], categories=ORIGINS)
+        codes = origem.codes
+        known = codes >= 0
+        values = df[params].to_numpy(dtype=np.float64, na_value=np.nan)
+        if not known.all():
+            values, codes = values[known], codes[known]
+        result = rules.evaluate(values, codes, len(ORIGINS))
+
+        spec = result['above'].astype(np.int8) - result['below'].astype(np.int8)
+        flags = pd.DataFrame(spec, columns=params, index=df.index[known])
+        flags['fora_do_padrao'] = spec.any(axis=1)
+        flags['divergente'] = result['divergent'].any(axis=1)
+
+        counts = result['counts']
+        summary: dict[str, dict] = {}
+        for k, origin in enumerate(ORIGINS):
+            summary[origin] = {}
+            for j, p in enumerate(params):
+                n = int(counts['samples'][k, j])
+                if n == 0:
+                    continue
+                out = int(counts['below'][k, j] + counts['above'][k, j])
+                summary[origin][p] = {
+                    'samples': n,
+                    'below': int(counts['below'][k, j]),
+                    'above': int(counts['above'][k, j]),
+                    'out_of_spec': out,
+                    'out_of_spec_rate': out / n,
+                    'divergent': int(counts['divergent'][k, j]),
+                    'divergent_rate': int(counts['divergent'][k, j]) / n,
+                    'has_limits': bool(not np.isnan(rules.low[j])),
+                    'has_criterion': bool(not np.isnan(rules.divergence[j])),
+                }
+        return {'flags': flags, 'summary': summary}
+
+    def classify_parameters(self, df: pd.DataFrame | LabDataset) -> dict:
+        data = LabDataset.coerce(df)
         out: dict[str, dict] = {}
-        for col in df.columns:
-            if col == 'origem':
-                continue
-            c = self._classify_one(df, col)
+        for col in data.columns:
+            c = self._classify_one(data, col)
             if c:
                 out[col] = c
         return out
 
-    def _classify_one(self, df: pd.DataFrame, param: str) -> dict | None:
-        a = df[df['origem'] == 'Mineradora'][param].dropna()
-        b = df[df['origem'] == 'Distribuidora'][param].dropna()
+    def classify_from_accumulators(self, acc: LabAccumulator) -> dict:
+        out: dict[str, dict] = {}
+        for param in acc.params:
+            a = acc.get('Mineradora', param)
+            b = acc.get('Distribuidora', param)
+            if a.count == 0 or b.count == 0:
+                continue
+            out[param] = self._classify_means(param, a.mean, b.mean)
+        return out
+
+    def flag_pair_divergences(self, pairs: pd.DataFrame) -> pd.DataFrame:
+        # Uma coluna booleana por parâmetro com critério: |mineradora - distribuidora| >= limite no par
+        flags = {}
+        for param, thr in self.divergence_criteria.items():
+            a_col, b_col = f"{param}_mineradora", f"{param}_distribuidora"
+            if a_col in pairs and b_col in pairs:
+                diff = (pairs[a_col] - pairs[b_col]).abs()
+                flags[param] = (diff >= thr).to_numpy()
+        return pd.DataFrame(flags, index=pairs.index)
+
+    def classify_pairs(self, pairs: pd.DataFrame) -> dict:
+        flags = self.flag_pair_divergences(pairs)
+        out: dict[str, dict] = {}
+        for param in flags.columns:
+            a = pairs[f"{param}_mineradora"]
+            b = pairs[f"{param}_distribuidora"]
+            valid = (a.notna() & b.notna()).to_numpy()
+            n = int(valid.sum())
+            if n == 0:
+                continue
+            divergent = int(flags[param].to_numpy()[valid].sum())
+            out[param] = {
+                'pairs': n,
+                'divergent': divergent,
+                'share': divergent / n,
+                'threshold': self.divergence_criteria[param],
+                'max_difference': float((a - b).abs()[valid].max()),
+            }
+        return out
+
+    def _classify_one(self, data: LabDataset, param: str) -> dict | None:
+        a = data.values('Mineradora', param)
+        b = data.values('Distribuidora', param)
         if len(a) == 0 or len(b) == 0:
             return None
-        ma = float(np.mean(a))
-        mb = float(np.mean(b))
+        return self._classify_means(param, float(np.mean(a)), float(np.mean(b)))
+
+    def _classify_means(self, param: str, ma: float, mb: float) -> dict:
         within_a = self._within(param, ma)
         within_b = self._within(param, mb)
         divergent = self._divergent(param, ma, mb)
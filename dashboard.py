@@ -0,0 +1,592 @@
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import date
+from io import BytesIO, StringIO
+from uuid import uuid4
+
+import streamlit as st
+import pandas as pd
+from extraction_backends import BackendStats
+from extraction_cache import ExtractionCache
+from extraction_job import ExtractionJob
+from extraction_service import ExtractionService
+from history_store import HistoryStore
+from instrumentation import Instrumentation
+from lab_dataset import ORIGINS, LabDataset
+from pairing import match_reports
+from pdf_extractor import PDFExtractor
+from resampling import ResamplingEngine
+from result_cache import ResultCache, dataset_fingerprint, frame_fingerprint, settings_fingerprint
+from spc import SPCMonitor
+from statistical_analyzer import StatisticalAnalyzer
+from template_registry import TemplateRegistry
+from visualizations import VisualizationGenerator
+from classifier import ParameterClassifier
+from ishikawa_analyzer import CauseKnowledge, IshikawaAnalyzer
+
+
+# Intervalo mínimo entre redesenhos do painel enquanto a extração ainda corre
+REFRESH_SECONDS = 2.0
+
+
+@st.cache_resource
+def get_extraction_cache() -> ExtractionCache:
+    return ExtractionCache()
+
+
+@st.cache_resource
+def get_backend_stats() -> BackendStats:
+    return BackendStats()
+
+
+@st.cache_resource
+def get_template_registry() -> TemplateRegistry:
+    return TemplateRegistry(get_extraction_cache().cache_dir / "templates.json", PDFExtractor().patterns_version)
+
+
+@st.cache_resource
+def get_history_store() -> HistoryStore:
+    return HistoryStore(get_extraction_cache().cache_dir / "historico.sqlite3")
+
+
+@st.cache_resource
+def get_ishikawa_analyzer() -> IshikawaAnalyzer:
+    # Compartilhado entre sessões: as confirmações de causa-raiz e o ranking memorizado valem para todos
+    return IshikawaAnalyzer(CauseKnowledge(get_extraction_cache().cache_dir / "causas_confirmadas.json"))
+
+
+@st.cache_resource
+def get_export_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="relatorio")
+
+
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    return ResultCache()
+
+
+def with_payload(fig):
+    return fig, VisualizationGenerator.payload_bytes(fig)
+
+
+def display_diagnostics(instr: Instrumentation) -> None:
+    with st.expander("🩺 Diagnóstico de desempenho"):
+        st.markdown("**Etapas**")
+        st.dataframe(pd.DataFrame(instr.stage_table()), use_container_width=True)
+        st.markdown("**Arquivos**")
+        st.dataframe(pd.DataFrame(instr.file_table()), use_container_width=True)
+        st.download_button(
+            "Exportar diagnóstico (JSON lines)",
+            data=instr.to_jsonl(),
+            file_name="diagnostico.jsonl",
+            mime="application/jsonl",
+        )
+
+
+def create_results_table(results: dict) -> pd.DataFrame:
+    rows = []
+    for param, r in results.items():
+        rows.append(
+            {
+                "Parâmetro": param,
+                "Média Mineradora": f"{r['mean_mineradora']:.2f}" if pd.notna(r['mean_mineradora']) else "-",
+                "Média Distribuidora": f"{r['mean_distribuidora']:.2f}" if pd.notna(r['mean_distribuidora']) else "-",
+                "Mediana Mineradora": f"{r['median_mineradora']:.2f}" if pd.notna(r['median_mineradora']) else "-",
+                "Mediana Distribuidora": f"{r['median_distribuidora']:.2f}" if pd.notna(r['median_distribuidora']) else "-",
+                "Desv. Padrão Mineradora": f"{r['std_mineradora']:.2f}" if pd.notna(r['std_mineradora']) else "-",
+                "Desv. Padrão Distribuidora": f"{r['std_distribuidora']:.2f}" if pd.notna(r['std_distribuidora']) else "-",
+                "Teste Aplicado": r['test_used'],
+                "p-valor": f"{r['p_value']:.4f}" if pd.notna(r['p_value']) else "-",
+                "Conclusão": "Rejeita H₀" if pd.notna(r['p_value']) and r['p_value'] < 0.05 else "Não Rejeita H₀",
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def create_paired_table(paired: dict, divergences: dict) -> pd.DataFrame:
+    rows = []
+    for param, r in paired.items():
+        if r['test_used'] == 'Dados insuficientes':
+            continue
+        div = divergences.get(param)
+        rows.append(
+            {
+                "Parâmetro": param,
+                "Pares": r['n_pairs'],
+                "Diferença média (M - D)": f"{r['mean_difference']:.2f}",
+                "IC da diferença": f"{r['ci_difference'][0]:.2f} a {r['ci_difference'][1]:.2f}",
+                "Teste Aplicado": r['test_used'],
+                "p-valor": f"{r['p_value']:.4f}",
+                "Conclusão": "Rejeita H₀" if r['p_value'] < 0.05 else "Não Rejeita H₀",
+                "Pares divergentes": f"{div['divergent']} ({div['share']:.0%})" if div else "-",
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def display_classifications(classifications: dict) -> None:
+    col1, col2, col3 = st.columns(3)
+    normal_count = sum(1 for c in classifications.values() if c['classification'] == 'Normal')
+    divergent_count = sum(1 for c in classifications.values() if c['classification'] == 'Divergente')
+    out_count = sum(1 for c in classifications.values() if c['classification'] == 'Fora do Padrão')
+
+    col1.metric("✅ Normal", normal_count)
+    col2.metric("⚠️ Divergente", divergent_count)
+    col3.metric("❌ Fora do Padrão", out_count)
+
+    for param, c in classifications.items():
+        emoji = {"Normal": "✅", "Divergente": "⚠️", "Fora do Padrão": "❌"}[c['classification']]
+        st.write(f"{emoji} **{param}**: {c['classification']}")
+        if c['details']:
+            st.caption(c['details'])
+
+
+def display_sample_rates(samples: dict, frame: pd.DataFrame) -> None:
+    rows = [
+        {
+            "Parâmetro": param,
+            "Origem": origin,
+            "Amostras": s['samples'],
+            "Fora do padrão": f"{s['out_of_spec']} ({s['out_of_spec_rate']:.1%})" if s['has_limits'] else "-",
+            "Divergentes": f"{s['divergent']} ({s['divergent_rate']:.1%})" if s['has_criterion'] else "-",
+        }
+        for origin, by_param in samples['summary'].items()
+        for param, s in by_param.items()
+    ]
+    if not rows:
+        return
+    st.subheader("Taxas por amostra")
+    st.dataframe(pd.DataFrame(rows).sort_values(["Parâmetro", "Origem"]), use_container_width=True, hide_index=True)
+    flags = samples['flags']
+    flagged = flags[flags['fora_do_padrao'] | flags['divergente']]
+    if len(flagged):
+        with st.expander(f"Amostras sinalizadas ({len(flagged)})"):
+            ids = [c for c in ('arquivo', 'origem', 'data_amostra', 'lote') if c in frame.columns]
+            params = [c for c in flagged.columns if c not in ('fora_do_padrao', 'divergente')]
+            table = frame.loc[flagged.index, ids + params].copy()
+            table['Fora do padrão'] = flagged['fora_do_padrao']
+            table['Divergente'] = flagged['divergente']
+            st.dataframe(table, use_container_width=True)
+
+
+def display_spc_alarms(spc_result: dict) -> None:
+    active = spc_result['active']
+    if active:
+        st.error(
+            "Alarmes no laudo mais recente:\n\n"
+            + "\n".join(f"- {a['origem']} · {a['parametro']}: {a['regra']}" for a in active)
+        )
+    else:
+        st.success("Nenhum alarme ativo no laudo mais recente de cada origem.")
+    alarms = spc_result['alarms']
+    if alarms:
+        table = pd.DataFrame(alarms).rename(
+            columns={'origem': 'Origem', 'parametro': 'Parâmetro', 'regra': 'Regra', 'indice': 'Laudo nº', 'data': 'Data da coleta', 'valor': 'Valor'}
+        )
+        table['Laudo nº'] += 1
+        st.caption(f"{len(alarms)} início(s) de alarme no período (linha de base: primeiros laudos de cada origem)")
+        st.dataframe(table.iloc[::-1], use_container_width=True)
+
+
+def display_causes(causes: dict) -> None:
+    icons = {
+        "Método": "🔬",
+        "Máquina": "⚙️",
+        "Mão de obra": "👥",
+        "Material": "📦",
+        "Meio ambiente": "🌡️",
+        "Medida": "📏",
+    }
+    for cat, items in causes.items():
+        if not items:
+            continue
+        st.subheader(f"{icons.get(cat, '•')} {cat}")
+        for it in items:
+            st.write(f"- {it}")
+
+
+def display_cause_ranking(ishikawa: IshikawaAnalyzer, ranking: list[dict], classifications: dict) -> None:
+    table = pd.DataFrame(
+        [
+            {
+                "Categoria": r['categoria'],
+                "Causa": r['causa'],
+                "Pontuação": f"{r['share']:.1%}",
+                "Evidência": ", ".join(r['parametros']),
+                "Confirmações": r['confirmacoes'],
+            }
+            for r in ranking[:15]
+        ]
+    )
+    st.caption(
+        f"Causas ordenadas pela força da evidência (efeito, p-valor e parâmetros que divergem juntos) e por "
+        f"{ishikawa.knowledge.incidents} causa(s)-raiz confirmada(s) anteriormente"
+    )
+    st.dataframe(table, use_container_width=True, hide_index=True)
+    with st.expander("Registrar causa-raiz confirmada"):
+        choice = st.selectbox(
+            "Causa confirmada", range(len(ranking)), format_func=lambda i: f"{ranking[i]['categoria']}: {ranking[i]['causa']}"
+        )
+        if st.button("Registrar confirmação"):
+            ishikawa.confirm_cause(classifications, ranking[choice]['categoria'], ranking[choice]['causa'])
+            st.success("Confirmação registrada; o ranking passa a considerá-la.")
+
+
+def build_report(
+    frame: pd.DataFrame, dataset: LabDataset, results: dict, classifications: dict, samples: dict, ranking: list[dict]
+) -> tuple[bytes, bytes]:
+    # matplotlib e openpyxl só quando um relatório é pedido
+    from report_exporter import ReportExporter
+
+    exporter = ReportExporter()
+    figures = exporter.figures(dataset, results)
+    sample_rows = exporter.sample_table(frame, samples)
+    xlsx = BytesIO()
+    exporter.write_excel(xlsx, frame, results, classifications, samples, ranking, sample_rows, figures)
+    page = StringIO()
+    exporter.write_html(page, frame, results, classifications, samples, ranking, sample_rows, figures)
+    return xlsx.getvalue(), page.getvalue().encode('utf-8')
+
+
+def display_export(key: tuple, build) -> Future | None:
+    # Gerado em segundo plano; a página volta a ser desenhada até o download ficar disponível
+    current = st.session_state.get('export')
+    if current is not None and current[0] != key:
+        current = None
+    if current is None:
+        if not st.button("Gerar relatório (Excel e HTML)"):
+            return None
+        current = (key, get_export_executor().submit(build))
+        st.session_state['export'] = current
+    future = current[1]
+    if not future.done():
+        st.info("Gerando o relatório em segundo plano...")
+        return future
+    if future.exception() is not None:
+        st.error(f"Falha ao gerar o relatório: {future.exception()}")
+        del st.session_state['export']
+        return None
+    xlsx, page = future.result()
+    col1, col2 = st.columns(2)
+    col1.download_button(
+        "Baixar planilha (.xlsx)",
+        data=xlsx,
+        file_name="relatorio_laudos.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+    col2.download_button("Baixar relatório (.html)", data=page, file_name="relatorio_laudos.html", mime="text/html")
+    return None
+
+
+def start_extraction(mineradora_files, distribuidora_files, service: ExtractionService | None = None) -> ExtractionJob:
+    # Um job por conjunto de arquivos enviados; trocar os arquivos cancela o job anterior
+    tagged = [(f, 'Mineradora') for f in mineradora_files] + [(f, 'Distribuidora') for f in distribuidora_files]
+    key = tuple((f.file_id, origin) for f, origin in tagged)
+    current = st.session_state.get('extraction')
+    if current is not None and current[0] == key:
+        return current[1]
+    if current is not None:
+        current[1].cancel()
+    extractor = PDFExtractor(
+        cache=get_extraction_cache(), streaming=True, backend_stats=get_backend_stats(), templates=get_template_registry()
+    )
+    executor = None
+    if service is not None:
+        # A sessão identifica a fila no serviço compartilhado (rodízio e contrapressão por sessão)
+        executor = service.session(st.session_state.setdefault('session_id', uuid4().hex))
+    job = ExtractionJob(extractor, [f for f, _ in tagged], [origin for _, origin in tagged], executor=executor).start()
+    st.session_state['extraction'] = (key, job)
+    st.session_state['extraction_saved'] = False
+    return job
+
+
+def display_service(service: ExtractionService | None) -> None:
+    if service is None:
+        return
+    m = service.metrics()
+    text = (
+        f"Serviço de extração ({m['workers']} workers, compartilhado): {m['queued']} na fila, {m['running']} em execução, "
+        f"{m['sessions_waiting']} sessão(ões) aguardando; {m['completed']} extraídos, "
+        f"{m['deduplicated']} pedidos repetidos atendidos pela mesma extração"
+    )
+    if m['wait_p95'] is not None:
+        text += f"; espera na fila p50/p95 {m['wait_p50']:.1f}/{m['wait_p95']:.1f} s, extração p50/p95 {m['run_p50']:.2f}/{m['run_p95']:.2f} s"
+    st.sidebar.caption(text)
+
+
+def follow_extraction(job: ExtractionJob, seen: int) -> None:
+    if job.done:
+        return
+    job.wait(seen, REFRESH_SECONDS)
+    st.rerun()
+
+
+def load_uploaded(job: ExtractionJob, save_history: bool, instr: Instrumentation) -> tuple | None:
+    cache = get_extraction_cache()
+    backend_stats = get_backend_stats()
+    templates = get_template_registry()
+    extractor = job.extractor
+    outcomes, origins = job.snapshot()
+    if job.done:
+        instr.record_stage("Extração de PDFs", job.seconds)
+        if job.error:
+            st.error(f"A extração foi interrompida: {job.error}")
+    else:
+        instr.record_stage("Extração de PDFs (em andamento)", job.elapsed())
+        st.progress(
+            len(outcomes) / job.total,
+            text=f"Extraindo dados dos PDFs: {len(outcomes)} de {job.total} laudos em {job.elapsed():.0f} s; "
+            f"os resultados abaixo são parciais e se atualizam a cada {REFRESH_SECONDS:.0f} s",
+        )
+        with st.expander("Situação por arquivo"):
+            st.dataframe(pd.DataFrame(job.status_table()), use_container_width=True, hide_index=True)
+    instr.record_files(outcomes, origins)
+    if job.done and save_history and not st.session_state.get('extraction_saved'):
+        with instr.stage("Gravação no histórico"):
+            get_history_store().add_reports(outcomes, origins)
+        st.session_state['extraction_saved'] = True
+
+    rows_by_origin: dict[str, list] = {'Mineradora': [], 'Distribuidora': []}
+    failures = []
+    for origin, outcome in zip(origins, outcomes):
+        if outcome['error']:
+            failures.append(f"{outcome['name']}: {outcome['error']}")
+        elif outcome['data']:
+            data = dict(outcome['data'])
+            data['origem'] = origin
+            data['arquivo'] = outcome['name']
+            for key in ('data_amostra', 'lote', 'amostra', 'nota_fiscal'):
+                data[key] = outcome['metadata'].get(key)
+            rows_by_origin[origin].append(data)
+    mineradora_rows = rows_by_origin['Mineradora']
+    distribuidora_rows = rows_by_origin['Distribuidora']
+    if failures:
+        st.warning("Falha ao processar alguns arquivos:\n\n" + "\n".join(f"- {msg}" for msg in failures))
+
+    cache_stats = cache.stats()
+    pages_read = sum(o['pages_read'] for o in outcomes)
+    st.sidebar.caption(
+        f"Cache de extração: {cache_stats['hits']} acertos, {cache_stats['text_hits']} reaproveitamentos de texto, "
+        f"{cache_stats['misses']} falhas ({cache_stats['entries']} laudos armazenados); "
+        f"{pages_read} páginas lidas nesta execução"
+    )
+    template_summary = templates.summary()
+    if template_summary['seen']:
+        st.sidebar.caption(
+            f"Modelos de laboratório: {template_summary['trusted']} confiáveis de {template_summary['templates']}; "
+            f"caminho rápido em {template_summary['hit_rate']:.0%} dos laudos extraídos"
+        )
+    backend_summary = backend_stats.summary()
+    if backend_summary:
+        st.sidebar.caption(
+            "Backends de extração (ordem atual: " + " → ".join(extractor.backend_order) + "): "
+            + "; ".join(
+                f"{name} {s['success_rate']:.0%} de sucesso em {s['attempts']} tentativas, {s['mean_seconds'] * 1000:.0f} ms"
+                for name, s in backend_summary.items()
+                if s['success_rate'] is not None
+            )
+        )
+
+    if not mineradora_rows or not distribuidora_rows:
+        if job.done:
+            st.error("Não foi possível extrair dados suficientes dos PDFs enviados.")
+        else:
+            st.info("Aguardando laudos das duas origens para exibir os primeiros resultados...")
+        return None
+
+    with instr.stage("Montagem do dataset"):
+        df = pd.DataFrame(mineradora_rows + distribuidora_rows)
+        return LabDataset.from_frame(df), df
+
+
+def load_history(instr: Instrumentation) -> tuple | None:
+    store = get_history_store()
+    stored = store.stats()
+    if not stored['entries']:
+        st.info("O histórico está vazio. Analise laudos enviados com a opção de salvar no histórico marcada.")
+        return None
+
+    options = store.filters()
+    st.sidebar.header("🗂️ Filtros do histórico")
+    start = end = None
+    if options['start'] is not None:
+        first, last = date.fromisoformat(options['start']), date.fromisoformat(options['end'])
+        period = st.sidebar.date_input("Período da coleta", value=(first, last), min_value=first, max_value=last)
+        # Sem alterar o período, laudos sem data de coleta também entram
+        if isinstance(period, (tuple, list)) and len(period) == 2 and tuple(period) != (first, last):
+            start, end = period
+    lots = st.sidebar.multiselect("Lotes", options['lots'])
+    lab = st.sidebar.selectbox("Laboratório", ["Todos"] + options['labs'])
+
+    filters = dict(start=start, end=end, lots=lots or None, lab=None if lab == "Todos" else lab)
+    with instr.stage("Consulta ao histórico"):
+        frame = store.frame(**filters)
+        dataset = LabDataset.from_frame(frame)
+    counts = {o: int((dataset.origem == o).sum()) for o in ORIGINS}
+    st.sidebar.caption(
+        f"Histórico: {stored['entries']} laudos armazenados; {len(dataset)} no filtro atual "
+        f"({', '.join(f'{o}: {n}' for o, n in counts.items())})"
+    )
+    if not all(counts.values()):
+        st.error("O filtro selecionado não tem laudos das duas origens.")
+        return None
+    return dataset, frame
+
+
+def render(
+    source: str,
+    mineradora_files,
+    distribuidora_files,
+    save_history: bool,
+    strategy: str,
+    n_resamples: int,
+    service: ExtractionService | None,
+) -> None:
+    instr = Instrumentation()
+    job = None
+    if source == "Histórico":
+        loaded = load_history(instr)
+        if loaded is None:
+            return
+    else:
+        job = start_extraction(mineradora_files, distribuidora_files, service)
+        display_service(service)
+        seen = job.completed
+        loaded = load_uploaded(job, save_history, instr)
+        if loaded is None:
+            if job.done:
+                display_diagnostics(instr)
+            follow_extraction(job, seen)
+            return
+    dataset, frame = loaded
+
+    analyzer = StatisticalAnalyzer(
+        test_strategy=strategy,
+        resampling=ResamplingEngine(n_resamples=int(n_resamples), seed=0),
+    )
+    viz = VisualizationGenerator()
+    classifier = ParameterClassifier()
+    ishikawa = get_ishikawa_analyzer()
+
+    # Reexecuções com os mesmos dados e configurações reaproveitam testes, figuras e diagnósticos
+    results_cache = get_result_cache()
+    data_key = dataset_fingerprint(dataset)
+    frame_key = frame_fingerprint(frame)
+    analysis_key = (data_key, settings_fingerprint(analyzer))
+    classify_key = (data_key, settings_fingerprint(classifier))
+    viz_key = settings_fingerprint(viz)
+
+    with instr.stage("Análise estatística"):
+        results = results_cache.get_or_compute('analysis', analysis_key, lambda: analyzer.perform_analysis(dataset))
+
+    st.header("📊 Resultados da Análise Estatística")
+    st.dataframe(create_results_table(results), use_container_width=True)
+
+    st.header("📈 Visualizações")
+    if viz.is_large(dataset):
+        st.info(
+            f"Modo para grandes volumes ({len(dataset)} laudos): boxplots calculados no servidor "
+            f"e gráficos QQ amostrados por quantis."
+        )
+    st.subheader("Boxplots comparativos")
+    with instr.stage("Boxplots"):
+        boxplots, size = results_cache.get_or_compute('boxplots', (data_key, viz_key), lambda: with_payload(viz.create_boxplots(dataset)))
+    st.plotly_chart(boxplots, use_container_width=True)
+    st.caption(f"Tamanho da figura: {size / 1024:.0f} KB")
+
+    st.subheader("Gráficos de probabilidade normal (QQ)")
+    with instr.stage("Gráficos QQ"):
+        qq, size = results_cache.get_or_compute('normality_plots', (data_key, viz_key), lambda: with_payload(viz.create_normality_plots(dataset)))
+    st.plotly_chart(qq, use_container_width=True)
+    st.caption(f"Tamanho da figura: {size / 1024:.0f} KB")
+
+    st.subheader("Pareto de divergências")
+    with instr.stage("Pareto"):
+        pareto, size = results_cache.get_or_compute('pareto', analysis_key + (viz_key,), lambda: with_payload(viz.create_pareto_chart(results)))
+    st.plotly_chart(pareto, use_container_width=True)
+    st.caption(f"Tamanho da figura: {size / 1024:.0f} KB")
+
+    st.header("🎯 Diagnóstico de Divergências")
+    with instr.stage("Classificação"):
+        classifications = results_cache.get_or_compute(
+            'classification', classify_key, lambda: classifier.classify_parameters(dataset)
+        )
+    display_classifications(classifications)
+    with instr.stage("Classificação por amostra"):
+        samples = results_cache.get_or_compute(
+            'samples', (frame_key, settings_fingerprint(classifier)), lambda: classifier.classify_samples(frame)
+        )
+    display_sample_rates(samples, frame)
+
+    st.header("🔍 Possíveis Causas (Ishikawa)")
+    with instr.stage("Causas (Ishikawa)"):
+        ranking = ishikawa.rank_causes(classifications, results)
+    if ranking:
+        display_cause_ranking(ishikawa, ranking, classifications)
+    else:
+        display_causes(ishikawa.suggest_causes(classifications))
+
+    st.header("🔗 Comparação Pareada")
+    with instr.stage("Pareamento"):
+        pairs = results_cache.get_or_compute('pairs', (frame_key,), lambda: match_reports(frame))
+    by_criterion = pairs['criterio'].value_counts().to_dict()
+    unmatched = pairs.attrs.get('unmatched', {})
+    st.caption(
+        f"{len(pairs)} pares mineradora × distribuidora ("
+        + ", ".join(f"{n} por {'data de coleta' if c == 'data' else c.replace('_', ' ')}" for c, n in by_criterion.items())
+        + f"); sem par: {unmatched.get('Mineradora', 0)} da mineradora, {unmatched.get('Distribuidora', 0)} da distribuidora"
+    )
+    if len(pairs) < 3:
+        st.info("Poucos laudos pareados por nota fiscal, amostra, lote ou data de coleta; o teste pareado precisa de ao menos 3 pares.")
+    else:
+        pair_key = (frame_key, settings_fingerprint(analyzer), settings_fingerprint(classifier))
+        with instr.stage("Testes pareados"):
+            paired, pair_divergences = results_cache.get_or_compute(
+                'paired_analysis', pair_key,
+                lambda: (analyzer.perform_paired_analysis(pairs), classifier.classify_pairs(pairs)),
+            )
+        st.dataframe(create_paired_table(paired, pair_divergences), use_container_width=True)
+        flags = classifier.flag_pair_divergences(pairs)
+        divergent = pairs[flags.any(axis=1).to_numpy()] if not flags.empty else pairs.iloc[:0]
+        if len(divergent):
+            with st.expander(f"Pares com divergência acima do critério ({len(divergent)})"):
+                st.dataframe(divergent, use_container_width=True)
+
+    st.header("📉 Controle Estatístico de Processo (CEP)")
+    spc = SPCMonitor(classifier)
+    with instr.stage("CEP"):
+        spc_result = results_cache.get_or_compute(
+            'spc', (frame_key, settings_fingerprint(spc)), lambda: spc.fit(frame)
+        )
+    display_spc_alarms(spc_result)
+    charted = [p for p, s in spc_result['series'].items() if s]
+    if charted:
+        param = st.selectbox("Parâmetro da carta de controle", charted)
+        with instr.stage("Cartas de controle"):
+            chart, size = results_cache.get_or_compute(
+                'control_chart', (frame_key, settings_fingerprint(spc), viz_key, param),
+                lambda: with_payload(viz.create_control_chart(spc_result, param)),
+            )
+        st.plotly_chart(chart, use_container_width=True)
+        st.caption(f"Tamanho da figura: {size / 1024:.0f} KB")
+
+    st.header("📥 Exportar relatório")
+    exporting = None
+    if job is not None and not job.done:
+        st.caption("A exportação fica disponível ao fim da extração.")
+    else:
+        export_key = (frame_key, settings_fingerprint(analyzer, classifier), ishikawa.knowledge.version)
+        exporting = display_export(
+            export_key, lambda: build_report(frame, dataset, results, classifications, samples, ranking)
+        )
+
+    memo = results_cache.stats()
+    st.sidebar.caption(
+        f"Cache de resultados: {memo['hits']} acertos ({memo['hit_seconds'] * 1000:.1f} ms), "
+        f"{memo['misses']} cálculos ({memo['miss_seconds'] * 1000:.1f} ms); {memo['entries']} itens"
+    )
+    display_diagnostics(instr)
+    if job is not None:
+        follow_extraction(job, seen)
+    if exporting is not None:
+        wait([exporting], timeout=REFRESH_SECONDS)
+        st.rerun()
@@ -0,0 +1,117 @@
+import threading
+
+
+# As bibliotecas de PDF são importadas no primeiro uso: a interface e a CLI sobem sem elas, e os
+# processos de extração as carregam ao iniciar (load_backends)
+def load_backends() -> None:
+    import pdfplumber  # noqa: F401
+    import PyPDF2  # noqa: F401
+
+
+def pypdf2_pages(stream):
+    import PyPDF2
+
+    stream.seek(0)
+    reader = PyPDF2.PdfReader(stream)
+    for page in reader.pages:
+        yield (page.extract_text() or "").lower()
+
+
+def pdfplumber_pages(stream):
+    import pdfplumber
+
+    stream.seek(0)
+    with pdfplumber.open(stream) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text() or ""
+            page.close()
+            yield text.lower()
+
+
+# Nome -> gerador de textos de página (minúsculos). Backends extras devem ser registrados na
+# importação de um módulo, para que também existam nos processos de extração (spawn).
+BACKENDS = {
+    'pypdf2': pypdf2_pages,
+    'pdfplumber': pdfplumber_pages,
+}
+
+# Do mais barato ao mais caro: o PyPDF2 lê o texto bruto, o pdfplumber refaz o layout dos caracteres
+DEFAULT_ORDER = ['pypdf2', 'pdfplumber']
+
+
+def register_backend(name: str, pages, position: int | None = None) -> None:
+    BACKENDS[name] = pages
+    if name in DEFAULT_ORDER:
+        DEFAULT_ORDER.remove(name)
+    DEFAULT_ORDER.insert(len(DEFAULT_ORDER) if position is None else position, name)
+
+
+# Um backend dispensável ainda é tentado em 1 de cada EXPLORE_EVERY laudos, para a taxa de sucesso
+# continuar sendo medida
+EXPLORE_EVERY = 20
+
+
+class BackendStats:
+    # Taxa de sucesso = parâmetros obtidos / parâmetros procurados naquele backend. A ordem passa
+    # a ser pelo custo esperado por parâmetro recuperado depois de min_attempts tentativas de cada.
+    def __init__(self, min_attempts: int = 20, min_success: float = 0.02) -> None:
+        self.min_attempts = min_attempts
+        self.min_success = min_success
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict] = {}
+
+    def record(self, trace: list[dict]) -> None:
+        with self._lock:
+            for step in trace:
+                s = self._stats.setdefault(
+                    step['backend'],
+                    {'attempts': 0, 'seconds': 0.0, 'pages': 0, 'sought': 0, 'found': 0, 'errors': 0, 'params': {}},
+                )
+                s['attempts'] += 1
+                s['seconds'] += step['seconds']
+                s['pages'] += step['pages']
+                s['sought'] += step['sought']
+                s['found'] += step['found']
+                s['errors'] += int(step['error'])
+                # Por parâmetro, só quando ele ainda faltava ao chegar neste backend
+                for param in step.get('missing', ()):
+                    counts = s['params'].setdefault(param, [0, 0])
+                    counts[0] += 1
+                    counts[1] += int(param in step['recovered'])
+
+    def order(self, backends: list[str]) -> list[str]:
+        with self._lock:
+            if any(self._stats.get(b, {}).get('attempts', 0) < self.min_attempts for b in backends):
+                return list(backends)
+            return sorted(backends, key=self._expected_cost)
+
+    def optional(self, backends: list[str]) -> dict[str, list[str]]:
+        # Backend -> parâmetros que ele quase nunca recupera quando ainda faltam (de fato ausentes no
+        # laudo). Com os 3 parâmetros mínimos e só esses faltando, o backend é pulado (salvo na amostragem)
+        with self._lock:
+            out = {}
+            for b in backends:
+                hopeless = sorted(
+                    p for p, (sought, found) in self._stats.get(b, {}).get('params', {}).items()
+                    if sought >= self.min_attempts and found / sought < self.min_success
+                )
+                if hopeless:
+                    out[b] = hopeless
+            return out
+
+    def _expected_cost(self, backend: str) -> float:
+        s = self._stats[backend]
+        success = s['found'] / s['sought'] if s['sought'] else 0.0
+        return (s['seconds'] / s['attempts']) / max(success, 0.01)
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                b: {
+                    **s,
+                    'params': {p: found / sought for p, (sought, found) in s['params'].items()},
+                    'success_rate': s['found'] / s['sought'] if s['sought'] else None,
+                    'mean_seconds': s['seconds'] / s['attempts'] if s['attempts'] else None,
+                }
+                for b, s in self._stats.items()
+            }
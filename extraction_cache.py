@@ -0,0 +1,184 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+DEFAULT_CACHE_DIR = Path(os.environ.get("LAUDOS_CACHE_DIR", Path.home() / ".cache" / "laudos_diesel"))
+DOCUMENTS = """(
+    sha256 TEXT PRIMARY KEY,
+    text TEXT,
+    partial INTEGER NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)"""
+
+
+class ExtractionCache:
+    def __init__(
+        self,
+        cache_dir: str | Path | None = None,
+        max_entries: int = 20000,
+        max_bytes: int = 512 * 1024 * 1024,
+        max_age_days: float = 180.0,
+    ) -> None:
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else DEFAULT_CACHE_DIR
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / "extraction_cache.sqlite3"
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.text_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+        # Uma conexão por base, sempre usada sob self._lock
+        self._conn = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn as conn:
+            conn.executescript(
+                f"""
+                CREATE TABLE IF NOT EXISTS documents {DOCUMENTS};
+                CREATE TABLE IF NOT EXISTS results (
+                    sha256 TEXT NOT NULL,
+                    patterns_version TEXT NOT NULL,
+                    params TEXT,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (sha256, patterns_version)
+                );
+                CREATE INDEX IF NOT EXISTS idx_documents_accessed ON documents (accessed_at);
+                """
+            )
+            # Caches criados antes do texto opcional (text NOT NULL) ou da marcação de texto parcial
+            columns = {row[1]: row for row in conn.execute("PRAGMA table_info(documents)")}
+            if columns['text'][3]:
+                partial = "partial" if 'partial' in columns else "0"
+                conn.executescript(
+                    f"""
+                    BEGIN;
+                    CREATE TABLE documents_novo {DOCUMENTS};
+                    INSERT INTO documents_novo (sha256, text, partial, size, created_at, accessed_at)
+                        SELECT sha256, text, {partial}, size, created_at, accessed_at FROM documents;
+                    DROP TABLE documents;
+                    ALTER TABLE documents_novo RENAME TO documents;
+                    CREATE INDEX idx_documents_accessed ON documents (accessed_at);
+                    COMMIT;
+                    """
+                )
+            elif 'partial' not in columns:
+                conn.execute("ALTER TABLE documents ADD COLUMN partial INTEGER NOT NULL DEFAULT 0")
+
+    def get_result(self, sha256: str, patterns_version: str) -> tuple[bool, dict | None]:
+        with self._lock, self._conn as conn:
+            row = conn.execute(
+                "SELECT params FROM results WHERE sha256 = ? AND patterns_version = ?",
+                (sha256, patterns_version),
+            ).fetchone()
+            if row is None:
+                return False, None
+            conn.execute("UPDATE documents SET accessed_at = ? WHERE sha256 = ?", (time.time(), sha256))
+            self.hits += 1
+        return True, (json.loads(row[0]) if row[0] is not None else None)
+
+    def get_text(self, sha256: str) -> tuple[str | None, bool]:
+        # (texto, parcial): parcial quando a leitura parou antes da última página (parada antecipada)
+        with self._lock, self._conn as conn:
+            row = conn.execute("SELECT text, partial FROM documents WHERE sha256 = ?", (sha256,)).fetchone()
+            if row is None or row[0] is None:
+                self.misses += 1
+                return None, False
+            conn.execute("UPDATE documents SET accessed_at = ? WHERE sha256 = ?", (time.time(), sha256))
+            self.text_hits += 1
+        return row[0], bool(row[1])
+
+    def put(self, sha256: str, patterns_version: str, text: str | None, params: dict | None, partial: bool = False) -> None:
+        # text=None: só o resultado é conhecido (texto combinado de vários backends); "" marca PDF sem
+        # texto extraível. Um texto já guardado só é trocado se era parcial e o novo é integral ou maior
+        now = time.time()
+        size = len(text.encode("utf-8")) if text else 0
+        replace = (
+            "(documents.text IS NULL OR (documents.partial AND excluded.text IS NOT NULL "
+            "AND (NOT excluded.partial OR length(excluded.text) > length(documents.text))))"
+        )
+        with self._lock, self._conn as conn:
+            conn.execute(
+                "INSERT INTO documents (sha256, text, partial, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(sha256) DO UPDATE SET accessed_at = excluded.accessed_at, "
+                f"text = CASE WHEN {replace} THEN excluded.text ELSE documents.text END, "
+                f"partial = CASE WHEN {replace} THEN excluded.partial ELSE documents.partial END, "
+                f"size = CASE WHEN {replace} THEN excluded.size ELSE documents.size END",
+                (sha256, text, int(partial), size, now, now),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO results (sha256, patterns_version, params, created_at) VALUES (?, ?, ?, ?)",
+                (sha256, patterns_version, json.dumps(params) if params is not None else None, now),
+            )
+            self._puts_since_evict += 1
+            if self._puts_since_evict >= 100:
+                self._puts_since_evict = 0
+                self._evict(conn)
+
+    def invalidate(self, sha256: str | None = None, patterns_version: str | None = None) -> int:
+        # Sem argumentos, descarta apenas os resultados parseados e mantém o texto bruto
+        with self._lock, self._conn as conn:
+            if sha256 is not None and patterns_version is None:
+                cur = conn.execute("DELETE FROM results WHERE sha256 = ?", (sha256,))
+                conn.execute("DELETE FROM documents WHERE sha256 = ?", (sha256,))
+            elif sha256 is not None:
+                cur = conn.execute(
+                    "DELETE FROM results WHERE sha256 = ? AND patterns_version = ?", (sha256, patterns_version)
+                )
+            elif patterns_version is not None:
+                cur = conn.execute("DELETE FROM results WHERE patterns_version = ?", (patterns_version,))
+            else:
+                cur = conn.execute("DELETE FROM results")
+            return cur.rowcount
+
+    def clear(self) -> None:
+        with self._lock, self._conn as conn:
+            conn.execute("DELETE FROM results")
+            conn.execute("DELETE FROM documents")
+
+    def evict(self) -> None:
+        with self._lock, self._conn as conn:
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        cutoff = time.time() - self.max_age_days * 86400.0
+        conn.execute("DELETE FROM documents WHERE accessed_at < ?", (cutoff,))
+
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM documents").fetchone()
+        if count > self.max_entries or total > self.max_bytes:
+            excess_rows = max(0, count - self.max_entries)
+            excess_bytes = max(0, total - self.max_bytes)
+            victims = []
+            freed = 0
+            for sha, size in conn.execute("SELECT sha256, size FROM documents ORDER BY accessed_at ASC"):
+                if len(victims) >= excess_rows and freed >= excess_bytes:
+                    break
+                victims.append((sha,))
+                freed += size
+            conn.executemany("DELETE FROM documents WHERE sha256 = ?", victims)
+
+        conn.execute("DELETE FROM results WHERE sha256 NOT IN (SELECT sha256 FROM documents)")
+
+    def stats(self) -> dict:
+        with self._lock, self._conn as conn:
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM documents").fetchone()
+        lookups = self.hits + self.text_hits + self.misses
+        return {
+            'hits': self.hits,
+            'text_hits': self.text_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.text_hits) / lookups if lookups else 0.0,
+            'entries': int(count),
+            'bytes': int(total),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
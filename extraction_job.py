@@ -0,0 +1,104 @@
+import threading
+import time
+from concurrent.futures import Executor
+from io import BytesIO
+
+from pdf_extractor import PDFExtractor
+
+
+class ExtractionJob:
+    # Extração de um envio em segundo plano; a interface lê o progresso e os laudos já prontos a
+    # cada redesenho, sem esperar o lote inteiro
+    def __init__(self, extractor: PDFExtractor, files: list, origins: list[str], executor: Executor | None = None) -> None:
+        self.extractor = extractor
+        # Pool já aquecido compartilhado entre envios; sem ele, iter_extract cria um por lote
+        self.executor = executor
+        self.origins = list(origins)
+        self.names = [getattr(f, 'name', None) for f in files]
+        # Cópia dos bytes: o UploadedFile pertence à execução do script que o recebeu
+        self._files = []
+        for f, name in zip(files, self.names):
+            buf = BytesIO(f.getvalue())
+            buf.name = name
+            self._files.append(buf)
+        self.reports: list[dict | None] = [None] * len(files)
+        self.completed = 0
+        self.error: str | None = None
+        self.started = time.perf_counter()
+        self.seconds: float | None = None
+        self._cond = threading.Condition()
+        self._cancelled = False
+        self._thread = threading.Thread(target=self._run, name="extracao-laudos", daemon=True)
+
+    def start(self) -> "ExtractionJob":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        reports = self.extractor.iter_extract(self._files, executor=self.executor, cancelled=lambda: self._cancelled)
+        try:
+            for i, report in reports:
+                with self._cond:
+                    self.reports[i] = report
+                    self.completed += 1
+                    self._cond.notify_all()
+                    if self._cancelled:
+                        break
+        except Exception as exc:
+            self.error = f"{type(exc).__name__}: {exc}"
+        finally:
+            reports.close()
+            self._files = []
+            with self._cond:
+                self.seconds = time.perf_counter() - self.started
+                self._cond.notify_all()
+
+    @property
+    def done(self) -> bool:
+        return self.seconds is not None
+
+    @property
+    def total(self) -> int:
+        return len(self.reports)
+
+    def elapsed(self) -> float:
+        return self.seconds if self.seconds is not None else time.perf_counter() - self.started
+
+    def cancel(self) -> None:
+        with self._cond:
+            self._cancelled = True
+
+    def wait(self, seen: int, interval: float, max_wait: float = 30.0) -> None:
+        # Redesenho limitado: volta logo se o lote terminar; senão, depois de interval segundos e só
+        # quando houver laudos além dos seen já exibidos (ou após max_wait, para a interface não travar)
+        with self._cond:
+            if self._cond.wait_for(lambda: self.done, interval):
+                return
+            self._cond.wait_for(lambda: self.done or self.completed > seen, max_wait - interval)
+
+    def snapshot(self) -> tuple[list[dict], list[str]]:
+        with self._cond:
+            ready = [(r, o) for r, o in zip(self.reports, self.origins) if r is not None]
+        return [r for r, _ in ready], [o for _, o in ready]
+
+    def status_table(self) -> list[dict]:
+        with self._cond:
+            reports = list(self.reports)
+        rows = []
+        for name, origin, r in zip(self.names, self.origins, reports):
+            if r is None:
+                status = "Na fila"
+            elif r['error']:
+                status = f"Erro: {r['error']}"
+            elif r['data']:
+                status = "Extraído" + (" (cache)" if r['backend'] and r['backend'].startswith('cache') else "")
+            else:
+                status = f"Rejeitado: {r['rejection']}"
+            rows.append({
+                'Arquivo': name,
+                'Origem': origin,
+                'Situação': status,
+                'Parâmetros': len(r['data'] or {}) if r is not None else None,
+                'Tempo (ms)': round(r['seconds'] * 1000, 1) if r is not None else None,
+            })
+        return rows
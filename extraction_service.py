@@ -0,0 +1,252 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import CancelledError, Executor, Future, InvalidStateError
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from pdf_extractor import PDFExtractor
+
+
+class _Task:
+    def __init__(self, key, session: str, fn, args: tuple) -> None:
+        self.key = key
+        self.session = session
+        self.fn = fn
+        self.args = args
+        self.waiters: list[Future] = []
+        self.created = time.perf_counter()
+        self.started: float | None = None
+        self.generation = -1
+        self.attempts = 0
+
+
+class ExtractionService:
+    # Um pool de extração por servidor, atrás de uma fila local por sessão. Pedidos do mesmo conteúdo
+    # (mesma chave) enquanto o primeiro ainda está na fila ou em execução viram um único trabalho; a
+    # fila é servida em rodízio entre as sessões e só max_running trabalhos ficam no pool por vez.
+    # Uma sessão com max_pending trabalhos na fila espera para enviar mais (as outras não); o extrator
+    # envia em janelas desse tamanho e lê os resultados entre elas.
+    def __init__(
+        self,
+        workers: int | None = None,
+        max_pending: int = 64,
+        max_running: int | None = None,
+        history: int = 1_000,
+        pool_factory=None,
+    ) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self._pool_factory = pool_factory or (lambda n: PDFExtractor.create_pool(n, warm=True))
+        self._pool = self._pool_factory(self.workers)
+        self.max_pending = max_pending
+        # Um trabalho extra por worker: o próximo PDF já está no pool quando um termina
+        self.max_running = max_running or 2 * self.workers
+        self._cond = threading.Condition()
+        self._queues: OrderedDict[str, deque[_Task]] = OrderedDict()
+        self._inflight: dict = {}
+        # Trabalhos que estavam no pool quando ele quebrou: refeitos um por vez, sozinhos no pool, para
+        # que só o PDF que derruba o worker falhe
+        self._retry: deque[_Task] = deque()
+        self._isolated = False
+        self._running = 0
+        self._generation = 0
+        self._closed = False
+        self._counts = {'submitted': 0, 'deduplicated': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'pool_restarts': 0}
+        self._waits: deque[float] = deque(maxlen=history)
+        self._runs: deque[float] = deque(maxlen=history)
+        self._thread = threading.Thread(target=self._dispatch, name="servico-extracao", daemon=True)
+        self._thread.start()
+
+    def session(self, session_id: str) -> "ServiceSession":
+        return ServiceSession(self, session_id)
+
+    def submit(self, session_id: str, key, fn, *args) -> Future:
+        # key None: trabalho sem deduplicação
+        waiter = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Serviço de extração encerrado")
+            self._counts['submitted'] += 1
+            task = self._inflight.get(key) if key is not None else None
+            if task is not None:
+                self._counts['deduplicated'] += 1
+            else:
+                # Contrapressão por sessão: o envio espera até a própria fila ter espaço
+                self._cond.wait_for(lambda: self._closed or self._queued(session_id) < self.max_pending)
+                if self._closed:
+                    raise RuntimeError("Serviço de extração encerrado")
+                task = _Task(key, session_id, fn, args)
+                if key is not None:
+                    self._inflight[key] = task
+                self._queues.setdefault(session_id, deque()).append(task)
+                self._cond.notify_all()
+            task.waiters.append(waiter)
+        waiter.add_done_callback(lambda f: f.cancelled() and self._detach(task, f))
+        return waiter
+
+    def _queued(self, session_id: str) -> int:
+        queue = self._queues.get(session_id)
+        return len(queue) if queue else 0
+
+    def _detach(self, task: _Task, waiter: Future) -> None:
+        # Cancelado por uma sessão: o trabalho só sai da fila se ninguém mais espera por ele
+        with self._cond:
+            self._counts['cancelled'] += 1
+            if waiter in task.waiters:
+                task.waiters.remove(waiter)
+            if task.waiters or task.started is not None:
+                return
+            if task in self._retry:
+                self._retry.remove(task)
+            queue = self._queues.get(task.session)
+            if queue is not None and task in queue:
+                queue.remove(task)
+                if not queue:
+                    del self._queues[task.session]
+            if task.key is not None and self._inflight.get(task.key) is task:
+                del self._inflight[task.key]
+            self._cond.notify_all()
+
+    def _next(self) -> _Task | None:
+        # Rodízio: um trabalho da primeira sessão com fila, que passa para o fim da vez
+        for session_id in self._queues:
+            queue = self._queues[session_id]
+            task = queue.popleft()
+            if queue:
+                self._queues.move_to_end(session_id)
+            else:
+                del self._queues[session_id]
+            return task
+        return None
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(self._can_dispatch)
+                if self._closed:
+                    return
+                if self._retry:
+                    task = self._retry.popleft()
+                    self._isolated = True
+                else:
+                    task = self._next()
+                task.started = time.perf_counter()
+                task.generation = self._generation
+                self._running += 1
+                pool = self._pool
+                self._cond.notify_all()
+            try:
+                future = pool.submit(task.fn, *task.args)
+            except (BrokenProcessPool, RuntimeError) as exc:
+                future = Future()
+                future.set_exception(BrokenProcessPool(str(exc)))
+            future.add_done_callback(lambda f, task=task: self._finished(task, f))
+
+    def _can_dispatch(self) -> bool:
+        if self._closed:
+            return True
+        if self._retry:
+            return self._running == 0
+        return bool(self._queues) and not self._isolated and self._running < self.max_running
+
+    def _finished(self, task: _Task, future: Future) -> None:
+        error = CancelledError() if future.cancelled() else future.exception()
+        with self._cond:
+            self._running -= 1
+            if task.attempts:
+                self._isolated = False
+            if isinstance(error, BrokenProcessPool):
+                # Worker morto (PDF que derruba o processo, falta de memória): pool novo e, para quem
+                # ainda não teve, uma nova tentativa
+                self._restart(task.generation)
+            if isinstance(error, BrokenProcessPool) and task.attempts == 0 and task.waiters and not self._closed:
+                task.attempts += 1
+                task.started = None
+                self._retry.append(task)
+                self._cond.notify_all()
+                return
+            if task.key is not None and self._inflight.get(task.key) is task:
+                del self._inflight[task.key]
+            now = time.perf_counter()
+            self._waits.append(task.started - task.created)
+            self._runs.append(now - task.started)
+            self._counts['failed' if error is not None else 'completed'] += 1
+            waiters = list(task.waiters)
+            self._cond.notify_all()
+        for waiter in waiters:
+            try:
+                if error is not None:
+                    waiter.set_exception(error)
+                else:
+                    waiter.set_result(future.result())
+            except InvalidStateError:
+                pass
+
+    def _restart(self, generation: int) -> None:
+        # Vários trabalhos falham juntos quando o pool quebra; só o primeiro troca o pool
+        if generation != self._generation or self._closed:
+            return
+        old = self._pool
+        self._pool = self._pool_factory(self.workers)
+        self._generation += 1
+        self._counts['pool_restarts'] += 1
+        old.shutdown(wait=False)
+
+    def metrics(self) -> dict:
+        with self._cond:
+            waits = sorted(self._waits)
+            runs = sorted(self._runs)
+            return {
+                'workers': self.workers,
+                'queued': sum(len(q) for q in self._queues.values()) + len(self._retry),
+                'running': self._running,
+                'sessions_waiting': len(self._queues),
+                **self._counts,
+                'wait_p50': _quantile(waits, 0.5),
+                'wait_p95': _quantile(waits, 0.95),
+                'run_p50': _quantile(runs, 0.5),
+                'run_p95': _quantile(runs, 0.95),
+            }
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            pending = [t for q in self._queues.values() for t in q] + list(self._retry)
+            self._queues.clear()
+            self._retry.clear()
+            self._inflight.clear()
+            self._cond.notify_all()
+        for task in pending:
+            for waiter in task.waiters:
+                waiter.cancel()
+        self._thread.join()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+class ServiceSession(Executor):
+    # Visão de uma sessão sobre o serviço, usada pelo extrator no lugar de um pool próprio
+    def __init__(self, service: ExtractionService, session_id: str) -> None:
+        self.service = service
+        self.session_id = session_id
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        return self.service.submit(self.session_id, None, partial(fn, **kwargs) if kwargs else fn, *args)
+
+    @property
+    def max_pending(self) -> int:
+        # Janela de envio do extrator: até aqui o submit da sessão não bloqueia
+        return self.service.max_pending
+
+    def submit_keyed(self, key, fn, *args) -> Future:
+        return self.service.submit(self.session_id, key, fn, *args)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        # O pool é do servidor; uma sessão não o encerra
+        pass
+
+
+def _quantile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(q * len(values)))]
@@ -0,0 +1,310 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+
+ORIGINS = ['Mineradora', 'Distribuidora']
+# Shapiro-Wilk (como em StatisticalAnalyzer) até o limite de validade do algoritmo de Royston;
+# acima dele, D'Agostino-Pearson
+SHAPIRO_MAX_N = 5000
+
+
+def grouped_comparison(
+    df: pd.DataFrame,
+    by: str | list[str],
+    params: list[str],
+    alpha: float = 0.05,
+    confidence: float = 0.95,
+) -> pd.DataFrame:
+    by = [by] if isinstance(by, str) else list(by)
+    params = [p for p in params if p in df.columns]
+    long = df.melt(id_vars=by + ['origem'], value_vars=params, var_name='parametro', value_name='valor')
+    # Laudos sem lote ou período (metadados não encontrados no PDF) ficam fora de todos os grupos,
+    # como no groupby do pandas
+    long = long[long['origem'].isin(ORIGINS) & long['valor'].notna() & long[by].notna().all(axis=1)]
+
+    keys = by + ['parametro']
+    g, uniques = _factorize_keys(long, keys)
+    n_groups = len(uniques)
+    x = long['valor'].to_numpy(dtype=np.float64)
+    o = (long['origem'].to_numpy() == 'Distribuidora').astype(np.int64)
+    cell = g * 2 + o
+    n_cells = 2 * n_groups
+
+    # Momentos por célula (grupo x origem) com bincount: uma passada por potência
+    n = np.bincount(cell, minlength=n_cells).astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.bincount(cell, weights=x, minlength=n_cells) / n
+        dev = x - mean[cell]
+        m2 = np.bincount(cell, weights=dev ** 2, minlength=n_cells)
+        m3 = np.bincount(cell, weights=dev ** 3, minlength=n_cells)
+        m4 = np.bincount(cell, weights=dev ** 4, minlength=n_cells)
+        var = m2 / (n - 1)
+        std = np.sqrt(var)
+
+    order = np.lexsort((x, cell))
+    xs = x[order]
+    start = np.concatenate([[0], np.cumsum(n)[:-1]]).astype(np.int64)
+    cnt = n.astype(np.int64)
+    has = cnt > 0
+    median = np.full(n_cells, np.nan)
+    lo = start[has] + (cnt[has] - 1) // 2
+    hi = start[has] + cnt[has] // 2
+    median[has] = (xs[lo] + xs[hi]) / 2.0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        h = np.sqrt(var / n) * stats.t.ppf((1 + confidence) / 2.0, n - 1)
+    ci_low, ci_high = mean - h, mean + h
+
+    norm_p = _normality_p(xs, start, cnt, m2, m3, m4)
+    is_normal = norm_p > alpha
+
+    n1, n2 = n[0::2], n[1::2]
+    mean1, mean2 = mean[0::2], mean[1::2]
+    var1, var2 = var[0::2], var[1::2]
+    sufficient = (n1 >= 2) & (n2 >= 2)
+
+    levene_p = _levene_p(x, g, cell, median, n, n_groups)
+    t_stat, t_p, equal_var = _t_tests(n1, n2, mean1, mean2, var1, var2, levene_p, alpha)
+    u_stat, u_p = _mann_whitney(x, g, o, n1, n2, n_groups)
+
+    use_t = is_normal[0::2] & is_normal[1::2]
+    statistic = np.where(use_t, t_stat, u_stat)
+    p_value = np.where(use_t, t_p, u_p)
+    test_used = np.where(
+        use_t,
+        np.where(equal_var, 'Teste t (variâncias iguais)', 'Teste t (variâncias diferentes)'),
+        'Mann-Whitney U',
+    ).astype(object)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pooled = np.sqrt(((n1 - 1) * var1 + (n2 - 1) * var2) / (n1 + n2 - 2))
+        effect = np.where(pooled == 0, np.nan, (mean1 - mean2) / pooled)
+
+    statistic[~sufficient] = np.nan
+    p_value[~sufficient] = np.nan
+    effect[~sufficient] = np.nan
+    test_used[~sufficient] = 'Dados insuficientes'
+
+    # Correção de Benjamini-Hochberg sobre todos os grupos e parâmetros de uma vez
+    p_adjusted = np.full(n_groups, np.nan)
+    valid = np.isfinite(p_value)
+    if valid.any():
+        p_adjusted[valid] = stats.false_discovery_control(p_value[valid], method='bh')
+
+    out = uniques
+    out['n_mineradora'] = n1.astype(np.int64)
+    out['n_distribuidora'] = n2.astype(np.int64)
+    out['mean_mineradora'] = mean1
+    out['mean_distribuidora'] = mean2
+    out['median_mineradora'] = median[0::2]
+    out['median_distribuidora'] = median[1::2]
+    out['std_mineradora'] = std[0::2]
+    out['std_distribuidora'] = std[1::2]
+    out['ci_low_mineradora'] = ci_low[0::2]
+    out['ci_high_mineradora'] = ci_high[0::2]
+    out['ci_low_distribuidora'] = ci_low[1::2]
+    out['ci_high_distribuidora'] = ci_high[1::2]
+    out['normality_p_mineradora'] = norm_p[0::2]
+    out['normality_p_distribuidora'] = norm_p[1::2]
+    out['test_used'] = test_used
+    out['statistic'] = statistic
+    out['p_value'] = p_value
+    out['p_adjusted'] = p_adjusted
+    out['reject_h0'] = p_adjusted < alpha
+    out['effect_size'] = effect
+    return out
+
+
+def _factorize_keys(long: pd.DataFrame, keys: list[str]) -> tuple[np.ndarray, pd.DataFrame]:
+    # Códigos por coluna combinados em um único inteiro: evita materializar tuplas de chaves
+    codes, levels = [], []
+    for k in keys:
+        c, u = pd.factorize(long[k], sort=True)
+        codes.append(c.astype(np.int64))
+        levels.append(u)
+    combined = np.ravel_multi_index(codes, [len(u) for u in levels]) if codes else np.zeros(len(long), dtype=np.int64)
+    present, g = np.unique(combined, return_inverse=True)
+    parts = np.unravel_index(present, [len(u) for u in levels])
+    uniques = pd.DataFrame({k: u.take(p) for k, u, p in zip(keys, levels, parts)})
+    return g.astype(np.int64), uniques
+
+
+def _normality_p(xs, start, cnt, m2, m3, m4) -> np.ndarray:
+    p = np.full(len(cnt), np.nan)
+
+    big = cnt > SHAPIRO_MAX_N
+    if big.any():
+        nb = cnt[big].astype(np.float64)
+        p[big] = stats.chi2.sf(dagostino_k2(nb, m2[big] / nb, m3[big] / nb, m4[big] / nb), 2)
+
+    # Os coeficientes de Shapiro-Wilk dependem só de n: células do mesmo tamanho viram uma matriz
+    sized = (cnt >= 3) & ~big
+    for size in np.unique(cnt[sized]):
+        cells = np.flatnonzero(sized & (cnt == size))
+        block = xs[start[cells][:, None] + np.arange(size)]
+        p[cells] = _shapiro_p(block, m2[cells])
+    return p
+
+
+def _shapiro_p(block: np.ndarray, ssq: np.ndarray) -> np.ndarray:
+    # Shapiro-Wilk pelo algoritmo AS R94 (Royston, 1995), o mesmo usado por scipy.stats.shapiro;
+    # cada linha de block é uma amostra ordenada
+    n = block.shape[1]
+    half = n // 2
+    if n == 3:
+        a = np.array([np.sqrt(0.5)])
+    else:
+        m = stats.norm.ppf((np.arange(1, half + 1) - 0.375) / (n + 0.25))
+        summ2 = 2.0 * np.sum(m ** 2)
+        ssumm2 = np.sqrt(summ2)
+        rsn = 1.0 / np.sqrt(n)
+        a = -m / ssumm2
+        a[0] = _poly([0.0, 0.221157, -0.147981, -2.07119, 4.434685, -2.706056], rsn) - m[0] / ssumm2
+        if n > 5:
+            a[1] = -m[1] / ssumm2 + _poly([0.0, 0.042981, -0.293762, -1.752461, 5.682633, -3.582633], rsn)
+            fac = np.sqrt((summ2 - 2.0 * m[0] ** 2 - 2.0 * m[1] ** 2) / (1.0 - 2.0 * a[0] ** 2 - 2.0 * a[1] ** 2))
+            a[2:] = -m[2:] / fac
+        else:
+            fac = np.sqrt((summ2 - 2.0 * m[0] ** 2) / (1.0 - 2.0 * a[0] ** 2))
+            a[1:] = -m[1:] / fac
+
+    spread = block[:, ::-1][:, :half] - block[:, :half]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w = np.minimum((spread @ a) ** 2 / ssq, 1.0)
+
+    if n == 3:
+        return np.clip(6.0 / np.pi * (np.arcsin(np.sqrt(w)) - np.pi / 3.0), 0.0, 1.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = np.log1p(-w)
+        if n <= 11:
+            gamma = _poly([-2.273, 0.459], n)
+            out_of_range = y >= gamma
+            y = -np.log(gamma - y)
+            mu = _poly([0.544, -0.39978, 0.025054, -6.714e-4], n)
+            sigma = np.exp(_poly([1.3822, -0.77857, 0.062767, -0.0020322], n))
+            p = stats.norm.sf(y, mu, sigma)
+            p[out_of_range] = 1e-99
+            return p
+        ln = np.log(n)
+        mu = _poly([-1.5861, -0.31082, -0.083751, 0.0038915], ln)
+        sigma = np.exp(_poly([-0.4803, -0.082676, 0.0030302], ln))
+        return stats.norm.sf(y, mu, sigma)
+
+
+def _poly(coefs: list[float], x: float) -> float:
+    return float(np.polynomial.polynomial.polyval(x, coefs))
+
+
+def dagostino_k2(n, m2, m3, m4) -> np.ndarray:
+    # Estatística K² de D'Agostino-Pearson (qui-quadrado com 2 graus de liberdade) a partir dos momentos
+    # centrais; mesmas fórmulas de scipy.stats.skewtest / kurtosistest / normaltest, aplicadas a vetores
+    with np.errstate(divide='ignore', invalid='ignore'):
+        b2 = m3 / m2 ** 1.5
+        y = b2 * np.sqrt(((n + 1) * (n + 3)) / (6.0 * (n - 2)))
+        beta2 = (3.0 * (n * n + 27 * n - 70) * (n + 1) * (n + 3) / ((n - 2.0) * (n + 5) * (n + 7) * (n + 9)))
+        w2 = -1 + np.sqrt(2 * (beta2 - 1))
+        delta = 1 / np.sqrt(0.5 * np.log(w2))
+        alpha = np.sqrt(2.0 / (w2 - 1))
+        y = np.where(y == 0, 1, y)
+        z_skew = delta * np.log(y / alpha + np.sqrt((y / alpha) ** 2 + 1))
+
+        b2k = m4 / m2 ** 2
+        e = 3.0 * (n - 1) / (n + 1)
+        varb2 = 24.0 * n * (n - 2) * (n - 3) / ((n + 1) * (n + 1.0) * (n + 3) * (n + 5))
+        xk = (b2k - e) / np.sqrt(varb2)
+        sqrtbeta1 = 6.0 * (n * n - 5 * n + 2) / ((n + 7) * (n + 9.0)) * np.sqrt((6.0 * (n + 3) * (n + 5)) / (n * (n - 2) * (n - 3)))
+        a = 6.0 + 8.0 / sqrtbeta1 * (2.0 / sqrtbeta1 + np.sqrt(1 + 4.0 / (sqrtbeta1 ** 2)))
+        term1 = 1 - 2 / (9.0 * a)
+        denom = 1 + xk * np.sqrt(2 / (a - 4.0))
+        term2 = np.sign(denom) * np.where(denom == 0.0, np.nan, np.power((1 - 2.0 / a) / np.abs(denom), 1 / 3.0))
+        z_kurt = (term1 - term2) / np.sqrt(2 / (9.0 * a))
+    return z_skew ** 2 + z_kurt ** 2
+
+
+def _levene_p(x, g, cell, median, n, n_groups) -> np.ndarray:
+    # Levene centrado na mediana (padrão do scipy) com k = 2 origens por grupo
+    z = np.abs(x - median[cell])
+    n_cells = 2 * n_groups
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_cell = np.bincount(cell, weights=z, minlength=n_cells) / n
+        n_group = n[0::2] + n[1::2]
+        z_group = np.bincount(g, weights=z, minlength=n_groups) / n_group
+        between = n * (z_cell - np.repeat(z_group, 2)) ** 2
+        between = between[0::2] + between[1::2]
+        within = np.bincount(g, weights=(z - z_cell[cell]) ** 2, minlength=n_groups)
+        w = (n_group - 2) * between / within
+        return stats.f.sf(w, 1, n_group - 2)
+
+
+def _t_tests(n1, n2, mean1, mean2, var1, var2, levene_p, alpha):
+    equal_var = levene_p > alpha
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df_pooled = n1 + n2 - 2
+        sp2 = ((n1 - 1) * var1 + (n2 - 1) * var2) / df_pooled
+        se_pooled = np.sqrt(sp2 * (1.0 / n1 + 1.0 / n2))
+
+        v1, v2 = var1 / n1, var2 / n2
+        se_welch = np.sqrt(v1 + v2)
+        df_welch = (v1 + v2) ** 2 / (v1 ** 2 / (n1 - 1) + v2 ** 2 / (n2 - 1))
+
+        se = np.where(equal_var, se_pooled, se_welch)
+        dof = np.where(equal_var, df_pooled, df_welch)
+        t = (mean1 - mean2) / se
+        p = 2 * stats.t.sf(np.abs(t), dof)
+    return t, p, equal_var
+
+
+def _mann_whitney(x, g, o, n1, n2, n_groups):
+    # Postos médios dentro de cada grupo com uma única ordenação (grupo, valor)
+    order = np.lexsort((x, g))
+    xs, gs, os_ = x[order], g[order], o[order]
+    size = len(xs)
+    new_run = np.ones(size, dtype=bool)
+    new_run[1:] = (xs[1:] != xs[:-1]) | (gs[1:] != gs[:-1])
+    run = np.cumsum(new_run) - 1
+    run_len = np.bincount(run).astype(np.float64)
+    run_first = np.flatnonzero(new_run)
+
+    group_start = np.concatenate([[0], np.cumsum(n1 + n2)[:-1]])
+    pos = np.arange(size, dtype=np.float64) - group_start[gs] + 1
+    run_rank = pos[run_first] + (run_len - 1) / 2.0
+    ranks = run_rank[run]
+
+    r1 = np.bincount(gs, weights=ranks * (os_ == 0), minlength=n_groups)
+    u1 = r1 - n1 * (n1 + 1) / 2
+    u = np.maximum(u1, n1 * n2 - u1)
+    tie_term = np.bincount(gs[run_first], weights=run_len ** 3 - run_len, minlength=n_groups)
+    ntot = n1 + n2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.sqrt(n1 * n2 / 12 * ((ntot + 1) - tie_term / (ntot * (ntot - 1))))
+        z = (u - n1 * n2 / 2 - 0.5) / s
+    p = np.clip(2 * stats.norm.sf(z), 0, 1)
+
+    # Grupos pequenos e sem empates: p exato, como o método 'auto' do scipy. A distribuição
+    # exata de U depende só de (n1, n2) e é calculada uma vez por par de tamanhos
+    exact = ~((n1 > 8) & (n2 > 8)) & (tie_term == 0) & (n1 > 0) & (n2 > 0)
+    if exact.any():
+        pairs = np.stack([n1[exact], n2[exact]], axis=1).astype(np.int64)
+        idx = np.flatnonzero(exact)
+        for a, b in np.unique(pairs, axis=0):
+            sel = idx[(pairs[:, 0] == a) & (pairs[:, 1] == b)]
+            sf = _mwu_exact_sf(int(a), int(b))
+            p[sel] = np.clip(2 * sf[u[sel].astype(np.int64)], 0, 1)
+    return u1, p
+
+
+def _mwu_exact_sf(n1: int, n2: int) -> np.ndarray:
+    # P(U >= k) a partir dos coeficientes do binomial gaussiano [n1 + n2, n1]_q
+    k, m = min(n1, n2), max(n1, n2)
+    poly = np.zeros(k * m + 1)
+    poly[0] = 1.0
+    for i in range(1, k + 1):
+        shifted = poly.copy()
+        shifted[m + i:] -= poly[:len(poly) - (m + i)]
+        # divisão por (1 - q^i): soma acumulada com passo i
+        for r in range(i):
+            shifted[r::i] = np.cumsum(shifted[r::i])
+        poly = shifted
+    pmf = poly / poly.sum()
+    return np.cumsum(pmf[::-1])[::-1]
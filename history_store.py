@@ -0,0 +1,187 @@
+import re
+import sqlite3
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from extraction_cache import DEFAULT_CACHE_DIR
+from lab_dataset import ORIGINS, LabDataset
+
+
+_COLUMN = re.compile(r'^[a-z_][a-z0-9_]*$')
+METADATA = ['arquivo', 'data_amostra', 'lote', 'amostra', 'nota_fiscal', 'laboratorio']
+
+
+class HistoryStore:
+    # Um laudo por (hash do PDF, origem); um parâmetro por coluna, para a consulta já sair colunar
+    def __init__(self, db_path: str | Path | None = None) -> None:
+        self.db_path = Path(db_path) if db_path is not None else DEFAULT_CACHE_DIR / "historico.sqlite3"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Uma conexão por base, sempre usada sob self._lock
+        self._conn = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS laudos (
+                    sha256 TEXT NOT NULL,
+                    origem TEXT NOT NULL,
+                    arquivo TEXT,
+                    data_amostra TEXT,
+                    lote TEXT,
+                    amostra TEXT,
+                    nota_fiscal TEXT,
+                    laboratorio TEXT,
+                    inserted_at REAL NOT NULL,
+                    PRIMARY KEY (sha256, origem)
+                );
+                CREATE INDEX IF NOT EXISTS idx_laudos_origem_data ON laudos (origem, data_amostra);
+                CREATE INDEX IF NOT EXISTS idx_laudos_data ON laudos (data_amostra);
+                CREATE INDEX IF NOT EXISTS idx_laudos_lote ON laudos (lote);
+                """
+            )
+            # Bases criadas antes da captura de amostra e nota fiscal
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(laudos)")}
+            for column in METADATA:
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE laudos ADD COLUMN {column} TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_laudos_nota_fiscal ON laudos (nota_fiscal)")
+            self.params = self._param_columns(conn)
+
+    @staticmethod
+    def _param_columns(conn: sqlite3.Connection) -> list[str]:
+        fixed = {'sha256', 'origem', 'inserted_at', *METADATA}
+        return [row[1] for row in conn.execute("PRAGMA table_info(laudos)") if row[1] not in fixed]
+
+    def add_reports(self, reports: list[dict], origins: list[str]) -> int:
+        records = [
+            {'sha256': r['sha256'], 'origem': origin, 'arquivo': r['name'], **(r.get('metadata') or {}), **r['data']}
+            for r, origin in zip(reports, origins)
+            if r['data'] and r.get('sha256')
+        ]
+        return self.add_many(records)
+
+    def add_many(self, records: list[dict]) -> int:
+        if not records:
+            return 0
+        meta = ['sha256', 'origem'] + METADATA
+        with self._lock, self._conn as conn:
+            known = set(self.params)
+            new = [k for k in dict.fromkeys(k for r in records for k in r) if k not in meta and k not in known]
+            for param in new:
+                if not _COLUMN.match(param):
+                    raise ValueError(f"Nome de parâmetro inválido: {param!r}")
+                conn.execute(f"ALTER TABLE laudos ADD COLUMN {param} REAL")
+            self.params = self._param_columns(conn)
+            columns = meta + self.params
+            # Reimportar o mesmo laudo atualiza os valores sem apagar metadados já conhecidos
+            updates = "".join(f", {c} = excluded.{c}" for c in self.params)
+            sql = (
+                f"INSERT INTO laudos ({', '.join(columns)}, inserted_at) VALUES ({', '.join('?' * (len(columns) + 1))}) "
+                f"ON CONFLICT(sha256, origem) DO UPDATE SET "
+                + ", ".join(f"{c} = COALESCE(excluded.{c}, laudos.{c})" for c in METADATA)
+                + updates
+            )
+            now = time.time()
+            conn.executemany(sql, [tuple(r.get(c) for c in columns) + (now,) for r in records])
+        return len(records)
+
+    def _where(
+        self,
+        origins: list[str] | None,
+        start: str | date | None,
+        end: str | date | None,
+        lots: list[str] | None,
+        lab: str | None,
+    ) -> tuple[str, list]:
+        clauses, args = [], []
+        if origins:
+            clauses.append(f"origem IN ({', '.join('?' * len(origins))})")
+            args.extend(origins)
+        if start is not None:
+            clauses.append("data_amostra >= ?")
+            args.append(str(start))
+        if end is not None:
+            clauses.append("data_amostra <= ?")
+            args.append(str(end))
+        if lots:
+            clauses.append(f"lote IN ({', '.join('?' * len(lots))})")
+            args.extend(lots)
+        if lab is not None:
+            clauses.append("laboratorio = ?")
+            args.append(lab)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), args
+
+    def query(
+        self,
+        origins: list[str] | None = None,
+        start: str | date | None = None,
+        end: str | date | None = None,
+        lots: list[str] | None = None,
+        lab: str | None = None,
+    ) -> LabDataset:
+        # Monta o LabDataset direto das linhas do SQLite, sem DataFrame intermediário
+        where, args = self._where(None, start, end, lots, lab)
+        params = list(self.params)
+        arrays: dict[str, dict[str, np.ndarray]] = {}
+        counts = []
+        with self._lock, self._conn as conn:
+            if not params:
+                return LabDataset({}, [], pd.Categorical([]))
+            by_origin = f"{where} AND origem = ?" if where else " WHERE origem = ?"
+            for origin in origins or ORIGINS:
+                rows = conn.execute(f"SELECT {', '.join(params)} FROM laudos{by_origin}", args + [origin]).fetchall()
+                block = np.array(rows, dtype=np.float64).reshape(len(rows), len(params))
+                arrays[origin] = {
+                    p: np.ascontiguousarray(block[:, j][~np.isnan(block[:, j])]) for j, p in enumerate(params)
+                }
+                counts.append(len(rows))
+        codes = np.repeat(np.arange(len(counts), dtype=np.int8), counts)
+        origem = pd.Categorical.from_codes(codes, categories=list(arrays))
+        return LabDataset(arrays, params, origem)
+
+    def frame(
+        self,
+        origins: list[str] | None = None,
+        start: str | date | None = None,
+        end: str | date | None = None,
+        lots: list[str] | None = None,
+        lab: str | None = None,
+    ) -> pd.DataFrame:
+        where, args = self._where(origins, start, end, lots, lab)
+        columns = ['origem'] + METADATA + self.params
+        with self._lock, self._conn as conn:
+            return pd.read_sql_query(
+                f"SELECT {', '.join(columns)} FROM laudos{where} ORDER BY data_amostra, origem", conn, params=args
+            )
+
+    def filters(self) -> dict:
+        # Valores disponíveis para os filtros da interface
+        with self._lock, self._conn as conn:
+            first, last = conn.execute("SELECT MIN(data_amostra), MAX(data_amostra) FROM laudos").fetchone()
+            return {
+                'start': first,
+                'end': last,
+                'lots': [r[0] for r in conn.execute("SELECT DISTINCT lote FROM laudos WHERE lote IS NOT NULL ORDER BY lote")],
+                'labs': [r[0] for r in conn.execute(
+                    "SELECT DISTINCT laboratorio FROM laudos WHERE laboratorio IS NOT NULL ORDER BY laboratorio"
+                )],
+            }
+
+    def stats(self) -> dict:
+        with self._lock, self._conn as conn:
+            counts = dict(conn.execute("SELECT origem, COUNT(*) FROM laudos GROUP BY origem").fetchall())
+        return {'entries': sum(counts.values()), 'by_origin': counts}
+
+    def clear(self) -> None:
+        with self._lock, self._conn as conn:
+            conn.execute("DELETE FROM laudos")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+# Pico de memória por etapa só sob demanda (LAUDOS_TRACE_MEMORY=1): o tracemalloc encarece toda
+# alocação do processo, inclusive as das outras sessões do servidor
+TRACE_MEMORY = os.environ.get("LAUDOS_TRACE_MEMORY", "") not in ("", "0")
+
+# tracemalloc é global ao processo: o pico só é atribuído a uma etapa (e reset_peak só é chamado)
+# quando nenhuma outra execução rastreou memória durante ela; senão a etapa fica sem pico
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_owned = False
+_tracing_epoch = 0
+
+
+def _acquire_tracing() -> int:
+    global _tracing_users, _tracing_owned, _tracing_epoch
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_owned = True
+        _tracing_users += 1
+        _tracing_epoch += 1
+        return _tracing_epoch
+
+
+def _release_tracing() -> None:
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+
+def _tracing_alone(epoch: int) -> bool:
+    with _tracing_lock:
+        return _tracing_users == 1 and _tracing_epoch == epoch
+
+
+class Instrumentation:
+    def __init__(self, track_memory: bool | None = None) -> None:
+        self.track_memory = TRACE_MEMORY if track_memory is None else track_memory
+        self.stages: list[dict] = []
+        self.files: list[dict] = []
+        self._stack: list[dict] = []
+        self._epoch = 0
+
+    @contextmanager
+    def stage(self, name: str):
+        if self.track_memory and not self._stack:
+            self._epoch = _acquire_tracing()
+        frame = {'start_mem': 0, 'peak': 0, 'alone': self.track_memory and _tracing_alone(self._epoch)}
+        if frame['alone']:
+            current, peak = tracemalloc.get_traced_memory()
+            # O pico acumulado até aqui pertence à etapa externa; zera para medir só esta
+            if self._stack:
+                self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+            frame['start_mem'] = current
+        record = {'type': 'stage', 'stage': name, 'depth': len(self._stack), 'seconds': None, 'peak_memory_bytes': None}
+        # Registrada na entrada: etapas internas aparecem depois da etapa que as contém
+        self.stages.append(record)
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            self._stack.pop()
+            if frame['alone'] and _tracing_alone(self._epoch):
+                _, peak = tracemalloc.get_traced_memory()
+                frame['peak'] = max(frame['peak'], peak)
+                record['peak_memory_bytes'] = max(0, frame['peak'] - frame['start_mem'])
+                if self._stack:
+                    self._stack[-1]['peak'] = max(self._stack[-1]['peak'], frame['peak'])
+                tracemalloc.reset_peak()
+            elif self._stack:
+                self._stack[-1]['alone'] = False
+            if self.track_memory and not self._stack:
+                _release_tracing()
+
+    def record_stage(self, name: str, seconds: float) -> None:
+        # Etapa medida fora desta execução (extração em segundo plano, por exemplo)
+        self.stages.append({'type': 'stage', 'stage': name, 'depth': len(self._stack), 'seconds': seconds, 'peak_memory_bytes': None})
+
+    def record_files(self, reports: list[dict], origins: list[str] | None = None) -> None:
+        for i, r in enumerate(reports):
+            self.files.append({
+                'type': 'file',
+                'arquivo': r['name'],
+                'origem': origins[i] if origins else None,
+                'seconds': r['seconds'],
+                'backend': r['backend'],
+                'pages_read': r['pages_read'],
+                'matches': r['matches'],
+                'sources': r['sources'],
+                'parameters': len(r['data'] or {}),
+                'rejection': r['rejection'],
+                'backend_errors': r['backend_errors'],
+                'template': r.get('template'),
+            })
+
+    def stage_table(self) -> list[dict]:
+        return [
+            {
+                'Etapa': '  ' * s['depth'] + s['stage'],
+                'Tempo (ms)': round(s['seconds'] * 1000, 1),
+                'Pico de memória (MB)': round(s['peak_memory_bytes'] / 2**20, 2) if s['peak_memory_bytes'] is not None else None,
+            }
+            for s in self.stages
+        ]
+
+    def file_table(self) -> list[dict]:
+        return [
+            {
+                'Arquivo': f['arquivo'],
+                'Origem': f['origem'],
+                'Tempo (ms)': round(f['seconds'] * 1000, 1),
+                'Backend': f['backend'] or '-',
+                'Páginas lidas': f['pages_read'],
+                'Padrões (parâmetro: variante)': ", ".join(
+                    f"{p}: {rank}" + (f" [{f['sources'][p]}]" if p in f['sources'] else "") for p, rank in f['matches'].items()
+                ),
+                'Motivo da rejeição': f['rejection'] or '',
+            }
+            for f in self.files
+        ]
+
+    def to_jsonl(self) -> str:
+        return _jsonl(self.stages + self.files)
+
+    def flush_files(self, fh) -> None:
+        # Lotes grandes: grava os registros por arquivo já coletados e libera a memória
+        fh.write(_jsonl(self.files))
+        self.files.clear()
+
+    def write_jsonl(self, path) -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(self.to_jsonl())
+
+
+def _jsonl(records: list[dict]) -> str:
+    stamp = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    return "".join(json.dumps({'timestamp': stamp, **rec}, ensure_ascii=False) + "\n" for rec in records)
@@ -1,5 +1,72 @@
+import json
+import math
+import threading
+from collections import OrderedDict
+from itertools import combinations
+from pathlib import Path
+
+
+SEVERITY = {'Fora do Padrão': 1.0, 'Divergente': 0.6}
+GENERAL_PRIOR = 0.3
+
+
+def evidence_items(params: list[str]) -> list[str]:
+    # Cada parâmetro problemático e cada par que diverge junto ("teor_agua+viscosidade_40c")
+    params = sorted(params)
+    return params + [f"{p}+{q}" for p, q in combinations(params, 2)]
+
+
+class CauseKnowledge:
+    # Causas-raiz confirmadas guardadas só como contagens de coocorrência: o custo do ranking depende
+    # do nº de causas e parâmetros, não do tamanho do histórico
+    def __init__(self, path: str | Path | None = None) -> None:
+        self._path = Path(path) if path is not None else None
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.version = 0
+        self.incidents = 0
+        self.evidence: dict[str, int] = {}
+        self.confirmed: dict[str, dict[str, dict]] = {}
+        if self._path is not None and self._path.exists():
+            with self._path.open(encoding="utf-8") as fh:
+                stored = json.load(fh)
+            self.version = stored['version']
+            self.incidents = stored['incidents']
+            self.evidence = stored['evidence']
+            self.confirmed = stored['confirmed']
+
+    def record(self, params: list[str], category: str, cause: str) -> None:
+        with self._lock:
+            entry = self.confirmed.setdefault(category, {}).setdefault(cause, {'total': 0, 'items': {}})
+            entry['total'] += 1
+            for item in evidence_items(params):
+                self.evidence[item] = self.evidence.get(item, 0) + 1
+                entry['items'][item] = entry['items'].get(item, 0) + 1
+            self.incidents += 1
+            self.version += 1
+            self._dirty = True
+
+    def save(self) -> None:
+        if self._path is None or not self._dirty:
+            return
+        with self._lock:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            payload = {'version': self.version, 'incidents': self.incidents, 'evidence': self.evidence, 'confirmed': self.confirmed}
+            tmp = self._path.with_suffix('.tmp')
+            with tmp.open("w", encoding="utf-8") as fh:
+                json.dump(payload, fh, ensure_ascii=False)
+            tmp.replace(self._path)
+            self._dirty = False
+
+
 class IshikawaAnalyzer:
-    def __init__(self) -> None:
+    def __init__(self, knowledge: CauseKnowledge | None = None, prior_weight: float = 2.0, max_per_category: int = 5) -> None:
+        self.knowledge = knowledge if knowledge is not None else CauseKnowledge()
+        # Peso (em confirmações) do conhecimento de base frente ao histórico confirmado
+        self.prior_weight = prior_weight
+        self.max_per_category = max_per_category
+        self._memo: OrderedDict[tuple, list[dict]] = OrderedDict()
+        self._memo_lock = threading.Lock()
         self.cause_database = {
             'Método': [
                 "Diferença no ponto de coleta (antes/depois de filtros)",
@@ -58,11 +125,103 @@ class IshikawaAnalyzer:
             },
         }
 
-    def suggest_causes(self, classifications: dict) -> dict:
-        suggested = {k: [] for k in self.cause_database.keys()}
+    def signature(self, classifications: dict, results: dict | None = None) -> tuple:
+        # Parâmetros problemáticos com a força da evidência: efeito e p-valor do teste, quando houver
+        items = []
+        for param, c in classifications.items():
+            severity = SEVERITY.get(c['classification'])
+            if severity is None:
+                continue
+            stats = (results or {}).get(param) or {}
+            effect = stats.get('effect_size')
+            p_value = stats.get('p_value')
+            if effect is not None and p_value is not None and effect == effect and p_value == p_value:
+                size = min(abs(effect), 2.0) / 2.0
+                significance = min(-math.log10(max(p_value, 1e-6)), 6.0) / 6.0
+                severity *= 0.4 + 0.3 * size + 0.3 * significance
+            items.append((param, c['classification'], round(severity, 2)))
+        return tuple(sorted(items))
+
+    def rank_causes(self, classifications: dict, results: dict | None = None) -> list[dict]:
+        key = (self.signature(classifications, results), self.knowledge.version, self.prior_weight)
+        with self._memo_lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+        ranking = self._rank(key[0])
+        with self._memo_lock:
+            self._memo[key] = ranking
+            if len(self._memo) > 128:
+                self._memo.popitem(last=False)
+        return ranking
 
-        probs = [p for p, c in classifications.items() if c['classification'] in ("Divergente", "Fora do Padrão")]
-        if not probs:
+    def _priors(self) -> dict[tuple[str, str], dict[str, float]]:
+        # Conhecimento de base: causa específica do parâmetro (ou dos dois, num par) vale 1; causa
+        # geral vale GENERAL_PRIOR para qualquer parâmetro ('*')
+        priors: dict[tuple[str, str], dict[str, float]] = {}
+        for cat, lst in self.cause_database.items():
+            for cause in lst:
+                priors[(cat, cause)] = {'*': GENERAL_PRIOR}
+        for param, by_cat in self.parameter_specific.items():
+            for cat, lst in by_cat.items():
+                for cause in lst:
+                    priors.setdefault((cat, cause), {})[param] = 1.0
+        for prior in priors.values():
+            specific = sorted(p for p in prior if p != '*')
+            for p, q in combinations(specific, 2):
+                prior[f"{p}+{q}"] = 1.0
+        return priors
+
+    def _rank(self, signature: tuple) -> list[dict]:
+        if not signature:
+            return []
+        strength = {param: s for param, _, s in signature}
+        weights = dict(strength)
+        for p, q in combinations(sorted(strength), 2):
+            weights[f"{p}+{q}"] = math.sqrt(strength[p] * strength[q])
+
+        knowledge = self.knowledge
+        alpha = self.prior_weight
+        priors = self._priors()
+        for cat, by_cause in knowledge.confirmed.items():
+            for cause in by_cause:
+                priors.setdefault((cat, cause), {})
+
+        ranking = []
+        for (cat, cause), prior in priors.items():
+            learned = knowledge.confirmed.get(cat, {}).get(cause, {'total': 0, 'items': {}})
+            score = 0.0
+            contributions = {}
+            for item, w in weights.items():
+                base = prior.get(item, 0.0 if '+' in item else prior.get('*', 0.0))
+                # P(causa | item divergiu) suavizada: o conhecimento de base entra como alpha confirmações
+                p = (learned['items'].get(item, 0) + alpha * base) / (knowledge.evidence.get(item, 0) + alpha)
+                if p > 0:
+                    score += w * p
+                    contributions[item] = w * p
+            if score <= 0:
+                continue
+            ranking.append({
+                'categoria': cat,
+                'causa': cause,
+                'score': score,
+                'parametros': sorted(contributions, key=contributions.get, reverse=True),
+                'confirmacoes': learned['total'],
+            })
+        total = sum(r['score'] for r in ranking)
+        for r in ranking:
+            r['share'] = r['score'] / total
+        ranking.sort(key=lambda r: (-r['score'], r['categoria'], r['causa']))
+        return ranking
+
+    def confirm_cause(self, classifications: dict, category: str, cause: str) -> None:
+        problems = [p for p, c in classifications.items() if c['classification'] in SEVERITY]
+        self.knowledge.record(problems, category, cause)
+        self.knowledge.save()
+
+    def suggest_causes(self, classifications: dict, results: dict | None = None) -> dict:
+        ranking = self.rank_causes(classifications, results)
+        if not ranking:
             return {
                 'Método': ["Padronizar protocolos de coleta"],
                 'Máquina': ["Sincronizar calibrações"],
@@ -71,26 +230,9 @@ class IshikawaAnalyzer:
                 'Meio ambiente': ["Monitorar temperatura/umidade"],
                 'Medida': ["Padronizar arredondamentos"],
             }
-
-        for p in probs:
-            if p in self.parameter_specific:
-                for cat, lst in self.parameter_specific[p].items():
-                    suggested[cat].extend(lst)
-
-        # Adicionar causas gerais prováveis
-        for cat, lst in self.cause_database.items():
-            if len(suggested[cat]) < 3:
-                needed = 3 - len(suggested[cat])
-                suggested[cat].extend(lst[:needed])
-
-        # Deduplicar e limitar
-        for cat in suggested:
-            seen = set()
-            dedup = []
-            for item in suggested[cat]:
-                if item not in seen:
-                    seen.add(item)
-                    dedup.append(item)
-            suggested[cat] = dedup[:5]
+        suggested = {k: [] for k in self.cause_database.keys()}
+        for r in ranking:
+            lst = suggested.setdefault(r['categoria'], [])
+            if len(lst) < self.max_per_category:
+                lst.append(r['causa'])
         return suggested
-
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+
+ORIGINS = ['Mineradora', 'Distribuidora']
+
+
+class LabDataset:
+    def __init__(self, arrays: dict[str, dict[str, np.ndarray]], columns: list[str], origem: pd.Categorical) -> None:
+        self._arrays = arrays
+        self.columns = columns
+        self.origem = origem
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, dtype=np.float64) -> "LabDataset":
+        # dtype float32: metade da memória para históricos longos (a análise acumula em float64)
+        origem = pd.Categorical(df['origem'])
+        codes = origem.codes
+        # Uma única ordenação estável por origem; cada origem vira uma fatia contígua
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(origem.categories) + 1))
+
+        columns = [c for c in df.columns if c != 'origem' and pd.api.types.is_numeric_dtype(df[c])]
+        arrays: dict[str, dict[str, np.ndarray]] = {str(o): {} for o in origem.categories}
+        for col in columns:
+            values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+            for i, o in enumerate(origem.categories):
+                part = values[bounds[i]:bounds[i + 1]]
+                arrays[str(o)][col] = np.ascontiguousarray(part[~np.isnan(part)], dtype=dtype)
+        return cls(arrays, columns, origem)
+
+    @classmethod
+    def coerce(cls, data: "pd.DataFrame | LabDataset") -> "LabDataset":
+        return data if isinstance(data, LabDataset) else cls.from_frame(data)
+
+    @property
+    def origins(self) -> list[str]:
+        return list(self._arrays.keys())
+
+    def values(self, origin: str, param: str) -> np.ndarray:
+        return self._arrays.get(origin, {}).get(param, np.empty(0, dtype=np.float64))
+
+    def __len__(self) -> int:
+        return len(self.origem)
+
+    def __contains__(self, param: str) -> bool:
+        return param in self.columns
@@ -0,0 +1,116 @@
+import numpy as np
+from scipy import stats
+
+from grouped_analysis import SHAPIRO_MAX_N, dagostino_k2
+
+
+# Elementos por bloco na passada dos momentos: o bloco e suas potências cabem no cache
+CHUNK = 1 << 16
+
+
+def moments(x: np.ndarray, chunk: int = CHUNK) -> dict:
+    # Uma passada só, em blocos, para a média e os momentos centrais de ordem 2 a 4 (somas, não médias).
+    # Acumula em float64 mesmo com a série em float32; o deslocamento pela média do primeiro bloco
+    # evita o cancelamento das somas de potências
+    n = len(x)
+    shift = float(np.mean(x[:chunk], dtype=np.float64))
+    s1 = s2 = s3 = s4 = 0.0
+    for start in range(0, n, chunk):
+        d = x[start:start + chunk].astype(np.float64) - shift
+        d2 = d * d
+        s1 += float(d.sum())
+        s2 += float(d2.sum())
+        s3 += float((d2 * d).sum())
+        s4 += float((d2 * d2).sum())
+    mu = s1 / n
+    return {
+        'n': n,
+        'mean': shift + mu,
+        'm2': s2 - n * mu * mu,
+        'm3': s3 - 3 * mu * s2 + 2 * n * mu ** 3,
+        'm4': s4 - 4 * mu * s3 + 6 * mu * mu * s2 - 3 * n * mu ** 4,
+    }
+
+
+def variance(mom: dict) -> float:
+    return mom['m2'] / (mom['n'] - 1)
+
+
+def median(xs: np.ndarray) -> float:
+    # xs ordenado
+    n = len(xs)
+    return (float(xs[(n - 1) // 2]) + float(xs[n // 2])) / 2.0
+
+
+def normality(xs: np.ndarray, mom: dict, alpha: float) -> dict:
+    # Shapiro-Wilk até o limite de validade do algoritmo; acima dele, D'Agostino-Pearson a partir dos
+    # momentos já calculados (sem nova passada pelos dados)
+    n = mom['n']
+    if n < 3:
+        return {'is_normal': False, 'p_value': None, 'statistic': None}
+    if n <= SHAPIRO_MAX_N:
+        stat, p = stats.shapiro(xs)
+        return {'is_normal': bool(p > alpha), 'p_value': float(p), 'statistic': float(stat)}
+    if mom['m2'] <= 0:
+        # Série constante (histórico todo zerado, por exemplo): assimetria e curtose indefinidas;
+        # não é tratada como normal e a comparação fica com o Mann-Whitney
+        return {'is_normal': False, 'p_value': 1.0, 'statistic': None, 'test': "D'Agostino-Pearson"}
+    k2 = float(dagostino_k2(float(n), mom['m2'] / n, mom['m3'] / n, mom['m4'] / n))
+    p = float(stats.chi2.sf(k2, 2))
+    return {'is_normal': bool(p > alpha), 'p_value': p, 'statistic': k2, 'test': "D'Agostino-Pearson"}
+
+
+def levene_median(sa: np.ndarray, sb: np.ndarray, ma: dict, mb: dict) -> float:
+    # Levene centrado na mediana (padrão do scipy), com as séries ordenadas e os momentos: a soma de
+    # |x - mediana| sai da soma da metade inferior, e a soma dos quadrados, de m2
+    n_total = ma['n'] + mb['n']
+    z_mean, z_ss = [], []
+    for xs, mom in ((sa, ma), (sb, mb)):
+        n = mom['n']
+        med = median(xs)
+        below = int(np.searchsorted(xs, med, side='left'))
+        low = float(xs[:below].sum(dtype=np.float64))
+        total = n * mom['mean']
+        abs_sum = (total - 2 * low) - med * (n - 2 * below)
+        z_mean.append(abs_sum / n)
+        z_ss.append(mom['m2'] + n * (mom['mean'] - med) ** 2)
+    z_all = (ma['n'] * z_mean[0] + mb['n'] * z_mean[1]) / n_total
+    between = ma['n'] * (z_mean[0] - z_all) ** 2 + mb['n'] * (z_mean[1] - z_all) ** 2
+    within = (z_ss[0] - ma['n'] * z_mean[0] ** 2) + (z_ss[1] - mb['n'] * z_mean[1] ** 2)
+    if within <= 0:
+        return float('nan')
+    w = (n_total - 2) * between / within
+    return float(stats.f.sf(w, 1, n_total - 2))
+
+
+def mann_whitney(sa: np.ndarray, sb: np.ndarray) -> tuple[float, float]:
+    # U de Mann-Whitney com a aproximação normal (correções de continuidade e de empates), como o
+    # scipy faz para amostras grandes. As séries já vêm ordenadas: a ordenação estável da concatenação
+    # só intercala as duas sequências (timsort), e os postos médios saem das sequências de empates
+    n1, n2 = len(sa), len(sb)
+    merged = np.concatenate([sa, sb])
+    order = np.argsort(merged, kind='stable')
+    xs = merged[order]
+    new_run = np.empty(len(xs), dtype=bool)
+    new_run[0] = True
+    np.not_equal(xs[1:], xs[:-1], out=new_run[1:])
+    first = np.flatnonzero(new_run)
+    if len(first) == len(xs):
+        # Sem empates (medições contínuas): o posto é a própria posição na ordem
+        r1 = float(np.flatnonzero(order < n1).sum()) + n1
+        tie_term = 0.0
+    else:
+        run_len = np.diff(np.append(first, len(xs))).astype(np.float64)
+        run_rank = first + (run_len + 1) / 2.0
+        from_a = np.add.reduceat((order < n1).astype(np.int64), first)
+        r1 = float(np.dot(run_rank, from_a))
+        tie_term = float(np.sum(run_len ** 3 - run_len))
+
+    u1 = r1 - n1 * (n1 + 1) / 2.0
+    u = max(u1, n1 * n2 - u1)
+    n = n1 + n2
+    s = np.sqrt(n1 * n2 / 12.0 * ((n + 1) - tie_term / (n * (n - 1))))
+    if s == 0:
+        return u1, 1.0
+    z = (u - n1 * n2 / 2.0 - 0.5) / s
+    return u1, float(np.clip(2 * stats.norm.sf(z), 0, 1))
@@ -0,0 +1,39 @@
+import re
+from datetime import date
+
+
+_COLLECTION_DATE = re.compile(
+    r'(?:data\s*(?:da|de)\s*(?:coleta|amostragem)|sampling\s*date)[^\d\n]*(\d{1,2})[/.-](\d{1,2})[/.-](\d{2,4})'
+)
+_ANY_DATE = re.compile(r'\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})\b')
+# Identificadores precisam de ao menos um dígito ("amostra recebida em frasco..." não é uma amostra)
+_ID = r'\s*(?:n[º°o]\.?)?\s*[:=]?\s*([a-z]*[-/]?\d[a-z0-9./-]*)'
+_LOT = re.compile(r'\b(?:lote|batch)' + _ID)
+_SAMPLE = re.compile(r'\b(?:amostra|sample)' + _ID)
+_INVOICE = re.compile(r'\b(?:nota\s*fiscal|nf-?e?)' + _ID)
+_LAB = re.compile(r'laborat|\blab\b|ensaios')
+
+
+def extract_metadata(first_page: str) -> dict:
+    # Data da coleta (ou a primeira data do cabeçalho), identificadores da amostra, do lote e da nota
+    # fiscal e a linha com o nome do laboratório
+    meta = {'data_amostra': None, 'lote': None, 'amostra': None, 'nota_fiscal': None, 'laboratorio': None}
+    m = _COLLECTION_DATE.search(first_page) or _ANY_DATE.search(first_page)
+    if m is not None:
+        day, month, year = (int(g) for g in m.groups())
+        try:
+            meta['data_amostra'] = date(year + 2000 if year < 100 else year, month, day).isoformat()
+        except ValueError:
+            pass
+    for key, rx in (('lote', _LOT), ('amostra', _SAMPLE), ('nota_fiscal', _INVOICE)):
+        m = rx.search(first_page)
+        if m is not None:
+            meta[key] = m.group(1).rstrip('.-/').upper()
+    if meta['nota_fiscal'] is not None:
+        # Número da NF sem pontuação nem zeros à esquerda, como costuma aparecer em cada laudo
+        meta['nota_fiscal'] = re.sub(r'\D', '', meta['nota_fiscal']).lstrip('0') or None
+    for line in first_page.split('\n'):
+        if _LAB.search(line):
+            meta['laboratorio'] = ' '.join(line.split())
+            break
+    return meta
@@ -1,10 +1,13 @@
 import streamlit as st
-import pandas as pd
-from pdf_extractor import PDFExtractor
-from statistical_analyzer import StatisticalAnalyzer
-from visualizations import VisualizationGenerator
-from classifier import ParameterClassifier
-from ishikawa_analyzer import IshikawaAnalyzer
+
+from extraction_service import ExtractionService
+
+
+@st.cache_resource
+def get_extraction_service() -> ExtractionService:
+    # Um pool por servidor, compartilhado pelas sessões; os workers sobem (e importam as bibliotecas
+    # de PDF) enquanto a página inicial é exibida
+    return ExtractionService()
 
 
 def show_example_format() -> None:
@@ -32,128 +35,49 @@ def show_example_format() -> None:
     )
 
 
-def create_results_table(results: dict) -> pd.DataFrame:
-    rows = []
-    for param, r in results.items():
-        rows.append(
-            {
-                "Parâmetro": param,
-                "Média Mineradora": f"{r['mean_mineradora']:.2f}" if pd.notna(r['mean_mineradora']) else "-",
-                "Média Distribuidora": f"{r['mean_distribuidora']:.2f}" if pd.notna(r['mean_distribuidora']) else "-",
-                "Mediana Mineradora": f"{r['median_mineradora']:.2f}" if pd.notna(r['median_mineradora']) else "-",
-                "Mediana Distribuidora": f"{r['median_distribuidora']:.2f}" if pd.notna(r['median_distribuidora']) else "-",
-                "Desv. Padrão Mineradora": f"{r['std_mineradora']:.2f}" if pd.notna(r['std_mineradora']) else "-",
-                "Desv. Padrão Distribuidora": f"{r['std_distribuidora']:.2f}" if pd.notna(r['std_distribuidora']) else "-",
-                "Teste Aplicado": r['test_used'],
-                "p-valor": f"{r['p_value']:.4f}" if pd.notna(r['p_value']) else "-",
-                "Conclusão": "Rejeita H₀" if pd.notna(r['p_value']) and r['p_value'] < 0.05 else "Não Rejeita H₀",
-            }
-        )
-    return pd.DataFrame(rows)
-
-
-def display_classifications(classifications: dict) -> None:
-    col1, col2, col3 = st.columns(3)
-    normal_count = sum(1 for c in classifications.values() if c['classification'] == 'Normal')
-    divergent_count = sum(1 for c in classifications.values() if c['classification'] == 'Divergente')
-    out_count = sum(1 for c in classifications.values() if c['classification'] == 'Fora do Padrão')
-
-    col1.metric("✅ Normal", normal_count)
-    col2.metric("⚠️ Divergente", divergent_count)
-    col3.metric("❌ Fora do Padrão", out_count)
-
-    for param, c in classifications.items():
-        emoji = {"Normal": "✅", "Divergente": "⚠️", "Fora do Padrão": "❌"}[c['classification']]
-        st.write(f"{emoji} **{param}**: {c['classification']}")
-        if c['details']:
-            st.caption(c['details'])
-
-
-def display_causes(causes: dict) -> None:
-    icons = {
-        "Método": "🔬",
-        "Máquina": "⚙️",
-        "Mão de obra": "👥",
-        "Material": "📦",
-        "Meio ambiente": "🌡️",
-        "Medida": "📏",
-    }
-    for cat, items in causes.items():
-        if not items:
-            continue
-        st.subheader(f"{icons.get(cat, '•')} {cat}")
-        for it in items:
-            st.write(f"- {it}")
-
-
 def main() -> None:
     st.set_page_config(page_title="Análise de Laudos de Diesel", page_icon="🛢️", layout="wide")
     st.title("🛢️ Análise Estatística de Laudos de Diesel")
     st.markdown("### Comparativo entre Mineradora e Distribuidora")
 
-    st.sidebar.header("📁 Upload de Arquivos")
-    mineradora_files = st.sidebar.file_uploader(
-        "Laudos da Mineradora (PDF)", type=["pdf"], accept_multiple_files=True, key="mineradora_files"
-    )
-    distribuidora_files = st.sidebar.file_uploader(
-        "Laudos da Distribuidora (PDF)", type=["pdf"], accept_multiple_files=True, key="distribuidora_files"
-    )
-
-    if not mineradora_files or not distribuidora_files:
-        st.info("👆 Envie os laudos para iniciar a análise.")
-        show_example_format()
-        return
-
-    extractor = PDFExtractor()
-    with st.spinner("Extraindo dados dos PDFs..."):
-        mineradora_rows = []
-        for f in mineradora_files:
-            data = extractor.extract_parameters(f)
-            if data:
-                data['origem'] = 'Mineradora'
-                mineradora_rows.append(data)
-
-        distribuidora_rows = []
-        for f in distribuidora_files:
-            data = extractor.extract_parameters(f)
-            if data:
-                data['origem'] = 'Distribuidora'
-                distribuidora_rows.append(data)
-
-    if not mineradora_rows or not distribuidora_rows:
-        st.error("Não foi possível extrair dados suficientes dos PDFs enviados.")
-        return
-
-    df = pd.DataFrame(mineradora_rows + distribuidora_rows)
-
-    analyzer = StatisticalAnalyzer()
-    results = analyzer.perform_analysis(df)
-
-    st.header("📊 Resultados da Análise Estatística")
-    st.dataframe(create_results_table(results), use_container_width=True)
-
-    viz = VisualizationGenerator()
-    st.header("📈 Visualizações")
-    st.subheader("Boxplots comparativos")
-    st.plotly_chart(viz.create_boxplots(df), use_container_width=True)
+    source = st.sidebar.radio("Fonte dos dados", ["Upload de PDFs", "Histórico"], horizontal=True)
+    if source == "Upload de PDFs":
+        st.sidebar.header("📁 Upload de Arquivos")
+        mineradora_files = st.sidebar.file_uploader(
+            "Laudos da Mineradora (PDF)", type=["pdf"], accept_multiple_files=True, key="mineradora_files"
+        )
+        distribuidora_files = st.sidebar.file_uploader(
+            "Laudos da Distribuidora (PDF)", type=["pdf"], accept_multiple_files=True, key="distribuidora_files"
+        )
+        save_history = st.sidebar.checkbox("Salvar laudos no histórico", value=True)
 
-    st.subheader("Gráficos de probabilidade normal (QQ)")
-    st.plotly_chart(viz.create_normality_plots(df), use_container_width=True)
+    st.sidebar.header("⚙️ Teste estatístico")
+    strategies = {
+        "Clássico (t / Mann-Whitney)": 'classic',
+        "Permutação": 'permutation',
+        "Bootstrap": 'bootstrap',
+    }
+    strategy = strategies[st.sidebar.selectbox("Estratégia de teste", list(strategies))]
+    n_resamples = 9999
+    if strategy != 'classic':
+        n_resamples = st.sidebar.number_input("Reamostragens", min_value=999, max_value=200_000, value=9999, step=1000)
 
-    st.subheader("Pareto de divergências")
-    st.plotly_chart(viz.create_pareto_chart(results), use_container_width=True)
+    service = None
+    if source == "Upload de PDFs":
+        service = get_extraction_service()
+        if not mineradora_files or not distribuidora_files:
+            st.info("👆 Envie os laudos para iniciar a análise.")
+            show_example_format()
+            return
+    else:
+        mineradora_files = distribuidora_files = None
+        save_history = False
 
-    st.header("🎯 Diagnóstico de Divergências")
-    classifier = ParameterClassifier()
-    classifications = classifier.classify_parameters(df)
-    display_classifications(classifications)
+    # pandas, scipy, plotly e as análises só são importados quando há dados para exibir
+    from dashboard import render
 
-    st.header("🔍 Possíveis Causas (Ishikawa)")
-    ishikawa = IshikawaAnalyzer()
-    causes = ishikawa.suggest_causes(classifications)
-    display_causes(causes)
+    render(source, mineradora_files, distribuidora_files, save_history, strategy, n_resamples, service)
 
 
 if __name__ == "__main__":
     main()
-
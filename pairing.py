@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+
+# Identificadores em ordem de confiança: a nota fiscal identifica a entrega; o lote pode ter vários laudos
+KEYS = ['nota_fiscal', 'amostra', 'lote']
+
+
+def match_reports(
+    frame: pd.DataFrame,
+    keys: list[str] | None = None,
+    date_tolerance_days: float | None = 3,
+    date_column: str = 'data_amostra',
+) -> pd.DataFrame:
+    # Cada laudo entra em no máximo um par. Primeiro por identificador (junção por hash, um
+    # identificador por vez, repetições casadas na ordem cronológica); os que sobram, pela data de
+    # coleta mais próxima dentro da tolerância, desde que nenhum identificador presente nos dois lados
+    # seja diferente.
+    keys = [k for k in (KEYS if keys is None else keys) if k in frame.columns]
+    if date_column in frame.columns:
+        frame = frame.sort_values(date_column, kind='stable', na_position='last')
+    m = frame[frame['origem'] == 'Mineradora'].reset_index(drop=True)
+    d = frame[frame['origem'] == 'Distribuidora'].reset_index(drop=True)
+    free_m = np.ones(len(m), dtype=bool)
+    free_d = np.ones(len(d), dtype=bool)
+    found = []
+
+    for key in keys:
+        left = _keyed(m, key, free_m)
+        right = _keyed(d, key, free_d)
+        if left.empty or right.empty:
+            continue
+        joined = left.merge(right, on=[key, '_ocorrencia'], suffixes=('_m', '_d'))
+        if joined.empty:
+            continue
+        i = joined['_linha_m'].to_numpy()
+        j = joined['_linha_d'].to_numpy()
+        free_m[i] = False
+        free_d[j] = False
+        found.append((i, j, np.full(len(i), key, dtype=object), joined[key].to_numpy(dtype=object)))
+
+    if date_tolerance_days is not None and date_column in frame.columns:
+        days_m, valid_m = _days(m[date_column])
+        days_d, valid_d = _days(d[date_column])
+        present_m = _present(m, keys)
+        present_d = _present(d, keys)
+        # Pares de combinações de identificadores presentes; primeiro os que compartilham mais
+        # identificadores (confirmados iguais pela junção), por último os sem nenhum em comum
+        combos = sorted(
+            ((a, b) for a in np.unique(present_m[free_m & valid_m]) for b in np.unique(present_d[free_d & valid_d])),
+            key=lambda ab: -bin(int(ab[0] & ab[1])).count('1'),
+        )
+        reach = int(np.floor(date_tolerance_days))
+        # Do deslocamento mais próximo ao mais distante (no empate, a distribuidora antes da
+        # mineradora). Em cada um, todos os laudos livres cuja data difere exatamente dele são casados
+        # de uma vez, dentro de cada data e combinação de identificadores; um laudo barrado por um
+        # identificador diferente continua livre para o próximo vizinho
+        for offset in [0] + [s * g for g in range(1, reach + 1) for s in (-1, 1)]:
+            for a, b in combos:
+                shared = [k for bit, k in enumerate(keys) if a & b & (1 << bit)]
+                rows_m = np.flatnonzero(free_m & valid_m & (present_m == a))
+                rows_d = np.flatnonzero(free_d & valid_d & (present_d == b))
+                if not len(rows_m) or not len(rows_d):
+                    continue
+                left = _bucketed(m, rows_m, days_m[rows_m] + offset, shared)
+                right = _bucketed(d, rows_d, days_d[rows_d], shared)
+                joined = left.merge(right, on=['_dia', *shared, '_ocorrencia'], suffixes=('_m', '_d'))
+                if joined.empty:
+                    continue
+                i = joined['_linha_m'].to_numpy()
+                j = joined['_linha_d'].to_numpy()
+                free_m[i] = False
+                free_d[j] = False
+                found.append((i, j, np.full(len(i), 'data', dtype=object), m[date_column].to_numpy(dtype=object)[i]))
+
+    if found:
+        i, j, how, value = (np.concatenate(parts) for parts in zip(*found))
+    else:
+        i = j = np.empty(0, dtype=np.int64)
+        how = value = np.empty(0, dtype=object)
+    out = {'criterio': how, 'chave': value}
+    for col in frame.columns:
+        if col == 'origem':
+            continue
+        out[f"{col}_mineradora"] = m[col].to_numpy()[i]
+        out[f"{col}_distribuidora"] = d[col].to_numpy()[j]
+    pairs = pd.DataFrame(out)
+    pairs.attrs['unmatched'] = {'Mineradora': int(free_m.sum()), 'Distribuidora': int(free_d.sum())}
+    return pairs
+
+
+def _keyed(side: pd.DataFrame, key: str, free: np.ndarray) -> pd.DataFrame:
+    rows = np.flatnonzero(free & side[key].notna().to_numpy())
+    part = pd.DataFrame({key: side[key].to_numpy()[rows], '_linha': rows})
+    # A k-ésima ocorrência de um identificador de um lado casa com a k-ésima do outro
+    part['_ocorrencia'] = part.groupby(key, sort=False).cumcount()
+    return part
+
+
+def _present(side: pd.DataFrame, keys: list[str]) -> np.ndarray:
+    # Bit b ligado: o laudo informa keys[b]
+    mask = np.zeros(len(side), dtype=np.int64)
+    for bit, key in enumerate(keys):
+        mask |= side[key].notna().to_numpy().astype(np.int64) << bit
+    return mask
+
+
+def _bucketed(side: pd.DataFrame, rows: np.ndarray, days: np.ndarray, keys: list[str]) -> pd.DataFrame:
+    part = pd.DataFrame({'_dia': days, **{k: side[k].to_numpy(dtype=object)[rows] for k in keys}, '_linha': rows})
+    # Vários laudos na mesma data (e com os mesmos identificadores): o k-ésimo de cada lado formam um par
+    part['_ocorrencia'] = part.groupby(['_dia', *keys], sort=False).cumcount()
+    return part
+
+
+def _days(values: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    dates = pd.to_datetime(values, errors='coerce')
+    valid = dates.notna().to_numpy()
+    days = np.zeros(len(dates), dtype=np.int64)
+    days[valid] = dates[valid].to_numpy().astype('datetime64[D]').astype(np.int64)
+    return days, valid
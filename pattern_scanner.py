@@ -0,0 +1,136 @@
+import re
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+
+MAX_PREFIXES = 32
+FIRST_WINDOW = 1024
+MAX_WINDOW = 65536
+
+
+class PatternScanner:
+    def __init__(self, parameter_patterns: dict[str, list[str]], flags: int = re.IGNORECASE | re.DOTALL) -> None:
+        self.params = list(parameter_patterns.keys())
+        self._fold = bool(flags & re.IGNORECASE)
+        self._buckets: dict[str, list[tuple[str, int, re.Pattern]]] = {}
+        self._unanchored: list[tuple[str, int, re.Pattern]] = []
+
+        for param, patterns in parameter_patterns.items():
+            for rank, pat in enumerate(patterns):
+                rx = re.compile(pat, flags)
+                heads = _literal_prefixes(pat, flags)
+                if not heads:
+                    self._unanchored.append((param, rank, rx))
+                    continue
+                for head in {h.lower() if self._fold else h for h in heads}:
+                    self._buckets.setdefault(head, []).append((param, rank, rx))
+        for entries in self._buckets.values():
+            entries.sort(key=lambda e: e[1])
+        self._max_prefix = max((len(p) for p in self._buckets), default=1)
+
+    def scan(self, text: str) -> dict[str, tuple[int, float]]:
+        best: dict[str, tuple[int, float]] = {}
+        for param, rank, rx in self._unanchored:
+            for m in rx.finditer(text):
+                value = _to_float(m.group(1))
+                if value is not None:
+                    current = best.get(param)
+                    if current is None or rank < current[0]:
+                        best[param] = (rank, value)
+                    break
+
+        # Posições candidatas via str.find (busca em C, sem regex) em janelas crescentes do texto:
+        # cada padrão só é testado onde seu prefixo literal obrigatório ocorre, e laudos com
+        # tudo no cabeçalho param na primeira janela
+        target = len(self.params)
+        settled = sum(1 for r, _ in best.values() if r == 0)
+        overlap = self._max_prefix - 1
+        start, size = 0, FIRST_WINDOW
+        while start < len(text) and settled < target:
+            end = min(start + size, len(text))
+            window = text[start:end + overlap]
+            haystack = window.lower() if self._fold else window
+            if len(haystack) != len(window):
+                haystack = window
+            limit = end - start
+            candidates = []
+            for prefix in self._buckets:
+                pos = haystack.find(prefix, 0, limit + len(prefix) - 1)
+                while pos >= 0:
+                    candidates.append((pos + start, prefix))
+                    pos = haystack.find(prefix, pos + 1, limit + len(prefix) - 1)
+            candidates.sort()
+
+            for pos, prefix in candidates:
+                for param, rank, rx in self._buckets[prefix]:
+                    current = best.get(param)
+                    if current is not None and current[0] <= rank:
+                        continue
+                    m = rx.match(text, pos)
+                    if m is None:
+                        continue
+                    value = _to_float(m.group(1))
+                    if value is not None:
+                        best[param] = (rank, value)
+                        if rank == 0:
+                            settled += 1
+                if settled == target:
+                    break
+            start, size = end, min(size * 2, MAX_WINDOW)
+        return best
+
+    def find_all(self, text: str) -> dict[str, float]:
+        found = self.scan(text)
+        return {p: found[p][1] for p in self.params if p in found}
+
+
+def _to_float(raw: str) -> float | None:
+    try:
+        return float(raw.replace(',', '.'))
+    except Exception:
+        return None
+
+
+def _literal_prefixes(pattern: str, flags: int) -> list[str]:
+    # Prefixos literais obrigatórios do padrão; lista vazia se ele puder começar em qualquer caractere
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except Exception:
+        return []
+    prefixes, _ = _expand(list(parsed), [""])
+    if any(p == "" for p in prefixes):
+        return []
+    return prefixes
+
+
+def _expand(items: list, prefixes: list[str]) -> tuple[list[str], bool]:
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            prefixes = [p + chr(av) for p in prefixes]
+        elif op is sre_constants.IN and all(o is sre_constants.LITERAL for o, _ in av):
+            if len(av) * len(prefixes) > MAX_PREFIXES:
+                return prefixes, False
+            prefixes = [p + chr(c) for p in prefixes for _, c in av]
+        elif op is sre_constants.SUBPATTERN:
+            prefixes, complete = _expand(list(av[-1]), prefixes)
+            if not complete:
+                return prefixes, False
+        elif op is sre_constants.BRANCH:
+            expanded: list[str] = []
+            complete = True
+            for branch in av[1]:
+                heads, ok = _expand(list(branch), prefixes)
+                expanded.extend(heads)
+                complete = complete and ok
+            if len(expanded) > MAX_PREFIXES:
+                return prefixes, False
+            prefixes = expanded
+            if not complete:
+                return prefixes, False
+        else:
+            return prefixes, False
+    return prefixes, True
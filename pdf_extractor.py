@@ -1,11 +1,50 @@
-import re
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
 from io import BytesIO
-import pdfplumber
-import PyPDF2
+
+from extraction_backends import BACKENDS, DEFAULT_ORDER, EXPLORE_EVERY, BackendStats, load_backends
+from extraction_cache import ExtractionCache
+from laudo_metadata import extract_metadata
+from pattern_scanner import PatternScanner
+from template_registry import LabTemplate, TemplateRegistry, fingerprint, learn_labels
+
+
+# Caracteres do fim de uma página e do início da seguinte parseados juntos no modo streaming
+SEAM = 1024
+
+# Envios entre atualizações dos modelos de laboratório confiáveis passados aos workers: modelos
+# aprendidos no início de um lote grande já valem para o resto dele
+TEMPLATE_REFRESH = 16
+
+# Scanners compilados por conjunto de padrões, por processo
+MAX_SCANNERS = 8
+_SCANNERS: dict[tuple, PatternScanner] = {}
 
 
 class PDFExtractor:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        cache: ExtractionCache | None = None,
+        streaming: bool = False,
+        backends: list[str] | None = None,
+        backend_stats: BackendStats | None = None,
+        templates: TemplateRegistry | None = None,
+    ) -> None:
+        self.cache = cache
+        self.streaming = streaming
+        self.backends = list(backends or DEFAULT_ORDER)
+        self.backend_stats = backend_stats
+        self.templates = templates
+        # Modelos confiáveis (fingerprint -> LabTemplate) usados nesta extração; None desliga o caminho rápido
+        self._trusted: dict[str, LabTemplate] | None = None
+        self._verify_every = 50
+        self._scanner: PatternScanner | None = None
+        self._scanner_key: tuple | None = None
         self.parameter_patterns = {
             'viscosidade_40c': [
                 r'viscosidade\s*[:=]?\s*40\s*°?c[^\d]*(\d+[,.]?\d*)',
@@ -30,52 +69,494 @@ class PDFExtractor:
             ],
         }
 
+    @property
+    def backend_order(self) -> list[str]:
+        return self.backend_stats.order(self.backends) if self.backend_stats is not None else list(self.backends)
+
+    @property
+    def optional_backends(self) -> dict[str, list[str]]:
+        return self.backend_stats.optional(self.backends) if self.backend_stats is not None else {}
+
+    @property
+    def patterns_version(self) -> str:
+        payload = json.dumps(self.parameter_patterns, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
     def extract_parameters(self, uploaded_file) -> dict | None:
-        text = self._extract_with_pdfplumber(uploaded_file)
-        if not text:
-            text = self._extract_with_pypdf2(uploaded_file)
-        if not text:
-            return None
-        return self._parse_parameters(text)
+        return self.extract_with_report(uploaded_file)['data']
+
+    def extract_with_report(self, uploaded_file) -> dict:
+        start = time.perf_counter()
+        stream = _as_stream(uploaded_file)
+        report = _new_report(getattr(uploaded_file, 'name', None))
+        with stream.getbuffer() as view:
+            digest = hashlib.sha256(view).hexdigest()
+        report['sha256'] = digest
+        if self.cache is None:
+            text, params, pages_read, diag = self._extract_stream(stream, templates=self._template_state())
+            self._observe(diag)
+            if self.templates is not None:
+                self.templates.save()
+            _finish_report(report, text, params, pages_read, diag, start)
+            return report
+
+        found, params, text, partial = self._lookup_cache(digest)
+        if found:
+            _finish_report(report, None, params, 0, _new_diag('cache'), start)
+            return report
+        cached = self._parse_cached(text, partial) if text is not None else None
+        if cached is not None:
+            params, diag = cached
+            pages_read = 0
+        else:
+            text, params, pages_read, diag = self._extract_stream(stream, templates=self._template_state())
+            self._observe(diag)
+            if self.templates is not None:
+                self.templates.save()
+        self.cache.put(digest, self.patterns_version, text, params, diag['text_partial'])
+        _finish_report(report, text, params, pages_read, diag, start)
+        return report
+
+    def extract_many(self, files, workers: int | None = None, executor: Executor | None = None) -> list[dict]:
+        out: list[dict | None] = [None] * len(files)
+        for i, report in self.iter_extract(files, workers, executor):
+            out[i] = report
+        return out
+
+    def iter_extract(self, files, workers: int | None = None, executor: Executor | None = None, cancelled=None):
+        # Gera (índice, relatório) na ordem em que cada laudo fica pronto: resultados do cache
+        # primeiro, depois cada PDF assim que um worker termina. cancelled(): quando verdadeiro, os
+        # laudos ainda não enviados aos workers não são mais extraídos
+        payloads = [_as_stream(f).getvalue() for f in files]
+        out = [_new_report(getattr(f, 'name', None)) for f in files]
+
+        # Conteúdo repetido no mesmo lote é extraído uma única vez
+        pending: dict[str, list[int]] = {}
+        for i, payload in enumerate(payloads):
+            digest = hashlib.sha256(payload).hexdigest()
+            out[i]['sha256'] = digest
+            if digest in pending:
+                pending[digest].append(i)
+                continue
+            if self.cache is not None:
+                start = time.perf_counter()
+                found, params, text, partial = self._lookup_cache(digest)
+                if found:
+                    _finish_report(out[i], None, params, 0, _new_diag('cache'), start)
+                    yield i, out[i]
+                    continue
+                cached = self._parse_cached(text, partial) if text is not None else None
+                if cached is not None:
+                    params, diag = cached
+                    self.cache.put(digest, self.patterns_version, text, params, partial)
+                    _finish_report(out[i], text, params, 0, diag, start)
+                    yield i, out[i]
+                    continue
+            pending[digest] = [i]
+
+        workers = workers or os.cpu_count() or 1
+        order = (self.backend_order, self.optional_backends, self._template_state())
+        if executor is not None:
+            done = self._run_pending(executor, pending, payloads, order, cancelled, 4 * workers)
+        elif workers <= 1 or len(pending) <= 1:
+            done = self._run_serial(pending, payloads, order, cancelled)
+        else:
+            done = self._run_pool(min(workers, len(pending)), pending, payloads, order, cancelled)
 
-    def _extract_with_pdfplumber(self, uploaded_file) -> str | None:
         try:
-            uploaded_file.seek(0)
-            with pdfplumber.open(BytesIO(uploaded_file.read())) as pdf:
-                parts = []
-                for p in pdf.pages:
-                    t = p.extract_text() or ""
-                    parts.append(t)
-            return "\n".join(parts).lower()
-        except Exception:
-            return None
+            for digest, indices, result, error in done:
+                if error is None:
+                    text, params, pages_read, diag = result
+                    self._observe(diag)
+                    if self.cache is not None:
+                        self.cache.put(digest, self.patterns_version, text, params, diag['text_partial'])
+                for i in indices:
+                    if error is None:
+                        _finish_report(out[i], text, params, pages_read, diag, None)
+                        if params is not None:
+                            out[i]['data'] = dict(params)
+                    else:
+                        out[i]['error'] = error
+                        out[i]['rejection'] = error
+                    yield i, out[i]
+        finally:
+            done.close()
+            if self.templates is not None:
+                self.templates.save()
+
+    @staticmethod
+    def create_pool(workers: int | None = None, warm: bool = False) -> ProcessPoolExecutor:
+        # spawn: o servidor do Streamlit é multithread e fork pode travar os workers. Cada worker
+        # importa os backends ao subir; com warm, todos sobem já, e não no primeiro lote
+        workers = workers or os.cpu_count() or 1
+        pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=load_backends
+        )
+        if warm:
+            for _ in range(workers):
+                pool.submit(load_backends)
+        return pool
+
+    def _run_serial(self, pending: dict[str, list[int]], payloads: list[bytes], order: tuple, cancelled=None):
+        for n, (digest, indices) in enumerate(pending.items()):
+            if cancelled is not None and cancelled():
+                return
+            order = self._refresh_templates(order, n)
+            try:
+                result = _extract_worker(payloads[indices[0]], self.parameter_patterns, self.streaming, *order)
+            except Exception as exc:
+                yield digest, indices, None, f"{type(exc).__name__}: {exc}"
+            else:
+                yield digest, indices, result, None
 
-    def _extract_with_pypdf2(self, uploaded_file) -> str | None:
+    def _run_pool(self, workers: int, pending: dict[str, list[int]], payloads: list[bytes], order: tuple, cancelled=None):
+        pool = self.create_pool(workers)
         try:
-            uploaded_file.seek(0)
-            reader = PyPDF2.PdfReader(BytesIO(uploaded_file.read()))
-            parts = []
-            for page in reader.pages:
-                parts.append(page.extract_text() or "")
-            return "\n".join(parts).lower()
-        except Exception:
+            yield from self._run_pending(pool, pending, payloads, order, cancelled, 4 * workers)
+        finally:
+            pool.shutdown(wait=True)
+
+    def _run_pending(
+        self, pool: Executor, pending: dict[str, list[int]], payloads: list[bytes], order: tuple, cancelled=None, window: int = 64
+    ):
+        # Serviço compartilhado entre sessões (submit_keyed): o mesmo PDF pedido ao mesmo tempo por várias
+        # sessões, com os mesmos padrões e backends, é extraído uma vez só. O envio é feito em janela
+        # (max_pending do serviço, senão window): além dela o serviço bloqueia o envio, e os laudos já
+        # prontos ficariam retidos até o último PDF entrar na fila; entre janelas, os modelos aprendidos
+        # com os laudos já lidos passam a valer
+        keyed = getattr(pool, 'submit_keyed', None)
+        window = max(getattr(pool, 'max_pending', None) or window, 1)
+        variant = (self.patterns_version, self.streaming, tuple(order[0]), tuple((b, tuple(p)) for b, p in order[1].items()))
+        queue = iter(pending.items())
+        futures = {}
+        submitted = 0
+        try:
+            while True:
+                while len(futures) < window and not (cancelled is not None and cancelled()):
+                    item = next(queue, None)
+                    if item is None:
+                        break
+                    digest, indices = item
+                    order = self._refresh_templates(order, submitted)
+                    submitted += 1
+                    args = (payloads[indices[0]], self.parameter_patterns, self.streaming, *order)
+                    fut = keyed((digest, *variant), _extract_worker, *args) if keyed else pool.submit(_extract_worker, *args)
+                    futures[fut] = (digest, indices)
+                if not futures or (cancelled is not None and cancelled()):
+                    return
+                # Com cancelled, a espera é curta para o cancelamento não aguardar o próximo laudo
+                ready, _ = wait(futures, timeout=0.5 if cancelled is not None else None, return_when=FIRST_COMPLETED)
+                for fut in ready:
+                    digest, indices = futures.pop(fut)
+                    try:
+                        result = fut.result()
+                    except Exception as exc:
+                        yield digest, indices, None, f"{type(exc).__name__}: {exc}"
+                    else:
+                        yield digest, indices, result, None
+        finally:
+            # Interrompido antes do fim (lote cancelado): os laudos ainda na fila não são extraídos
+            for fut in futures:
+                fut.cancel()
+
+    def _lookup_cache(self, digest: str) -> tuple[bool, dict | None, str | None, bool]:
+        found, params = self.cache.get_result(digest, self.patterns_version)
+        if found:
+            return True, params, None, False
+        # Texto bruto em cache: só os regexes são reaplicados, o PDF não é reaberto
+        return False, None, *self.cache.get_text(digest)
+
+    def _parse_cached(self, text: str, partial: bool) -> tuple[dict | None, dict] | None:
+        # Texto parcial (leitura interrompida na parada antecipada) só basta se nele todos os parâmetros
+        # casam o padrão de maior precedência, como a leitura em streaming exigiria; senão, None e o PDF
+        # é lido de novo
+        if partial:
+            found = self.scanner.scan(text)
+            if any(found.get(p, (None,))[0] != 0 for p in self.scanner.params):
+                return None
+        diag = _new_diag('cache (texto)')
+        diag['text_partial'] = partial
+        params = self._parse_parameters(text, diag) if text else None
+        diag['metadata'] = extract_metadata(text) if text else {}
+        return params, diag
+
+    def _observe(self, diag: dict) -> None:
+        if self.backend_stats is not None:
+            self.backend_stats.record(diag['backend_trace'])
+        if self.templates is not None:
+            self.templates.observe(diag)
+
+    def _refresh_templates(self, order: tuple, submitted: int) -> tuple:
+        if self.templates is None or submitted == 0 or submitted % TEMPLATE_REFRESH:
+            return order
+        return (*order[:2], self._template_state())
+
+    def _template_state(self) -> tuple | None:
+        if self.templates is None:
             return None
+        return self.templates.trusted(), self.templates.verify_every
 
-    def _parse_parameters(self, text: str) -> dict | None:
-        out: dict[str, float] = {}
-        for key, patterns in self.parameter_patterns.items():
-            value = self._extract_first_number(text, patterns)
-            if value is not None:
-                out[key] = value
-        return out if len(out) >= 3 else None
+    def _extract_stream(
+        self, stream, order: list[str] | None = None, optional: dict[str, list[str]] | None = None, templates: tuple | None = None
+    ) -> tuple[str | None, dict | None, int, dict]:
+        # Texto None indica leitura combinada de vários backends; "" indica PDF sem texto extraível. O texto
+        # de uma leitura interrompida volta marcado em diag['text_partial']
+        start = time.perf_counter()
+        scanner = self.scanner
+        diag = _new_diag()
+        if templates is not None:
+            self._trusted, self._verify_every = templates
+        expected = scanner.params
+        best: dict[str, tuple[int, float]] = {}
+        sources: dict[str, str] = {}
+        texts: list[tuple[str, bool]] = []
+        readers: list[str] = []
+        pages_read = 0
 
-    def _extract_first_number(self, text: str, patterns: list[str]) -> float | None:
-        for pat in patterns:
-            for m in re.finditer(pat, text, re.IGNORECASE | re.DOTALL):
-                try:
-                    v = float(m.group(1).replace(',', '.'))
-                    return v
-                except Exception:
+        # Do backend mais barato ao mais caro; os seguintes só procuram os parâmetros que faltam
+        order = order or self.backend_order
+        optional = self.optional_backends if optional is None else optional
+        for i, name in enumerate(order):
+            missing = [p for p in expected if p not in best]
+            if not missing:
+                break
+            if name in optional and len(best) >= 3 and set(missing) <= set(optional[name]):
+                # Só faltam parâmetros que este backend quase nunca recupera; a amostragem mantém a medição
+                if random.random() * EXPLORE_EVERY >= 1:
                     continue
-        return None
+            step_start = time.perf_counter()
+            found, parts, complete, error = self._run_backend(name, stream, missing, diag, first=(i == 0))
+            if diag['template'] == 'hit':
+                # Modelo validado: parâmetros que o laboratório não informa não justificam outro backend
+                expected = diag['template_params']
+            pages_read += len(parts)
+            diag['backend_trace'].append({
+                'backend': name,
+                'seconds': time.perf_counter() - step_start,
+                'pages': len(parts),
+                'sought': len(missing),
+                'found': len(found),
+                'missing': missing,
+                'recovered': list(found),
+                'error': error is not None,
+            })
+            if error is not None:
+                diag['backend_errors'].append(f"{name}: {error}")
+            if not any(parts):
+                continue
+            texts.append(("\n".join(parts), not complete))
+            readers.append(name)
+            best.update(found)
+            sources.update({p: name for p in found})
+
+        if not texts:
+            diag['seconds'] = time.perf_counter() - start
+            return "", None, pages_read, diag
+        used = list(dict.fromkeys(sources.values()))
+        diag['backend'] = "+".join(used) if used else readers[0]
+        diag['matches'] = {p: best[p][0] for p in scanner.params if p in best}
+        diag['sources'] = {p: sources[p] for p in scanner.params if p in sources}
+        out = {p: best[p][1] for p in scanner.params if p in best}
+        # Só o texto de um único backend serve para reparsear a partir do cache
+        text, diag['text_partial'] = texts[0] if len(texts) == 1 else (None, False)
+        diag['seconds'] = time.perf_counter() - start
+        return text, (out if len(out) >= 3 else None), pages_read, diag
+
+    def _run_backend(
+        self, name: str, stream, wanted: list[str], diag: dict, first: bool = False
+    ) -> tuple[dict, list[str], bool, str | None]:
+        found: dict[str, tuple[int, float]] = {}
+        parts: list[str] = []
+        template = None
+        target = wanted
+        complete = True
+        error = None
+        try:
+            for page_text in BACKENDS[name](stream):
+                parts.append(page_text)
+                if first and len(parts) == 1:
+                    # Data da coleta, lote e laboratório ficam no cabeçalho da 1ª página
+                    diag['metadata'] = extract_metadata(page_text)
+                if first and len(parts) == 1 and self._trusted is not None:
+                    diag['fingerprint'] = fingerprint(page_text)
+                    template = self._trusted.get(diag['fingerprint'])
+                    if template is not None and template.backend == name:
+                        # Layout conhecido: rótulos fixos em vez dos regexes genéricos, e só os
+                        # parâmetros que este laboratório informa
+                        target = [p for p in wanted if p in template.labels]
+                    else:
+                        template = None
+                if not self.streaming:
+                    continue
+                # Cada página é parseada assim que extraída, junto com a emenda com a anterior (valor
+                # quebrado entre páginas). Entre páginas vale a variante de padrão de maior precedência
+                # e, no empate, a mais próxima do início; por isso a leitura só para quando todos os
+                # parâmetros procurados casaram a melhor variante possível (a do rótulo, com modelo)
+                _scan_page(template or self.scanner, parts, found, target)
+                if all(p in found and found[p][0] <= (template.labels[p][0] if template else 0) for p in target):
+                    complete = False
+                    break
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            complete = False
+            if not self.streaming:
+                # Leitura integral que falhou no meio: descarta o texto parcial
+                return {}, [], False, error
+
+        if not self.streaming and any(parts):
+            text = "\n".join(parts)
+            found = {p: v for p, v in (template or self.scanner).scan(text).items() if p in target}
+
+        if template is not None:
+            found = self._check_template(template, found, target, wanted, parts, diag)
+        elif first and diag['fingerprint'] is not None and found:
+            diag['labels'] = learn_labels("\n".join(parts), found, self.parameter_patterns)
+            diag['labels_backend'] = name
+        return found, parts, complete, error
+
+    def _check_template(
+        self, template: LabTemplate, found: dict, target: list[str], wanted: list[str], parts: list[str], diag: dict
+    ) -> dict:
+        # Validação do caminho rápido: ao menos 3 valores lidos e nenhum rótulo do modelo presente sem
+        # valor (rótulo ausente é parâmetro que este laudo não informa); por amostragem, os valores
+        # também são conferidos com o caminho genérico
+        omitted = [p for p in target if p not in found]
+        if omitted:
+            text = "\n".join(parts)
+            broken = any(template.labels[p][1] in text for p in omitted)
+        else:
+            broken = False
+        if broken or len(found) < 3:
+            diag['template'] = 'fallback'
+            return self._generic_scan(parts, wanted)
+        diag['template'] = 'hit'
+        diag['template_params'] = [p for p in target if p in found]
+        if random.random() * self._verify_every < 1:
+            generic = self._generic_scan(parts, wanted)
+            if any(p not in generic or generic[p][1] != v for p, (_, v) in found.items()) or any(p in generic for p in omitted):
+                diag['template_mismatch'] = True
+                diag['template'] = 'fallback'
+                return generic
+        return found
+
+    def _generic_scan(self, parts: list[str], wanted: list[str]) -> dict:
+        found: dict[str, tuple[int, float]] = {}
+        if self.streaming:
+            for k in range(len(parts)):
+                _scan_page(self.scanner, parts[max(0, k - 1):k + 1], found, wanted)
+        else:
+            found = {p: v for p, v in self.scanner.scan("\n".join(parts)).items() if p in wanted}
+        return found
+
+    @property
+    def scanner(self) -> PatternScanner:
+        # Recompilado apenas quando parameter_patterns muda. Os workers criam um extrator por PDF: o
+        # scanner de cada conjunto de padrões fica no processo e é reaproveitado entre eles
+        key = tuple((k, tuple(v)) for k, v in self.parameter_patterns.items())
+        if self._scanner is None or self._scanner_key != key:
+            scanner = _SCANNERS.get(key)
+            if scanner is None:
+                if len(_SCANNERS) >= MAX_SCANNERS:
+                    _SCANNERS.clear()
+                scanner = _SCANNERS[key] = PatternScanner(self.parameter_patterns)
+            self._scanner = scanner
+            self._scanner_key = key
+        return self._scanner
+
+    def _parse_parameters(self, text: str, diag: dict | None = None) -> dict | None:
+        scanner = self.scanner
+        found = scanner.scan(text)
+        if diag is not None:
+            diag['matches'] = {p: found[p][0] for p in scanner.params if p in found}
+        out = {p: found[p][1] for p in scanner.params if p in found}
+        return out if len(out) >= 3 else None
+
+
+def _as_stream(uploaded_file) -> BytesIO:
+    # UploadedFile do Streamlit já é um BytesIO: os backends leem o mesmo buffer, sem cópia
+    if isinstance(uploaded_file, BytesIO):
+        return uploaded_file
+    uploaded_file.seek(0)
+    return BytesIO(uploaded_file.read())
+
+
+def _new_report(name: str | None) -> dict:
+    return {
+        'name': name,
+        'data': None,
+        'error': None,
+        'pages_read': 0,
+        'seconds': 0.0,
+        'backend': None,
+        'matches': {},
+        'sources': {},
+        'backend_errors': [],
+        'rejection': None,
+        'template': None,
+        'sha256': None,
+        'metadata': {},
+    }
+
+
+def _new_diag(backend: str | None = None) -> dict:
+    # backend(s) que forneceram os valores, índice do padrão que casou por parâmetro, exceções
+    # engolidas, o custo de cada backend tentado e o uso do modelo do laboratório
+    return {
+        'backend': backend,
+        'matches': {},
+        'sources': {},
+        'backend_errors': [],
+        'backend_trace': [],
+        'seconds': 0.0,
+        'fingerprint': None,
+        'template': None,
+        'labels': {},
+        'metadata': {},
+        'text_partial': False,
+    }
+
+
+def _scan_page(scanner, parts: list[str], found: dict, wanted: list[str]) -> None:
+    # Última página de parts; a emenda com a anterior vem antes, por ficar mais perto do início
+    if len(parts) > 1:
+        _merge_page(found, scanner.scan(parts[-2][-SEAM:] + "\n" + parts[-1][:SEAM]), wanted)
+    _merge_page(found, scanner.scan(parts[-1]), wanted)
+
+
+def _merge_page(found: dict, page_found: dict, wanted: list[str]) -> None:
+    for param, (rank, value) in page_found.items():
+        if param in wanted and (param not in found or rank < found[param][0]):
+            found[param] = (rank, value)
+
+
+def _finish_report(report: dict, text: str | None, params: dict | None, pages_read: int, diag: dict, start: float | None) -> None:
+    report['data'] = params
+    report['pages_read'] = pages_read
+    report['seconds'] = time.perf_counter() - start if start is not None else diag['seconds']
+    report['backend'] = diag['backend']
+    report['matches'] = dict(diag['matches'])
+    report['sources'] = dict(diag['sources'])
+    report['backend_errors'] = list(diag['backend_errors'])
+    report['template'] = diag.get('template')
+    report['metadata'] = dict(diag['metadata'])
+    if params is not None:
+        report['rejection'] = None
+    elif diag['backend'] == 'cache':
+        report['rejection'] = "Parâmetros insuficientes (resultado em cache)"
+    elif text == "" and diag['backend'] is None:
+        report['rejection'] = "PDF sem texto extraível" + (f" ({'; '.join(diag['backend_errors'])})" if diag['backend_errors'] else "")
+    else:
+        report['rejection'] = f"Apenas {len(diag['matches'])} parâmetro(s) encontrado(s); mínimo de 3"
+
 
+def _extract_worker(
+    payload: bytes,
+    parameter_patterns: dict,
+    streaming: bool = False,
+    order: list[str] | None = None,
+    optional: dict[str, list[str]] | None = None,
+    templates: tuple | None = None,
+) -> tuple[str | None, dict | None, int, dict]:
+    extractor = PDFExtractor(streaming=streaming, backends=order)
+    extractor.parameter_patterns = parameter_patterns
+    return extractor._extract_stream(BytesIO(payload), order, optional, templates)
@@ -0,0 +1,272 @@
+import base64
+import html
+import math
+from datetime import datetime
+from io import BytesIO
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+from matplotlib import cbook
+from matplotlib.figure import Figure
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.drawing.image import Image
+from openpyxl.styles import Font
+
+from lab_dataset import ORIGINS, LabDataset
+
+
+COLORS = {'Mineradora': '#1f77b4', 'Distribuidora': '#ff7f0e'}
+
+
+def _interval(ci) -> str | None:
+    if not ci or any(v is None or v != v for v in ci):
+        return None
+    return f"{ci[0]:.4g} a {ci[1]:.4g}"
+
+
+class ReportExporter:
+    # Relatório de uma análise em .xlsx (modo write-only do openpyxl: as linhas vão para o disco à medida
+    # que são escritas, sem montar a planilha em memória) e em HTML autocontido
+    def __init__(self, chunk_rows: int = 10_000, html_rows: int = 1_000, dpi: int = 110, max_outliers: int = 200) -> None:
+        self.chunk_rows = chunk_rows
+        # O HTML leva só as primeiras linhas dos laudos; a planilha leva todas
+        self.html_rows = html_rows
+        self.dpi = dpi
+        self.max_outliers = max_outliers
+
+    def figures(self, dataset: LabDataset, results: dict) -> dict[str, bytes]:
+        # Figuras estáticas (PNG) com matplotlib sem pyplot: seguro em threads de segundo plano
+        out = {}
+        params = [p for p in dataset.columns if any(len(dataset.values(o, p)) for o in ORIGINS)]
+        if params:
+            fig = Figure(figsize=(3.2 * len(params), 4.2), dpi=self.dpi, layout='constrained')
+            axes = fig.subplots(1, len(params), squeeze=False)[0]
+            for ax, p in zip(axes, params):
+                stats, labels = [], []
+                for origin in ORIGINS:
+                    y = dataset.values(origin, p)
+                    if not len(y):
+                        continue
+                    s = cbook.boxplot_stats(y)[0]
+                    step = max(1, len(s['fliers']) // self.max_outliers)
+                    s['fliers'] = np.sort(s['fliers'])[::step]
+                    stats.append(s)
+                    labels.append(origin)
+                box = ax.bxp(stats, patch_artist=True, showfliers=True)
+                for patch, origin in zip(box['boxes'], labels):
+                    patch.set_facecolor(COLORS[origin])
+                ax.set_xticks(range(1, len(labels) + 1), labels, rotation=20)
+                ax.set_title(p, fontsize=10)
+            fig.suptitle("Comparação por Parâmetro")
+            out['boxplots'] = self._png(fig)
+
+        effects = sorted(
+            (
+                (p, abs(r.get('effect_size') or 0.0))
+                for p, r in results.items()
+                if r.get('p_value') is not None and r['p_value'] == r['p_value'] and r['p_value'] < 0.05
+            ),
+            key=lambda e: -e[1],
+        )
+        fig = Figure(figsize=(7, 4), dpi=self.dpi, layout='constrained')
+        ax = fig.subplots()
+        if effects:
+            names = [p for p, _ in effects]
+            values = np.array([e for _, e in effects])
+            ax.bar(names, values, color='steelblue', label='Tamanho do Efeito')
+            ax.set_ylabel('Tamanho do Efeito')
+            ax.tick_params(axis='x', rotation=20)
+            twin = ax.twinx()
+            twin.plot(names, np.cumsum(values) / values.sum() * 100.0, color='red', marker='o', label='% Acumulativa')
+            twin.set_ylim(0, 100)
+            twin.set_ylabel('% Acumulativa')
+        else:
+            ax.text(0.5, 0.5, "Nenhuma divergência significativa", ha='center', va='center', transform=ax.transAxes)
+            ax.set_axis_off()
+        ax.set_title('Pareto de Divergências')
+        out['pareto'] = self._png(fig)
+        return out
+
+    def _png(self, fig: Figure) -> bytes:
+        buf = BytesIO()
+        fig.savefig(buf, format='png')
+        return buf.getvalue()
+
+    @staticmethod
+    def results_table(results: dict) -> pd.DataFrame:
+        rows = []
+        for param, r in results.items():
+            rows.append({
+                'Parâmetro': param,
+                'Média Mineradora': r.get('mean_mineradora'),
+                'Média Distribuidora': r.get('mean_distribuidora'),
+                'Mediana Mineradora': r.get('median_mineradora'),
+                'Mediana Distribuidora': r.get('median_distribuidora'),
+                'Desv. Padrão Mineradora': r.get('std_mineradora'),
+                'Desv. Padrão Distribuidora': r.get('std_distribuidora'),
+                'IC 95% Mineradora': _interval(r.get('ci_mineradora')),
+                'IC 95% Distribuidora': _interval(r.get('ci_distribuidora')),
+                'Teste Aplicado': r.get('test_used'),
+                'p-valor': r.get('p_value'),
+                'Tamanho do Efeito': r.get('effect_size'),
+            })
+        return pd.DataFrame(rows)
+
+    @staticmethod
+    def classification_table(classifications: dict, samples: dict | None) -> pd.DataFrame:
+        rows = []
+        summary = (samples or {}).get('summary', {})
+        for param, c in classifications.items():
+            row = {'Parâmetro': param, 'Classificação': c['classification'], 'Detalhes': c['details']}
+            for origin in ORIGINS:
+                s = summary.get(origin, {}).get(param)
+                row[f'Fora do padrão ({origin})'] = s['out_of_spec_rate'] if s and s['has_limits'] else None
+                row[f'Divergentes ({origin})'] = s['divergent_rate'] if s and s['has_criterion'] else None
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    @staticmethod
+    def causes_table(ranking: list[dict]) -> pd.DataFrame:
+        return pd.DataFrame(
+            [
+                {
+                    'Categoria': r['categoria'],
+                    'Causa': r['causa'],
+                    'Pontuação': r['share'],
+                    'Evidência': ", ".join(r['parametros']),
+                    'Confirmações': r['confirmacoes'],
+                }
+                for r in ranking
+            ],
+            columns=['Categoria', 'Causa', 'Pontuação', 'Evidência', 'Confirmações'],
+        )
+
+    @staticmethod
+    def sample_table(frame: pd.DataFrame, samples: dict) -> pd.DataFrame:
+        # Identificação de cada laudo com as marcas por parâmetro (-1 abaixo, 1 acima do limite)
+        flags = samples['flags']
+        ids = [c for c in ('arquivo', 'origem', 'data_amostra', 'lote', 'amostra', 'nota_fiscal') if c in frame.columns]
+        out = frame.loc[flags.index, ids].copy()
+        for col in flags.columns:
+            out[col] = flags[col].to_numpy()
+        return out
+
+    def _chunks(self, rows: pd.DataFrame | Iterable[pd.DataFrame]):
+        if isinstance(rows, pd.DataFrame):
+            for start in range(0, len(rows), self.chunk_rows):
+                yield rows.iloc[start:start + self.chunk_rows]
+        else:
+            yield from rows
+
+    def _append_frame(self, ws, chunks: Iterable[pd.DataFrame], header_font: Font) -> int:
+        written = 0
+        header = None
+        for chunk in chunks:
+            if header is None:
+                header = list(chunk.columns)
+                # Em planilhas write-only o congelamento só vale se definido antes da primeira linha
+                ws.freeze_panes = 'A2'
+                ws.append([self._header(ws, h, header_font) for h in header])
+            # Conversão do bloco inteiro para tipos do Python, com NaN/pd.NA como célula vazia
+            values = chunk.astype(object).where(chunk.notna(), None)
+            for row in values.itertuples(index=False, name=None):
+                ws.append(row)
+            written += len(chunk)
+        return written
+
+    @staticmethod
+    def _header(ws, value: str, font: Font) -> WriteOnlyCell:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = font
+        return cell
+
+    def write_excel(
+        self,
+        target,
+        rows: pd.DataFrame | Iterable[pd.DataFrame],
+        results: dict,
+        classifications: dict,
+        samples: dict | None = None,
+        ranking: list[dict] | None = None,
+        sample_rows: pd.DataFrame | Iterable[pd.DataFrame] | None = None,
+        figures: dict[str, bytes] | None = None,
+    ) -> int:
+        # target: caminho ou arquivo binário. Devolve o nº de laudos gravados
+        wb = Workbook(write_only=True)
+        bold = Font(bold=True)
+
+        ws = wb.create_sheet("Resultados")
+        self._append_frame(ws, [self.results_table(results)], bold)
+        ws = wb.create_sheet("Classificação")
+        self._append_frame(ws, [self.classification_table(classifications, samples)], bold)
+        if ranking:
+            ws = wb.create_sheet("Causas")
+            self._append_frame(ws, [self.causes_table(ranking)], bold)
+        if sample_rows is not None:
+            ws = wb.create_sheet("Classificação por amostra")
+            self._append_frame(ws, self._chunks(sample_rows), bold)
+        ws = wb.create_sheet("Laudos")
+        written = self._append_frame(ws, self._chunks(rows), bold)
+        if figures:
+            ws = wb.create_sheet("Figuras")
+            row = 1
+            for name, png in figures.items():
+                image = Image(BytesIO(png))
+                image.anchor = f"A{row}"
+                ws.add_image(image)
+                row += math.ceil(image.height / 20) + 2
+        wb.save(target)
+        return written
+
+    def write_html(
+        self,
+        fh,
+        rows: pd.DataFrame | Iterable[pd.DataFrame],
+        results: dict,
+        classifications: dict,
+        samples: dict | None = None,
+        ranking: list[dict] | None = None,
+        sample_rows: pd.DataFrame | None = None,
+        figures: dict[str, bytes] | None = None,
+        title: str = "Análise de Laudos de Diesel",
+    ) -> None:
+        # fh: arquivo de texto; figuras embutidas em base64, sem dependências externas
+        fh.write(
+            f"<!DOCTYPE html><html lang='pt-BR'><head><meta charset='utf-8'><title>{html.escape(title)}</title>"
+            "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;font-size:13px;margin-bottom:1.5em}"
+            "th,td{border:1px solid #ccc;padding:3px 6px;text-align:right}th{background:#f0f0f0}"
+            "td:first-child,th:first-child{text-align:left}img{max-width:100%}</style></head><body>"
+        )
+        fh.write(f"<h1>{html.escape(title)}</h1><p>Gerado em {datetime.now():%d/%m/%Y %H:%M}</p>")
+        fh.write("<h2>Resultados da Análise Estatística</h2>")
+        fh.write(self._html_table(self.results_table(results)))
+        fh.write("<h2>Diagnóstico de Divergências</h2>")
+        fh.write(self._html_table(self.classification_table(classifications, samples)))
+        for name, png in (figures or {}).items():
+            fh.write(f"<img alt='{html.escape(name)}' src='data:image/png;base64,{base64.b64encode(png).decode('ascii')}'>")
+        if ranking:
+            fh.write("<h2>Possíveis Causas (Ishikawa)</h2>")
+            fh.write(self._html_table(self.causes_table(ranking)))
+        flagged = None
+        if sample_rows is not None:
+            flagged = sample_rows[sample_rows['fora_do_padrao'] | sample_rows['divergente']]
+        if flagged is not None and len(flagged):
+            fh.write(f"<h2>Amostras sinalizadas ({len(flagged)})</h2>")
+            fh.write(self._html_table(flagged.head(self.html_rows)))
+        shown, total = [], 0
+        for chunk in self._chunks(rows):
+            if total < self.html_rows:
+                shown.append(chunk.head(self.html_rows - total))
+            total += len(chunk)
+        fh.write(f"<h2>Laudos ({total})</h2>")
+        if total > self.html_rows:
+            fh.write(f"<p>Primeiros {self.html_rows} laudos; a planilha traz todos.</p>")
+        if shown:
+            fh.write(self._html_table(pd.concat(shown)))
+        fh.write("</body></html>")
+
+    @staticmethod
+    def _html_table(df: pd.DataFrame) -> str:
+        return df.to_html(index=False, na_rep="-", float_format=lambda v: f"{v:.4g}", border=0)
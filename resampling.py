@@ -0,0 +1,127 @@
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations, islice
+
+import numpy as np
+
+
+STATISTICS = ('mean', 'median')
+# Teto de elementos por matriz de índices (int64): ~64 MB por bloco, independente de n
+MAX_CHUNK_ELEMENTS = 8_000_000
+
+
+class ResamplingEngine:
+    def __init__(
+        self,
+        n_resamples: int = 9999,
+        chunk_size: int = 1000,
+        workers: int = 1,
+        seed: int | None = None,
+        statistic: str = 'mean',
+    ) -> None:
+        if statistic not in STATISTICS:
+            raise ValueError(f"Estatística deve ser uma de {STATISTICS}")
+        self.n_resamples = n_resamples
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.seed = seed
+        self.statistic = statistic
+
+    def permutation_test(self, a: np.ndarray, b: np.ndarray) -> dict:
+        a = np.asarray(a, dtype=np.float64)
+        b = np.asarray(b, dtype=np.float64)
+        pooled = np.concatenate([a, b])
+        observed = _difference(pooled, len(a), np.arange(len(pooled))[None, :], self.statistic)[0]
+        tol = 1e-12 * max(1.0, abs(observed))
+
+        # Poucas permutações possíveis: enumera todas e o p-valor é exato
+        total = math.comb(len(pooled), len(a))
+        if total <= self.n_resamples:
+            extreme = 0
+            rows = self._rows(len(pooled))
+            it = combinations(range(len(pooled)), len(a))
+            while True:
+                block = list(islice(it, rows))
+                if not block:
+                    break
+                idx = _complete_permutation(np.array(block, dtype=np.int64), len(pooled))
+                diffs = _difference(pooled, len(a), idx, self.statistic)
+                extreme += int(np.count_nonzero(np.abs(diffs) >= abs(observed) - tol))
+            return {'statistic': float(observed), 'p_value': extreme / total, 'n_resamples': total, 'exact': True}
+
+        extreme = sum(self._map('permutation', pooled, len(a), abs(observed) - tol))
+        return {
+            'statistic': float(observed),
+            'p_value': (extreme + 1) / (self.n_resamples + 1),
+            'n_resamples': self.n_resamples,
+            'exact': False,
+        }
+
+    def bootstrap(self, a: np.ndarray, b: np.ndarray, confidence: float = 0.95) -> dict:
+        a = np.asarray(a, dtype=np.float64)
+        b = np.asarray(b, dtype=np.float64)
+        pooled = np.concatenate([a, b])
+        observed = _difference(pooled, len(a), np.arange(len(pooled))[None, :], self.statistic)[0]
+        diffs = np.concatenate(self._map('bootstrap', pooled, len(a), None))
+        tail = (1 - confidence) / 2
+        low, high = np.quantile(diffs, [tail, 1 - tail])
+        # p-valor bilateral pela inversão do intervalo percentil (H0: diferença = 0)
+        p = min(1.0, 2 * min(np.mean(diffs <= 0), np.mean(diffs >= 0)))
+        return {
+            'statistic': float(observed),
+            'ci': (float(low), float(high)),
+            'std_error': float(np.std(diffs, ddof=1)),
+            'p_value': float(p),
+            'n_resamples': self.n_resamples,
+        }
+
+    def _rows(self, n: int) -> int:
+        return max(1, min(self.chunk_size, MAX_CHUNK_ELEMENTS // max(n, 1)))
+
+    def _map(self, kind: str, pooled: np.ndarray, n_a: int, threshold: float | None) -> list:
+        rows = self._rows(len(pooled))
+        sizes = [rows] * (self.n_resamples // rows)
+        if self.n_resamples % rows:
+            sizes.append(self.n_resamples % rows)
+        # Uma semente filha por bloco: o resultado não depende do número de processos
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        jobs = list(zip(sizes, seeds))
+
+        if self.workers <= 1 or len(jobs) == 1:
+            return [_run_chunk(kind, pooled, n_a, self.statistic, size, seed, threshold) for size, seed in jobs]
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs)), mp_context=ctx) as pool:
+            futures = [
+                pool.submit(_run_chunk, kind, pooled, n_a, self.statistic, size, seed, threshold)
+                for size, seed in jobs
+            ]
+            return [f.result() for f in futures]
+
+
+def _run_chunk(kind: str, pooled: np.ndarray, n_a: int, statistic: str, size: int, seed, threshold):
+    rng = np.random.default_rng(seed)
+    n = len(pooled)
+    if kind == 'permutation':
+        idx = rng.permuted(np.broadcast_to(np.arange(n), (size, n)), axis=1)
+        diffs = _difference(pooled, n_a, idx, statistic)
+        return int(np.count_nonzero(np.abs(diffs) >= threshold))
+    idx_a = rng.integers(0, n_a, size=(size, n_a))
+    idx_b = rng.integers(n_a, n, size=(size, n - n_a))
+    return _difference(pooled, n_a, np.concatenate([idx_a, idx_b], axis=1), statistic)
+
+
+def _difference(pooled: np.ndarray, n_a: int, idx: np.ndarray, statistic: str) -> np.ndarray:
+    # Cada linha de idx é uma reamostragem: as n_a primeiras colunas formam o grupo A
+    values = pooled[idx]
+    if statistic == 'mean':
+        return values[:, :n_a].mean(axis=1) - values[:, n_a:].mean(axis=1)
+    return np.median(values[:, :n_a], axis=1) - np.median(values[:, n_a:], axis=1)
+
+
+def _complete_permutation(chosen: np.ndarray, n: int) -> np.ndarray:
+    # Acrescenta a cada combinação os índices restantes, formando uma permutação completa
+    mask = np.ones((len(chosen), n), dtype=bool)
+    np.put_along_axis(mask, chosen, False, axis=1)
+    rest = np.nonzero(mask)[1].reshape(len(chosen), n - chosen.shape[1])
+    return np.concatenate([chosen, rest], axis=1)
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from lab_dataset import LabDataset
+
+
+def dataset_fingerprint(data: LabDataset) -> str:
+    # Depende só dos valores extraídos por origem e parâmetro (não de nomes de arquivo ou do DataFrame)
+    h = hashlib.sha256()
+    for origin in sorted(data.origins):
+        for col in sorted(data.columns):
+            values = data.values(origin, col)
+            h.update(f"{origin}\0{col}\0{len(values)}\0".encode())
+            h.update(values.tobytes())
+    return h.hexdigest()
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    # Para resultados que dependem da ordem e das colunas não numéricas (datas de coleta, por exemplo)
+    h = hashlib.sha256("\0".join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def settings_fingerprint(*components) -> str:
+    # Atributos públicos de cada componente (alpha, limites, critérios, estratégia de teste...)
+    state = [
+        (type(c).__name__, {k: v for k, v in vars(c).items() if not k.startswith('_')})
+        for c in components
+    ]
+    payload = json.dumps(state, sort_keys=True, default=lambda o: {k: v for k, v in vars(o).items() if not k.startswith('_')})
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    # LRU em memória compartilhado entre sessões; os valores devolvidos não devem ser alterados
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, object] = OrderedDict()
+        self._lock = threading.Lock()
+        self._timings: dict[str, dict] = {}
+
+    def get_or_compute(self, kind: str, key: tuple, compute):
+        start = time.perf_counter()
+        full_key = (kind,) + tuple(key)
+        with self._lock:
+            if full_key in self._entries:
+                self._entries.move_to_end(full_key)
+                value = self._entries[full_key]
+                self._record(kind, 'hit', time.perf_counter() - start)
+                return value
+
+        # Cálculo fora do lock: sessões concorrentes não esperam umas pelas outras
+        value = compute()
+        with self._lock:
+            self._entries[full_key] = value
+            self._entries.move_to_end(full_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._record(kind, 'miss', time.perf_counter() - start)
+        return value
+
+    def _record(self, kind: str, outcome: str, elapsed: float) -> None:
+        t = self._timings.setdefault(kind, {'hit': 0, 'miss': 0, 'hit_seconds': 0.0, 'miss_seconds': 0.0})
+        t[outcome] += 1
+        t[f'{outcome}_seconds'] += elapsed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            per_kind = {k: dict(v) for k, v in self._timings.items()}
+            entries = len(self._entries)
+        return {
+            'entries': entries,
+            'hits': sum(v['hit'] for v in per_kind.values()),
+            'misses': sum(v['miss'] for v in per_kind.values()),
+            'hit_seconds': sum(v['hit_seconds'] for v in per_kind.values()),
+            'miss_seconds': sum(v['miss_seconds'] for v in per_kind.values()),
+            'per_kind': per_kind,
+        }
@@ -0,0 +1,56 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+
+DEFAULT_RULES = Path(__file__).resolve().parent / "regras_classificacao.json"
+
+
+def load_rules(path: str | Path | None = None) -> dict:
+    with Path(path or DEFAULT_RULES).open(encoding="utf-8") as fh:
+        rules = json.load(fh)
+    limits = rules.get('normative_limits', {})
+    for param, lim in limits.items():
+        if not {'min', 'max'} <= lim.keys() or lim['min'] > lim['max']:
+            raise ValueError(f"Limite normativo inválido para {param}: {lim}")
+    return {'normative_limits': limits, 'divergence_criteria': rules.get('divergence_criteria', {})}
+
+
+class RuleSet:
+    # Limites e critérios como vetores alinhados a params (NaN = parâmetro sem regra): uma amostra
+    # por linha, um parâmetro por coluna, todas as comparações de uma vez
+    def __init__(self, normative_limits: dict, divergence_criteria: dict, params: list[str] | None = None) -> None:
+        self.params = params if params is not None else list(dict.fromkeys([*normative_limits, *divergence_criteria]))
+        self.low = np.array([normative_limits.get(p, {}).get('min', np.nan) for p in self.params], dtype=np.float64)
+        self.high = np.array([normative_limits.get(p, {}).get('max', np.nan) for p in self.params], dtype=np.float64)
+        self.divergence = np.array([divergence_criteria.get(p, np.nan) for p in self.params], dtype=np.float64)
+
+    def evaluate(self, values: np.ndarray, codes: np.ndarray, n_origins: int) -> dict:
+        # values: (amostras x params) na ordem de self.params; codes: origem de cada amostra (0..n_origins-1)
+        present = ~np.isnan(values)
+        below = values < self.low
+        above = values > self.high
+        # Divergência por amostra: distância até a média das demais origens, no critério do parâmetro
+        # Somas por origem como produto matricial com a codificação one-hot das origens (BLAS)
+        onehot = (codes[None, :] == np.arange(n_origins)[:, None]).astype(np.float64)
+        sums = onehot @ np.where(present, values, 0.0)
+        counts = onehot @ present.astype(np.float64)
+        other_counts = counts.sum(axis=0) - counts
+        with np.errstate(invalid='ignore', divide='ignore'):
+            reference = (sums.sum(axis=0) - sums) / other_counts
+        divergent = np.abs(values - reference[codes]) >= self.divergence
+
+        return {
+            'below': below,
+            'above': above,
+            'divergent': divergent,
+            'counts': {
+                'samples': counts,
+                'below': onehot @ below.astype(np.float64),
+                'above': onehot @ above.astype(np.float64),
+                'divergent': onehot @ divergent.astype(np.float64),
+            },
+            'reference': reference,
+        }
+
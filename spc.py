@@ -0,0 +1,244 @@
+import math
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+from classifier import ParameterClassifier
+from lab_dataset import ORIGINS
+
+
+D2 = 1.128  # d2 da amplitude móvel de 2 pontos: sigma = MR médio / d2
+SHEWHART_L = 3.0
+RULES = ['Limite normativo', 'Shewhart', 'EWMA', 'CUSUM ↑', 'CUSUM ↓']
+
+
+class ControlChart:
+    # Estado de um par origem x parâmetro. Os primeiros baseline_size laudos formam a linha de base
+    # (média e sigma pela amplitude móvel); a partir daí cada laudo atualiza EWMA e CUSUM em O(1).
+    def __init__(
+        self,
+        lam: float = 0.2,
+        L: float = 3.0,
+        h: float = 5.0,
+        baseline_size: int = 20,
+        shift: float | None = None,
+        spec: dict | None = None,
+    ) -> None:
+        self.lam = lam
+        self.L = L
+        self.h = h
+        self.baseline_size = baseline_size
+        self.shift = shift
+        self.spec = spec
+        self.center: float | None = None
+        self.sigma: float | None = None
+        self.k: float | None = None
+        self.count = 0
+        self.n = 0
+        self.ewma: float | None = None
+        self.cusum_hi = 0.0
+        self.cusum_lo = 0.0
+        self._baseline: list[float] = []
+        self._decay = 1.0
+        self._active: set[str] = set()
+
+    @property
+    def ready(self) -> bool:
+        return self.center is not None
+
+    def _freeze_baseline(self) -> None:
+        base = np.asarray(self._baseline)
+        self.center = float(base.mean())
+        mr = np.abs(np.diff(base))
+        sigma = float(mr.mean()) / D2 if len(mr) else 0.0
+        if sigma == 0.0:
+            sigma = float(base.std(ddof=1)) if len(base) > 1 else 0.0
+        self.sigma = sigma if sigma > 0.0 else 1e-12
+        # Referência do CUSUM: metade do menor desvio de interesse (o critério de divergência, quando existe)
+        self.k = (self.shift if self.shift is not None else self.sigma) / 2.0
+        self.ewma = self.center
+        self._baseline = []
+
+    def update(self, x: float) -> list[str]:
+        # Regras que passaram a alarmar neste laudo (início de episódio)
+        self.count += 1
+        flags = {'Limite normativo': bool(self.spec) and not (self.spec['min'] <= x <= self.spec['max'])}
+        if not self.ready:
+            self._baseline.append(x)
+            if len(self._baseline) >= self.baseline_size:
+                self._freeze_baseline()
+        else:
+            self.n += 1
+            one = 1.0 - self.lam
+            self.ewma = self.lam * x + one * self.ewma
+            self._decay *= one * one
+            width = self.L * self.sigma * math.sqrt(self.lam / (2.0 - self.lam) * (1.0 - self._decay))
+            self.cusum_hi = max(0.0, self.cusum_hi + x - self.center - self.k)
+            self.cusum_lo = max(0.0, self.cusum_lo + self.center - x - self.k)
+            limit = self.h * self.sigma
+            flags['Shewhart'] = abs(x - self.center) > SHEWHART_L * self.sigma
+            flags['EWMA'] = abs(self.ewma - self.center) > width
+            flags['CUSUM ↑'] = self.cusum_hi > limit
+            flags['CUSUM ↓'] = self.cusum_lo > limit
+        started = [r for r in RULES if flags.get(r) and r not in self._active]
+        self._active = {r for r, on in flags.items() if on}
+        return started
+
+    def run(self, values: np.ndarray) -> dict:
+        # Mesmo resultado de update() laudo a laudo, vetorizado: EWMA como filtro linear de 1ª ordem
+        # e CUSUM pela recursão de Lindley (soma acumulada menos o seu mínimo acumulado)
+        x = np.asarray(values, dtype=np.float64)
+        m = len(x)
+        nan = np.full(m, np.nan)
+        out = {'ewma': nan.copy(), 'ewma_ucl': nan.copy(), 'ewma_lcl': nan.copy(), 'cusum_hi': nan.copy(), 'cusum_lo': nan.copy()}
+        flags = {r: np.zeros(m, dtype=bool) for r in RULES}
+        if self.spec:
+            flags['Limite normativo'] = (x < self.spec['min']) | (x > self.spec['max'])
+        self.count += m
+
+        start = 0
+        if not self.ready:
+            start = min(m, self.baseline_size - len(self._baseline))
+            self._baseline.extend(x[:start].tolist())
+            if len(self._baseline) >= self.baseline_size:
+                self._freeze_baseline()
+        if self.ready and start < m:
+            y = x[start:]
+            one = 1.0 - self.lam
+            z = lfilter([self.lam], [1.0, -one], y, zi=[one * self.ewma])[0]
+            steps = np.arange(1, len(y) + 1)
+            decay = self._decay * one ** (2 * steps)
+            width = self.L * self.sigma * np.sqrt(self.lam / (2.0 - self.lam) * (1.0 - decay))
+            hi = _lindley(y - self.center - self.k, self.cusum_hi)
+            lo = _lindley(self.center - y - self.k, self.cusum_lo)
+            limit = self.h * self.sigma
+
+            out['ewma'][start:] = z
+            out['ewma_ucl'][start:] = self.center + width
+            out['ewma_lcl'][start:] = self.center - width
+            out['cusum_hi'][start:] = hi
+            out['cusum_lo'][start:] = lo
+            flags['Shewhart'][start:] = np.abs(y - self.center) > SHEWHART_L * self.sigma
+            flags['EWMA'][start:] = np.abs(z - self.center) > width
+            flags['CUSUM ↑'][start:] = hi > limit
+            flags['CUSUM ↓'][start:] = lo > limit
+
+            self.n += len(y)
+            self.ewma = float(z[-1])
+            self._decay = float(decay[-1])
+            self.cusum_hi = float(hi[-1])
+            self.cusum_lo = float(lo[-1])
+
+        starts = {}
+        for rule, flag in flags.items():
+            prev = np.empty(m, dtype=bool)
+            prev[:1] = rule in self._active
+            prev[1:] = flag[:-1]
+            starts[rule] = np.flatnonzero(flag & ~prev)
+        if m:
+            self._active = {r for r, flag in flags.items() if flag[-1]}
+        out['flags'] = flags
+        out['starts'] = starts
+        return out
+
+    def limits(self) -> dict:
+        if not self.ready:
+            return {}
+        return {
+            'center': self.center,
+            'sigma': self.sigma,
+            'ucl': self.center + SHEWHART_L * self.sigma,
+            'lcl': self.center - SHEWHART_L * self.sigma,
+            'k': self.k,
+            'cusum_limit': self.h * self.sigma,
+        }
+
+
+def _lindley(increments: np.ndarray, start: float) -> np.ndarray:
+    # C_t = max(0, C_{t-1} + y_t)  ==  S_t - min(-C_0, min_{s<=t} S_s)
+    s = np.cumsum(increments)
+    return s - np.minimum(np.minimum.accumulate(s), -start)
+
+
+class SPCMonitor:
+    def __init__(
+        self,
+        classifier: ParameterClassifier | None = None,
+        lam: float = 0.2,
+        L: float = 3.0,
+        h: float = 5.0,
+        baseline_size: int = 20,
+    ) -> None:
+        classifier = classifier or ParameterClassifier()
+        self.normative_limits = classifier.normative_limits
+        self.divergence_criteria = classifier.divergence_criteria
+        self.lam = lam
+        self.L = L
+        self.h = h
+        self.baseline_size = baseline_size
+        self._charts: dict[tuple[str, str], ControlChart] = {}
+
+    def chart(self, origin: str, param: str) -> ControlChart:
+        key = (origin, param)
+        if key not in self._charts:
+            self._charts[key] = ControlChart(
+                self.lam,
+                self.L,
+                self.h,
+                self.baseline_size,
+                shift=self.divergence_criteria.get(param),
+                spec=self.normative_limits.get(param),
+            )
+        return self._charts[key]
+
+    def update(self, origin: str, values: dict, label=None) -> list[dict]:
+        alarms = []
+        for param, v in values.items():
+            if param == 'origem' or not isinstance(v, (int, float)) or v != v:
+                continue
+            chart = self.chart(origin, param)
+            for rule in chart.update(float(v)):
+                alarms.append({'origem': origin, 'parametro': param, 'regra': rule, 'indice': chart.count - 1, 'data': label, 'valor': float(v)})
+        return alarms
+
+    def fit(self, frame: pd.DataFrame, date_column: str = 'data_amostra') -> dict:
+        # Recalcula tudo sobre o histórico em ordem cronológica (laudos sem data ficam no fim, na
+        # ordem recebida); o estado final permite seguir com update() a cada novo laudo
+        self._charts = {}
+        if date_column in frame.columns:
+            frame = frame.sort_values(date_column, kind='stable', na_position='last')
+        params = [c for c in frame.columns if c not in ('origem', date_column) and pd.api.types.is_numeric_dtype(frame[c])]
+        series: dict[str, dict[str, dict]] = {p: {} for p in params}
+        alarms = []
+        for origin in ORIGINS:
+            part = frame[frame['origem'] == origin]
+            dates = part[date_column].to_numpy(dtype=object) if date_column in part.columns else np.full(len(part), None)
+            for param in params:
+                values = part[param].to_numpy(dtype=np.float64, na_value=np.nan)
+                keep = ~np.isnan(values)
+                values, labels = values[keep], dates[keep]
+                if len(values) == 0:
+                    continue
+                chart = self.chart(origin, param)
+                result = chart.run(values)
+                result['value'] = values
+                result['labels'] = labels
+                result.update(chart.limits())
+                series[param][origin] = result
+                for rule, idx in result['starts'].items():
+                    alarms.extend(
+                        {'origem': origin, 'parametro': param, 'regra': rule, 'indice': int(i), 'data': labels[i], 'valor': float(values[i])}
+                        for i in idx
+                    )
+        spec = {p: self.normative_limits[p] for p in params if p in self.normative_limits}
+        return {'series': series, 'spec': spec, 'alarms': alarms, 'active': self.active_alarms()}
+
+    def active_alarms(self) -> list[dict]:
+        # Regras em alarme no laudo mais recente de cada origem x parâmetro
+        return [
+            {'origem': origin, 'parametro': param, 'regra': rule}
+            for (origin, param), chart in self._charts.items()
+            for rule in RULES
+            if rule in chart._active
+        ]
@@ -1,14 +1,35 @@
 import numpy as np
 import pandas as pd
 from scipy import stats
-from scipy.stats import shapiro, levene, ttest_ind, mannwhitneyu
+from scipy.stats import shapiro, levene, ttest_ind, ttest_ind_from_stats, ttest_rel, mannwhitneyu, wilcoxon
+
+from accumulators import LabAccumulator
+from grouped_analysis import SHAPIRO_MAX_N, grouped_comparison
+from lab_dataset import LabDataset
+import large_sample
+from resampling import ResamplingEngine
 
 
 class StatisticalAnalyzer:
-    def __init__(self, alpha: float = 0.05) -> None:
+    def __init__(
+        self,
+        alpha: float = 0.05,
+        test_strategy: str = 'classic',
+        resampling: ResamplingEngine | None = None,
+        large_sample_threshold: int | None = SHAPIRO_MAX_N,
+    ) -> None:
+        if test_strategy not in ('classic', 'permutation', 'bootstrap'):
+            raise ValueError("test_strategy deve ser 'classic', 'permutation' ou 'bootstrap'")
         self.alpha = alpha
+        self.test_strategy = test_strategy
+        self.resampling = resampling or ResamplingEngine()
+        # Acima deste tamanho (em qualquer das origens) os momentos saem de uma única passada, as
+        # séries são ordenadas uma vez para mediana, Levene e postos, e a normalidade passa a ser
+        # D'Agostino-Pearson; None mantém o caminho com as funções do scipy em qualquer tamanho
+        self.large_sample_threshold = large_sample_threshold
 
-    def perform_analysis(self, df: pd.DataFrame) -> dict:
+    def perform_analysis(self, df: pd.DataFrame | LabDataset) -> dict:
+        data = LabDataset.coerce(df)
         results: dict[str, dict] = {}
         params = [
             'viscosidade_40c',
@@ -18,16 +39,80 @@ class StatisticalAnalyzer:
             'particulas_14um',
         ]
         for p in params:
-            if p in df.columns:
-                results[p] = self._analyze_param(df, p)
+            if p in data:
+                results[p] = self._analyze_param(data, p)
         return results
 
-    def _analyze_param(self, df: pd.DataFrame, param: str) -> dict:
-        m = df[df['origem'] == 'Mineradora'][param].dropna()
-        d = df[df['origem'] == 'Distribuidora'][param].dropna()
+    def perform_paired_analysis(self, pairs: pd.DataFrame) -> dict:
+        # Pares vindos de pairing.match_reports: colunas <parâmetro>_mineradora e <parâmetro>_distribuidora
+        results: dict[str, dict] = {}
+        params = [
+            'viscosidade_40c',
+            'teor_agua',
+            'particulas_4um',
+            'particulas_6um',
+            'particulas_14um',
+        ]
+        for p in params:
+            a_col, b_col = f"{p}_mineradora", f"{p}_distribuidora"
+            if a_col not in pairs or b_col not in pairs:
+                continue
+            a = pairs[a_col].to_numpy(dtype=np.float64, na_value=np.nan)
+            b = pairs[b_col].to_numpy(dtype=np.float64, na_value=np.nan)
+            both = ~np.isnan(a) & ~np.isnan(b)
+            results[p] = self._analyze_pairs(a[both], b[both])
+        return results
+
+    def perform_grouped_analysis(self, df: pd.DataFrame, by: str | list[str]) -> pd.DataFrame:
+        params = [
+            'viscosidade_40c',
+            'teor_agua',
+            'particulas_4um',
+            'particulas_6um',
+            'particulas_14um',
+        ]
+        return grouped_comparison(df, by, params, alpha=self.alpha)
+
+    def analysis_from_accumulators(self, acc: LabAccumulator, confidence: float = 0.95) -> dict:
+        # Sem os dados brutos não há Shapiro-Wilk nem postos: usa Welch a partir das estatísticas
+        # resumidas; a mediana vem do sketch de quantis (erro relativo limitado)
+        results: dict[str, dict] = {}
+        for p in acc.params:
+            m = acc.get('Mineradora', p)
+            d = acc.get('Distribuidora', p)
+            if m.count < 2 or d.count < 2:
+                results[p] = self._insufficient()
+                continue
+            t_stat, t_p = ttest_ind_from_stats(m.mean, m.std, m.count, d.mean, d.std, d.count, equal_var=False)
+            unknown = {'is_normal': None, 'p_value': None, 'statistic': None}
+            results[p] = {
+                'mean_mineradora': m.mean,
+                'mean_distribuidora': d.mean,
+                'median_mineradora': m.median,
+                'median_distribuidora': d.median,
+                'std_mineradora': m.std,
+                'std_distribuidora': d.std,
+                'normality_mineradora': unknown,
+                'normality_distribuidora': dict(unknown),
+                'test_used': 'Teste t de Welch (incremental)',
+                'p_value': float(t_p),
+                'statistic': float(t_stat),
+                'ci_mineradora': self._ci_from_stats(m.mean, m.std, m.count, confidence),
+                'ci_distribuidora': self._ci_from_stats(d.mean, d.std, d.count, confidence),
+                'effect_size': self._cohen_d_from_stats(m.mean, m.variance, m.count, d.mean, d.variance, d.count),
+            }
+        return results
+
+    def _analyze_param(self, data: LabDataset, param: str) -> dict:
+        m = data.values('Mineradora', param)
+        d = data.values('Distribuidora', param)
 
         if len(m) < 2 or len(d) < 2:
             return self._insufficient()
+        if self.large_sample_threshold is not None and max(len(m), len(d)) > self.large_sample_threshold:
+            return self._analyze_large(m, d)
+        # Até o limite as séries são pequenas: cópia em float64 para médias, variâncias e testes
+        m, d = m.astype(np.float64, copy=False), d.astype(np.float64, copy=False)
 
         stats_m = self._desc(m)
         stats_d = self._desc(d)
@@ -35,12 +120,15 @@ class StatisticalAnalyzer:
         norm_m = self._normality(m)
         norm_d = self._normality(d)
 
-        test = self._choose_test(m, d, norm_m, norm_d)
+        if self.test_strategy == 'classic':
+            test = self._choose_test(m, d, norm_m, norm_d)
+        else:
+            test = self._resampling_test(m, d)
 
         ci_m = self._ci(m)
         ci_d = self._ci(d)
 
-        return {
+        result = {
             'mean_mineradora': stats_m['mean'],
             'mean_distribuidora': stats_d['mean'],
             'median_mineradora': stats_m['median'],
@@ -56,22 +144,108 @@ class StatisticalAnalyzer:
             'ci_distribuidora': ci_d,
             'effect_size': self._cohen_d(m, d),
         }
+        if 'ci_difference' in test:
+            result['ci_difference'] = test['ci_difference']
+        return result
 
-    def _desc(self, x: pd.Series) -> dict:
+    def _analyze_large(self, m: np.ndarray, d: np.ndarray) -> dict:
+        mom_m = large_sample.moments(m)
+        mom_d = large_sample.moments(d)
+        sorted_m = np.sort(m)
+        sorted_d = np.sort(d)
+        var_m = large_sample.variance(mom_m)
+        var_d = large_sample.variance(mom_d)
+        std_m, std_d = float(np.sqrt(var_m)), float(np.sqrt(var_d))
+
+        norm_m = large_sample.normality(sorted_m, mom_m, self.alpha)
+        norm_d = large_sample.normality(sorted_d, mom_d, self.alpha)
+
+        if self.test_strategy != 'classic':
+            test = self._resampling_test(m, d)
+        elif norm_m['is_normal'] and norm_d['is_normal']:
+            equal_var = bool(large_sample.levene_median(sorted_m, sorted_d, mom_m, mom_d) > self.alpha)
+            t_stat, t_p = ttest_ind_from_stats(
+                mom_m['mean'], std_m, mom_m['n'], mom_d['mean'], std_d, mom_d['n'], equal_var=equal_var
+            )
+            test = {
+                'test_name': f"Teste t ({'variâncias iguais' if equal_var else 'variâncias diferentes'})",
+                'p_value': float(t_p),
+                'statistic': float(t_stat),
+            }
+        else:
+            u_stat, u_p = large_sample.mann_whitney(sorted_m, sorted_d)
+            test = {'test_name': 'Mann-Whitney U', 'p_value': u_p, 'statistic': u_stat}
+
+        result = {
+            'mean_mineradora': mom_m['mean'],
+            'mean_distribuidora': mom_d['mean'],
+            'median_mineradora': large_sample.median(sorted_m),
+            'median_distribuidora': large_sample.median(sorted_d),
+            'std_mineradora': std_m,
+            'std_distribuidora': std_d,
+            'normality_mineradora': norm_m,
+            'normality_distribuidora': norm_d,
+            'test_used': test['test_name'],
+            'p_value': test['p_value'],
+            'statistic': test['statistic'],
+            'ci_mineradora': self._ci_from_stats(mom_m['mean'], std_m, mom_m['n']),
+            'ci_distribuidora': self._ci_from_stats(mom_d['mean'], std_d, mom_d['n']),
+            'effect_size': self._cohen_d_from_stats(mom_m['mean'], var_m, mom_m['n'], mom_d['mean'], var_d, mom_d['n']),
+        }
+        if 'ci_difference' in test:
+            result['ci_difference'] = test['ci_difference']
+        return result
+
+    def _analyze_pairs(self, a: np.ndarray, b: np.ndarray) -> dict:
+        diff = a - b
+        n = len(diff)
+        if n < 3:
+            return {'n_pairs': n, 'test_used': 'Dados insuficientes', 'p_value': np.nan, 'statistic': np.nan}
+        stats_diff = self._desc(diff)
+        norm = self._normality(diff)
+        if norm['is_normal']:
+            t_stat, t_p = ttest_rel(a, b)
+            test_name, p_value, statistic = 'Teste t pareado', float(t_p), float(t_stat)
+        elif np.any(diff != 0):
+            w_stat, w_p = wilcoxon(a, b)
+            test_name, p_value, statistic = 'Wilcoxon (postos sinalizados)', float(w_p), float(w_stat)
+        else:
+            # Todos os pares idênticos: não há diferença a testar
+            test_name, p_value, statistic = 'Wilcoxon (postos sinalizados)', 1.0, 0.0
+        std = stats_diff['std']
         return {
-            'mean': float(np.mean(x)),
+            'n_pairs': n,
+            'mean_mineradora': float(np.mean(a)),
+            'mean_distribuidora': float(np.mean(b)),
+            'mean_difference': stats_diff['mean'],
+            'median_difference': stats_diff['median'],
+            'std_difference': std,
+            'normality_difference': norm,
+            'test_used': test_name,
+            'p_value': p_value,
+            'statistic': statistic,
+            'ci_difference': self._ci(diff, 1 - self.alpha),
+            'effect_size': stats_diff['mean'] / std if std > 0 else float('nan'),
+        }
+
+    def _desc(self, x: np.ndarray) -> dict:
+        return {
+            'mean': float(np.mean(x, dtype=np.float64)),
             'median': float(np.median(x)),
-            'std': float(np.std(x, ddof=1)),
+            'std': float(np.std(x, ddof=1, dtype=np.float64)),
             'count': int(len(x)),
         }
 
-    def _normality(self, x: pd.Series) -> dict:
+    def _normality(self, x: np.ndarray) -> dict:
         if len(x) < 3:
             return {'is_normal': False, 'p_value': None, 'statistic': None}
+        if self.large_sample_threshold is not None and len(x) > SHAPIRO_MAX_N:
+            # Acima do limite do Shapiro-Wilk (diferenças pareadas de históricos longos, por exemplo)
+            return large_sample.normality(x, large_sample.moments(x), self.alpha)
         stat, p = shapiro(x)
         return {'is_normal': bool(p > self.alpha), 'p_value': float(p), 'statistic': float(stat)}
 
-    def _choose_test(self, a: pd.Series, b: pd.Series, na: dict, nb: dict) -> dict:
+    def _choose_test(self, a: np.ndarray, b: np.ndarray, na: dict, nb: dict) -> dict:
         if na['is_normal'] and nb['is_normal']:
             lev_stat, lev_p = levene(a, b)
             equal_var = bool(lev_p > self.alpha)
@@ -84,21 +258,50 @@ class StatisticalAnalyzer:
         u_stat, u_p = mannwhitneyu(a, b, alternative='two-sided')
         return {'test_name': 'Mann-Whitney U', 'p_value': float(u_p), 'statistic': float(u_stat)}
 
-    def _ci(self, x: pd.Series, confidence: float = 0.95) -> tuple[float, float]:
+    def _resampling_test(self, a: np.ndarray, b: np.ndarray) -> dict:
+        engine = self.resampling
+        label = 'médias' if engine.statistic == 'mean' else 'medianas'
+        boot = engine.bootstrap(a, b, confidence=1 - self.alpha)
+        if self.test_strategy == 'permutation':
+            perm = engine.permutation_test(a, b)
+            return {
+                'test_name': f"Permutação ({'exata' if perm['exact'] else 'Monte Carlo'}, diferença de {label})",
+                'p_value': perm['p_value'],
+                'statistic': perm['statistic'],
+                'ci_difference': boot['ci'],
+            }
+        return {
+            'test_name': f"Bootstrap (diferença de {label})",
+            'p_value': boot['p_value'],
+            'statistic': boot['statistic'],
+            'ci_difference': boot['ci'],
+        }
+
+    def _ci(self, x: np.ndarray, confidence: float = 0.95) -> tuple[float, float]:
         if len(x) < 2:
             return (float('nan'), float('nan'))
-        mean = float(np.mean(x))
-        sem = float(stats.sem(x))
+        mean = float(np.mean(x, dtype=np.float64))
+        sem = float(np.std(x, ddof=1, dtype=np.float64)) / np.sqrt(len(x))
         h = sem * float(stats.t.ppf((1 + confidence) / 2.0, len(x) - 1))
         return (mean - h, mean + h)
 
-    def _cohen_d(self, a: pd.Series, b: pd.Series) -> float:
+    def _ci_from_stats(self, mean: float, std: float, n: int, confidence: float = 0.95) -> tuple[float, float]:
+        h = std / np.sqrt(n) * float(stats.t.ppf((1 + confidence) / 2.0, n - 1))
+        return (mean - h, mean + h)
+
+    def _cohen_d_from_stats(self, m1: float, v1: float, n1: int, m2: float, v2: float, n2: int) -> float:
+        pooled = np.sqrt(((n1 - 1) * v1 + (n2 - 1) * v2) / (n1 + n2 - 2))
+        if pooled == 0:
+            return float('nan')
+        return (m1 - m2) / float(pooled)
+
+    def _cohen_d(self, a: np.ndarray, b: np.ndarray) -> float:
         n1, n2 = len(a), len(b)
-        s1, s2 = np.var(a, ddof=1), np.var(b, ddof=1)
+        s1, s2 = np.var(a, ddof=1, dtype=np.float64), np.var(b, ddof=1, dtype=np.float64)
         pooled = np.sqrt(((n1 - 1) * s1 + (n2 - 1) * s2) / (n1 + n2 - 2))
         if pooled == 0:
             return float('nan')
-        return (float(np.mean(a)) - float(np.mean(b))) / float(pooled)
+        return (float(np.mean(a, dtype=np.float64)) - float(np.mean(b, dtype=np.float64))) / float(pooled)
 
     def _insufficient(self) -> dict:
         return {
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import re
+import threading
+from pathlib import Path
+
+
+NUMBER = re.compile(r'\s*(\d+[,.]?\d*)')
+HEADER_LINES = 4
+_DIGITS = re.compile(r'\d+')
+
+
+def fingerprint(first_page: str) -> str | None:
+    # Cabeçalho da 1ª página sem números (nº do laudo, datas) e com espaços normalizados
+    lines = []
+    for line in first_page.split('\n'):
+        line = ' '.join(line.split())
+        if line:
+            lines.append(_DIGITS.sub('#', line))
+            if len(lines) == HEADER_LINES:
+                break
+    if not lines:
+        return None
+    return hashlib.sha1('\n'.join(lines).encode('utf-8')).hexdigest()[:16]
+
+
+class LabTemplate:
+    # Extrator específico de um laboratório: o rótulo fixo que antecede cada valor no layout
+    def __init__(self, key: str, backend: str, labels: dict[str, tuple[int, str]]) -> None:
+        self.key = key
+        self.backend = backend
+        self.labels = labels
+
+    @property
+    def params(self) -> list[str]:
+        return list(self.labels)
+
+    def scan(self, text: str) -> dict[str, tuple[int, float]]:
+        found = {}
+        for param, (rank, label) in self.labels.items():
+            pos = text.find(label)
+            if pos < 0:
+                continue
+            m = NUMBER.match(text, pos + len(label))
+            if m is None:
+                continue
+            try:
+                found[param] = (rank, float(m.group(1).replace(',', '.')))
+            except ValueError:
+                continue
+        return found
+
+
+def learn_labels(text: str, found: dict[str, tuple[int, float]], parameter_patterns: dict) -> dict[str, tuple[int, str]]:
+    # Para cada valor achado pelo caminho genérico, guarda a linha até o número como rótulo, desde
+    # que o rótulo sozinho reproduza o mesmo valor no mesmo documento
+    labels = {}
+    for param, (rank, value) in found.items():
+        rx = re.compile(parameter_patterns[param][rank], re.IGNORECASE | re.DOTALL)
+        for m in rx.finditer(text):
+            try:
+                v = float(m.group(1).replace(',', '.'))
+            except ValueError:
+                continue
+            if v != value:
+                break
+            line_start = text.rfind('\n', 0, m.start()) + 1
+            label = text[line_start:m.start(1)]
+            if label.strip() and '\n' not in label and text.find(label) == line_start:
+                labels[param] = (rank, label)
+            break
+    return labels
+
+
+class TemplateRegistry:
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        patterns_version: str | None = None,
+        min_agreements: int = 3,
+        verify_every: int = 50,
+    ) -> None:
+        self.path = Path(path) if path is not None else None
+        self.patterns_version = patterns_version
+        self.min_agreements = min_agreements
+        self.verify_every = verify_every
+        self._lock = threading.Lock()
+        self._templates: dict[str, dict] = {}
+        self._dirty = False
+        if self.path is not None and self.path.exists():
+            with self.path.open(encoding="utf-8") as fh:
+                stored = json.load(fh)
+            # Rótulos aprendidos com outros padrões não valem mais
+            if stored.get('patterns_version') == patterns_version:
+                self._templates = stored['templates']
+                for t in self._templates.values():
+                    t['labels'] = {p: tuple(v) for p, v in t['labels'].items()}
+
+    def trusted(self) -> dict[str, LabTemplate]:
+        with self._lock:
+            return {
+                key: LabTemplate(key, t['backend'], dict(t['labels']))
+                for key, t in self._templates.items()
+                if t['agreements'] >= self.min_agreements and len(t['labels']) >= 3
+            }
+
+    def observe(self, diag: dict) -> None:
+        key = diag.get('fingerprint')
+        if key is None:
+            return
+        with self._lock:
+            t = self._templates.setdefault(
+                key,
+                {'backend': None, 'labels': {}, 'agreements': 0, 'seen': 0, 'hits': 0, 'fallbacks': 0, 'resets': 0},
+            )
+            t['seen'] += 1
+            outcome = diag.get('template')
+            if outcome == 'hit':
+                t['hits'] += 1
+            elif outcome == 'fallback':
+                t['fallbacks'] += 1
+            if diag.get('template_mismatch'):
+                self._reset(t)
+            elif outcome == 'fallback' and t['fallbacks'] > max(10, t['hits']):
+                # Layout mudou: a maioria dos documentos não passa mais na validação
+                self._reset(t)
+            labels = diag.get('labels') or {}
+            if outcome is None and len(labels) >= 3:
+                self._learn(t, diag['labels_backend'], labels)
+            self._dirty = True
+
+    def _learn(self, t: dict, backend: str, labels: dict) -> None:
+        conflict = t['backend'] not in (None, backend) or any(
+            p in t['labels'] and tuple(t['labels'][p]) != tuple(v) for p, v in labels.items()
+        )
+        if conflict:
+            t['labels'] = {}
+            t['agreements'] = 0
+        t['backend'] = backend
+        t['labels'].update({p: tuple(v) for p, v in labels.items()})
+        t['agreements'] += 1
+
+    def _reset(self, t: dict) -> None:
+        t['labels'] = {}
+        t['agreements'] = 0
+        t['backend'] = None
+        t['resets'] += 1
+
+    def save(self) -> None:
+        if self.path is None or not self._dirty:
+            return
+        with self._lock:
+            payload = {'patterns_version': self.patterns_version, 'templates': self._templates}
+            tmp = self.path.with_suffix('.tmp')
+            with tmp.open("w", encoding="utf-8") as fh:
+                json.dump(payload, fh, ensure_ascii=False)
+            tmp.replace(self.path)
+            self._dirty = False
+
+    def summary(self) -> dict:
+        with self._lock:
+            seen = sum(t['seen'] for t in self._templates.values())
+            hits = sum(t['hits'] for t in self._templates.values())
+            return {
+                'templates': len(self._templates),
+                'trusted': sum(1 for t in self._templates.values() if t['agreements'] >= self.min_agreements and len(t['labels']) >= 3),
+                'seen': seen,
+                'hits': hits,
+                'fallbacks': sum(t['fallbacks'] for t in self._templates.values()),
+                'hit_rate': hits / seen if seen else None,
+            }
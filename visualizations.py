@@ -4,12 +4,26 @@ from scipy import stats
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from lab_dataset import LabDataset
+
 
 class VisualizationGenerator:
-    def __init__(self) -> None:
+    def __init__(self, large_data_threshold: int = 20000, max_outliers: int = 200, qq_points: int = 500) -> None:
         self.colors = {'Mineradora': '#1f77b4', 'Distribuidora': '#ff7f0e'}
+        # A partir deste número de linhas, as figuras levam só estatísticas e amostras ao navegador
+        self.large_data_threshold = large_data_threshold
+        self.max_outliers = max_outliers
+        self.qq_points = qq_points
+
+    def is_large(self, data: LabDataset) -> bool:
+        return len(data) >= self.large_data_threshold
+
+    @staticmethod
+    def payload_bytes(fig: go.Figure) -> int:
+        return len(fig.to_json().encode('utf-8'))
 
-    def create_boxplots(self, df: pd.DataFrame) -> go.Figure:
+    def create_boxplots(self, df: pd.DataFrame | LabDataset) -> go.Figure:
+        data = LabDataset.coerce(df)
         params = [
             'viscosidade_40c',
             'teor_agua',
@@ -17,19 +31,24 @@ class VisualizationGenerator:
             'particulas_6um',
             'particulas_14um',
         ]
-        available = [p for p in params if p in df.columns]
+        available = [p for p in params if p in data]
         if not available:
             return go.Figure()
 
+        large = self.is_large(data)
         fig = make_subplots(rows=1, cols=len(available), subplot_titles=available, horizontal_spacing=0.08)
         for i, p in enumerate(available, start=1):
             for origin in ['Mineradora', 'Distribuidora']:
-                y = df[df['origem'] == origin][p].dropna()
-                fig.add_box(y=y, name=origin, marker_color=self.colors[origin], showlegend=(i == 1), row=1, col=i)
+                y = data.values(origin, p)
+                if large and len(y):
+                    fig.add_trace(self._summary_box(y, origin, showlegend=(i == 1)), row=1, col=i)
+                else:
+                    fig.add_box(y=y, name=origin, marker_color=self.colors[origin], showlegend=(i == 1), row=1, col=i)
         fig.update_layout(title="Comparação por Parâmetro", boxmode='group', height=500)
         return fig
 
-    def create_normality_plots(self, df: pd.DataFrame) -> go.Figure:
+    def create_normality_plots(self, df: pd.DataFrame | LabDataset) -> go.Figure:
+        data = LabDataset.coerce(df)
         params = [
             'viscosidade_40c',
             'teor_agua',
@@ -37,7 +56,7 @@ class VisualizationGenerator:
             'particulas_6um',
             'particulas_14um',
         ]
-        available = [p for p in params if p in df.columns]
+        available = [p for p in params if p in data]
         if not available:
             return go.Figure()
 
@@ -46,17 +65,30 @@ class VisualizationGenerator:
         rows = (n + cols - 1) // cols
         fig = make_subplots(rows=rows, cols=cols, subplot_titles=available, vertical_spacing=0.12, horizontal_spacing=0.08)
 
+        large = self.is_large(data)
         for idx, p in enumerate(available):
             r = idx // cols + 1
             c = idx % cols + 1
             for origin in ['Mineradora', 'Distribuidora']:
-                y = np.sort(df[df['origem'] == origin][p].dropna().values)
+                y = np.sort(data.values(origin, p))
                 if len(y) < 3:
                     continue
-                q_theo = stats.norm.ppf((np.arange(1, len(y) + 1)) / (len(y) + 1))
-                fig.add_scatter(x=q_theo, y=y, mode='markers', name=f"{origin}-{p}", marker=dict(color=self.colors[origin]), showlegend=(idx == 0), row=r, col=c)
+                ranks = np.arange(len(y))
+                if large and len(y) > self.qq_points:
+                    # Amostra por quantis: posições igualmente espaçadas na ordem, extremos sempre incluídos
+                    ranks = np.unique(np.linspace(0, len(y) - 1, self.qq_points).round().astype(np.int64))
+                q_theo = stats.norm.ppf((ranks + 1) / (len(y) + 1))
+                marker = dict(color=self.colors[origin])
+                if large:
+                    fig.add_trace(
+                        go.Scattergl(x=q_theo, y=y[ranks], mode='markers', name=f"{origin}-{p}", marker=marker, showlegend=(idx == 0)),
+                        row=r,
+                        col=c,
+                    )
+                else:
+                    fig.add_scatter(x=q_theo, y=y, mode='markers', name=f"{origin}-{p}", marker=marker, showlegend=(idx == 0), row=r, col=c)
             # Reference line using mineradora stats when available
-            y_ref = df[df['origem'] == 'Mineradora'][p].dropna().values
+            y_ref = data.values('Mineradora', p)
             if len(y_ref) >= 2:
                 mean = float(np.mean(y_ref))
                 std = float(np.std(y_ref))
@@ -67,6 +99,76 @@ class VisualizationGenerator:
         fig.update_layout(title="Gráficos de Probabilidade Normal (QQ)", height=380 * rows)
         return fig
 
+    def _summary_box(self, y: np.ndarray, origin: str, showlegend: bool) -> go.Box:
+        q1, median, q3 = np.quantile(y, [0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        inside = y[(y >= q1 - 1.5 * iqr) & (y <= q3 + 1.5 * iqr)]
+        outliers = np.sort(y[(y < q1 - 1.5 * iqr) | (y > q3 + 1.5 * iqr)])
+        if len(outliers) > self.max_outliers:
+            outliers = outliers[np.unique(np.linspace(0, len(outliers) - 1, self.max_outliers).round().astype(np.int64))]
+        # Estatísticas pré-calculadas (assinatura q1/median/q3 do Plotly); só os outliers amostrados vão como pontos
+        return go.Box(
+            x=[origin],
+            q1=[q1],
+            median=[median],
+            q3=[q3],
+            lowerfence=[inside.min()],
+            upperfence=[inside.max()],
+            y=[outliers.tolist()],
+            boxpoints='outliers',
+            name=origin,
+            marker_color=self.colors[origin],
+            showlegend=showlegend,
+        )
+
+    def create_control_chart(self, spc: dict, param: str) -> go.Figure:
+        series = spc['series'].get(param) or {}
+        if not series:
+            return go.Figure()
+
+        fig = make_subplots(
+            rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.06,
+            subplot_titles=("Valores individuais (Shewhart)", "EWMA", "CUSUM"),
+        )
+        for origin in ['Mineradora', 'Distribuidora']:
+            s = series.get(origin)
+            if s is None:
+                continue
+            color = self.colors[origin]
+            labels = s['labels']
+            # Datas da coleta no eixo x quando todos os laudos têm data; senão, a ordem do laudo
+            x = labels if all(v is not None for v in labels) else np.arange(1, len(s['value']) + 1)
+            scatter = go.Scattergl if len(x) >= self.large_data_threshold else go.Scatter
+            fig.add_trace(scatter(x=x, y=s['value'], mode='lines+markers', name=origin, marker=dict(color=color, size=4), line=dict(width=1)), row=1, col=1)
+            fig.add_trace(scatter(x=x, y=s['ewma'], mode='lines', name=f"EWMA {origin}", line=dict(color=color), showlegend=False), row=2, col=1)
+            fig.add_trace(scatter(x=x, y=s['cusum_hi'], mode='lines', name=f"CUSUM+ {origin}", line=dict(color=color), showlegend=False), row=3, col=1)
+            fig.add_trace(scatter(x=x, y=-s['cusum_lo'], mode='lines', name=f"CUSUM- {origin}", line=dict(color=color, dash='dot'), showlegend=False), row=3, col=1)
+            if 'center' not in s:
+                continue
+            for y, dash in ((s['center'], 'solid'), (s['ucl'], 'dash'), (s['lcl'], 'dash')):
+                fig.add_hline(y=y, line=dict(color=color, dash=dash, width=1), row=1, col=1)
+            fig.add_trace(scatter(x=x, y=s['ewma_ucl'], mode='lines', line=dict(color=color, dash='dash', width=1), showlegend=False, hoverinfo='skip'), row=2, col=1)
+            fig.add_trace(scatter(x=x, y=s['ewma_lcl'], mode='lines', line=dict(color=color, dash='dash', width=1), showlegend=False, hoverinfo='skip'), row=2, col=1)
+            for y in (s['cusum_limit'], -s['cusum_limit']):
+                fig.add_hline(y=y, line=dict(color=color, dash='dash', width=1), row=3, col=1)
+
+            alarm = np.zeros(len(x), dtype=bool)
+            for rule, flags in s['flags'].items():
+                alarm |= flags
+            if alarm.any():
+                fig.add_trace(
+                    scatter(x=np.asarray(x)[alarm], y=s['value'][alarm], mode='markers', name=f"Alarme {origin}",
+                            marker=dict(color='red', symbol='x', size=8)),
+                    row=1, col=1,
+                )
+
+        spec = spc['spec'].get(param)
+        if spec:
+            for y in (spec['min'], spec['max']):
+                fig.add_hline(y=y, line=dict(color='red', width=1), annotation_text="Limite normativo", row=1, col=1)
+        fig.update_layout(title=f"Cartas de controle - {param}", height=800)
+        return fig
+
     def create_pareto_chart(self, results: dict) -> go.Figure:
         rows = []
         for p, r in results.items():